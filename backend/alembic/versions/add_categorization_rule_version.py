@@ -0,0 +1,30 @@
+"""add categorization rule version
+
+Revision ID: b4c5d6e7f809
+Revises: a3b4c5d6e7f8
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4c5d6e7f809'
+down_revision = 'a3b4c5d6e7f8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Bumped with every category or rule change; processes compare it to their compiled rules
+    op.create_table('categorization_rule_version',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.execute("INSERT INTO categorization_rule_version (id, version) VALUES (1, 0)")
+
+
+def downgrade():
+    op.drop_table('categorization_rule_version')
@@ -0,0 +1,41 @@
+"""add categorization rules
+
+Revision ID: 6f708192a3b4
+Revises: 5e6f708192a3
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6f708192a3b4'
+down_revision = '5e6f708192a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # User-editable categorization rules; init_db seeds the defaults into an empty table
+    op.create_table('categorization_rules',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=False),
+        sa.Column('pattern', sa.String(), nullable=False),
+        sa.Column('match_type', sa.String(), nullable=False),
+        sa.Column('priority', sa.Integer(), nullable=False),
+        sa.Column('min_amount', sa.Float(), nullable=True),
+        sa.Column('max_amount', sa.Float(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_categorization_rules_id'), 'categorization_rules', ['id'], unique=False)
+    op.create_index(op.f('ix_categorization_rules_category_id'), 'categorization_rules', ['category_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_categorization_rules_category_id'), table_name='categorization_rules')
+    op.drop_index(op.f('ix_categorization_rules_id'), table_name='categorization_rules')
+    op.drop_table('categorization_rules')
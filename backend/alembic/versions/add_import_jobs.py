@@ -0,0 +1,45 @@
+"""add import jobs
+
+Revision ID: 3c4d5e6f7081
+Revises: 2b3c4d5e6f70
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c4d5e6f7081'
+down_revision = '2b3c4d5e6f70'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Background CSV import jobs and their progress
+    op.create_table('import_jobs',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('filename', sa.String(), nullable=False),
+        sa.Column('file_path', sa.String(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('rows_processed', sa.Integer(), nullable=False),
+        sa.Column('successful', sa.Integer(), nullable=False),
+        sa.Column('failed', sa.Integer(), nullable=False),
+        sa.Column('errors', sa.Text(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_import_jobs_user_id'), 'import_jobs', ['user_id'], unique=False)
+    op.create_index(op.f('ix_import_jobs_status'), 'import_jobs', ['status'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_import_jobs_status'), table_name='import_jobs')
+    op.drop_index(op.f('ix_import_jobs_user_id'), table_name='import_jobs')
+    op.drop_table('import_jobs')
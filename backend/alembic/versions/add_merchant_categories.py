@@ -0,0 +1,39 @@
+"""add merchant categories
+
+Revision ID: 2b3c4d5e6f70
+Revises: 1a2b3c4d5e6f
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2b3c4d5e6f70'
+down_revision = '1a2b3c4d5e6f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Learned normalized description -> category map used by CSV imports
+    op.create_table('merchant_categories',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('merchant_key', sa.String(), nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'merchant_key', name='uq_merchant_categories_user_merchant')
+    )
+    op.create_index(op.f('ix_merchant_categories_id'), 'merchant_categories', ['id'], unique=False)
+    op.create_index(op.f('ix_merchant_categories_user_id'), 'merchant_categories', ['user_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_merchant_categories_user_id'), table_name='merchant_categories')
+    op.drop_index(op.f('ix_merchant_categories_id'), table_name='merchant_categories')
+    op.drop_table('merchant_categories')
@@ -0,0 +1,51 @@
+"""add recurring series
+
+Revision ID: a3b4c5d6e7f8
+Revises: 92a3b4c5d6e7
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3b4c5d6e7f8'
+down_revision = '92a3b4c5d6e7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Recurring transactions detected per merchant, re-detected after each import.
+    # Backfill with: python app/scripts/detect_recurring.py
+    op.create_table('recurring_series',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('merchant_key', sa.String(), nullable=False),
+        sa.Column('description', sa.String(), nullable=True),
+        sa.Column('transaction_type', sa.String(), nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=True),
+        sa.Column('cadence', sa.String(), nullable=False),
+        sa.Column('interval_days', sa.Float(), nullable=False),
+        sa.Column('regularity', sa.Float(), nullable=False),
+        sa.Column('typical_amount', sa.Float(), nullable=False),
+        sa.Column('amount_variation', sa.Float(), nullable=False),
+        sa.Column('amount_stable', sa.Boolean(), nullable=False),
+        sa.Column('transaction_count', sa.Integer(), nullable=False),
+        sa.Column('first_date', sa.Date(), nullable=False),
+        sa.Column('last_date', sa.Date(), nullable=False),
+        sa.Column('next_expected_date', sa.Date(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_recurring_series_id'), 'recurring_series', ['id'], unique=False)
+    op.create_index('ix_recurring_series_user_merchant', 'recurring_series', ['user_id', 'merchant_key'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_recurring_series_user_merchant', table_name='recurring_series')
+    op.drop_index(op.f('ix_recurring_series_id'), table_name='recurring_series')
+    op.drop_table('recurring_series')
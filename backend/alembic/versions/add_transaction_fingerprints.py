@@ -0,0 +1,30 @@
+"""add transaction fingerprints
+
+Revision ID: 8192a3b4c5d6
+Revises: 708192a3b4c5
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8192a3b4c5d6'
+down_revision = '708192a3b4c5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Content hash of each statement line, used to skip re-imported rows.
+    # Existing rows are fingerprinted by init_db.
+    op.add_column('transactions', sa.Column('fingerprint', sa.String(), nullable=True))
+    op.create_index(op.f('ix_transactions_fingerprint'), 'transactions', ['fingerprint'], unique=True)
+    op.add_column('import_jobs', sa.Column('duplicates', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('import_jobs', 'duplicates')
+    op.drop_index(op.f('ix_transactions_fingerprint'), table_name='transactions')
+    op.drop_column('transactions', 'fingerprint')
@@ -0,0 +1,28 @@
+"""add transaction merchant key
+
+Revision ID: 708192a3b4c5
+Revises: 6f708192a3b4
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '708192a3b4c5'
+down_revision = '6f708192a3b4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Canonical merchant of each description; existing rows are backfilled by init_db,
+    # which also rebuilds the merchant index on the new keys
+    op.add_column('transactions', sa.Column('merchant_key', sa.String(), nullable=True))
+    op.create_index('ix_transactions_user_merchant', 'transactions', ['user_id', 'merchant_key'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_transactions_user_merchant', table_name='transactions')
+    op.drop_column('transactions', 'merchant_key')
@@ -0,0 +1,42 @@
+"""add transaction rollups
+
+Revision ID: 5e6f708192a3
+Revises: 4d5e6f708192
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e6f708192a3'
+down_revision = '4d5e6f708192'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Monthly per-category totals served by the summary endpoints.
+    # Backfill with: python app/scripts/rebuild_rollups.py
+    op.create_table('transaction_rollups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('year', sa.Integer(), nullable=False),
+        sa.Column('month', sa.Integer(), nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=True),
+        sa.Column('transaction_type', sa.String(), nullable=False),
+        sa.Column('total_amount', sa.Float(), nullable=False),
+        sa.Column('transaction_count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_transaction_rollups_id'), 'transaction_rollups', ['id'], unique=False)
+    op.create_index('ix_transaction_rollups_key', 'transaction_rollups', ['user_id', 'year', 'month', 'category_id', 'transaction_type'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_transaction_rollups_key', table_name='transaction_rollups')
+    op.drop_index(op.f('ix_transaction_rollups_id'), table_name='transaction_rollups')
+    op.drop_table('transaction_rollups')
@@ -0,0 +1,60 @@
+"""add transaction search index
+
+Revision ID: 92a3b4c5d6e7
+Revises: 8192a3b4c5d6
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '92a3b4c5d6e7'
+down_revision = '8192a3b4c5d6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        # Contentless FTS5 index; user_key ("u<user_id>") scopes searches to a user
+        op.execute("""CREATE VIRTUAL TABLE transactions_fts USING fts5(
+            user_key, description, raw_text,
+            content='', tokenize='unicode61 remove_diacritics 2'
+        )""")
+        op.execute("""CREATE TRIGGER transactions_fts_insert AFTER INSERT ON transactions BEGIN
+            INSERT INTO transactions_fts(rowid, user_key, description, raw_text)
+            VALUES (new.id, 'u' || new.user_id, new.description, new.raw_text);
+        END""")
+        op.execute("""CREATE TRIGGER transactions_fts_delete AFTER DELETE ON transactions BEGIN
+            INSERT INTO transactions_fts(transactions_fts, rowid, user_key, description, raw_text)
+            VALUES ('delete', old.id, 'u' || old.user_id, old.description, old.raw_text);
+        END""")
+        op.execute("""CREATE TRIGGER transactions_fts_update AFTER UPDATE OF user_id, description, raw_text ON transactions BEGIN
+            INSERT INTO transactions_fts(transactions_fts, rowid, user_key, description, raw_text)
+            VALUES ('delete', old.id, 'u' || old.user_id, old.description, old.raw_text);
+            INSERT INTO transactions_fts(rowid, user_key, description, raw_text)
+            VALUES (new.id, 'u' || new.user_id, new.description, new.raw_text);
+        END""")
+        op.execute("""INSERT INTO transactions_fts(rowid, user_key, description, raw_text)
+            SELECT id, 'u' || user_id, description, raw_text FROM transactions""")
+    elif dialect == 'postgresql':
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute("""ALTER TABLE transactions ADD COLUMN search_vector tsvector
+            GENERATED ALWAYS AS (to_tsvector('simple', coalesce(description, '') || ' ' || coalesce(raw_text, ''))) STORED""")
+        op.execute("CREATE INDEX ix_transactions_search_vector ON transactions USING gin (search_vector)")
+        op.execute("CREATE INDEX ix_transactions_description_trgm ON transactions USING gin (description gin_trgm_ops)")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS transactions_fts_update")
+        op.execute("DROP TRIGGER IF EXISTS transactions_fts_delete")
+        op.execute("DROP TRIGGER IF EXISTS transactions_fts_insert")
+        op.execute("DROP TABLE IF EXISTS transactions_fts")
+    elif dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_transactions_description_trgm")
+        op.execute("DROP INDEX IF EXISTS ix_transactions_search_vector")
+        op.execute("ALTER TABLE transactions DROP COLUMN IF EXISTS search_vector")
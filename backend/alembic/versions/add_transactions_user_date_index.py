@@ -0,0 +1,25 @@
+"""add transactions user/date/id index
+
+Revision ID: 4d5e6f708192
+Revises: 3c4d5e6f7081
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4d5e6f708192'
+down_revision = '3c4d5e6f7081'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Covering index for per-user listing with keyset pagination
+    op.create_index('ix_transactions_user_date_id', 'transactions', ['user_id', 'date', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_transactions_user_date_id', table_name='transactions')
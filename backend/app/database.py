@@ -1,9 +1,19 @@
 import os
-from sqlalchemy import create_engine
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, Optional
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
 from dotenv import load_dotenv
 
+from app.cache import TTLCache
+
 # Load environment variables
 load_dotenv()
 
@@ -14,16 +24,228 @@ DATABASE_URL = os.getenv(
     "sqlite:///./transaction_classifier.db"
 )
 
+# An async driver in DATABASE_URL (e.g. sqlite+aiosqlite:// or postgresql+asyncpg://)
+# switches the async endpoints to AsyncSession. Import jobs, scripts and init_db
+# keep using a sync engine on the matching sync driver.
+ASYNC_DRIVERS = {"sqlite+aiosqlite": "sqlite", "postgresql+asyncpg": "postgresql"}
+
+def is_async_url(url: str) -> bool:
+    return make_url(url).drivername in ASYNC_DRIVERS
+
+def sync_database_url(url: str) -> str:
+    """The url with an async driver replaced by the matching sync one"""
+    parsed = make_url(url)
+    if parsed.drivername not in ASYNC_DRIVERS:
+        return url
+    return parsed.set(drivername=ASYNC_DRIVERS[parsed.drivername]).render_as_string(hide_password=False)
+
+ASYNC_DATABASE = is_async_url(DATABASE_URL)
+SYNC_DATABASE_URL = sync_database_url(DATABASE_URL)
+
+# Optional read replica for read-only endpoints (same driver rules as DATABASE_URL)
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL") or None
+
+# Users who wrote in the last READ_YOUR_WRITES_SECONDS read from the primary,
+# so they see their own changes before the replica catches up
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "10"))
+
+# Connection pool settings (server databases such as Postgres)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# SQLite settings, applied to every new connection. WAL lets readers work
+# while an import writes, and busy_timeout makes concurrent writers wait for
+# the lock instead of failing with "database is locked".
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "30000"))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+class PoolWaitStats:
+    """Counters of the time spent waiting for a pooled connection"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "total_wait_ms": round(self.total_wait * 1000, 3),
+                "avg_wait_ms": round(self.total_wait * 1000 / attempts, 3) if attempts else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 3)
+            }
+
+class _TimedPoolMixin:
+    """Times every checkout from the pool's queue, including waits for a free connection"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except Exception:
+            self.wait_stats.record(time.perf_counter() - started, timed_out=True)
+            raise
+        self.wait_stats.record(time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        # Keep the counters when the engine is disposed or the pool recreated
+        pool = super().recreate()
+        pool.wait_stats = self.wait_stats
+        return pool
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+def _is_memory_sqlite(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+def engine_options(url: str, use_async: bool = False) -> Dict:
+    """create_engine arguments for the database backend of url"""
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite":
+        # In-memory databases keep SQLAlchemy's default single-connection pool
+        if _is_memory_sqlite(url):
+            return {"connect_args": {"check_same_thread": False}}
+        # One process, low connection cost: the default pool sizes are enough
+        return {
+            # For SQLite, we need to add connect_args to handle multiple threads
+            "connect_args": {"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000},
+            "poolclass": TimedAsyncQueuePool if use_async else TimedQueuePool,
+            "pool_timeout": DB_POOL_TIMEOUT
+        }
+    return {
+        "poolclass": TimedAsyncQueuePool if use_async else TimedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING
+    }
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        # Negative cache_size is in KiB rather than pages
+        cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    finally:
+        cursor.close()
+
+def configure_engine(sync_engine):
+    """Install the per-connection setup of the engine's backend"""
+    if sync_engine.dialect.name == "sqlite" and not _is_memory_sqlite(sync_engine.url):
+        event.listen(sync_engine, "connect", _set_sqlite_pragmas)
+    return sync_engine
+
 # Create SQLAlchemy engine
-# For SQLite, we need to add connect_args to handle multiple threads
-engine = create_engine(
-    DATABASE_URL, 
-    connect_args={"check_same_thread": False}
-)
+engine = configure_engine(create_engine(SYNC_DATABASE_URL, **engine_options(SYNC_DATABASE_URL)))
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine, only in async mode. Objects stay loaded after commit, since
+# expired attributes can't be lazy loaded outside the session's greenlet.
+async_engine = create_async_engine(DATABASE_URL, **engine_options(DATABASE_URL, use_async=True)) if ASYNC_DATABASE else None
+if async_engine is not None:
+    configure_engine(async_engine.sync_engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False) if ASYNC_DATABASE else None
+
+# Read replica engines, only when DATABASE_READ_URL is set
+read_engine = None
+ReadSessionLocal = None
+async_read_engine = None
+AsyncReadSessionLocal = None
+if DATABASE_READ_URL:
+    _sync_read_url = sync_database_url(DATABASE_READ_URL)
+    read_engine = configure_engine(create_engine(_sync_read_url, **engine_options(_sync_read_url)))
+    ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+    if is_async_url(DATABASE_READ_URL):
+        async_read_engine = create_async_engine(DATABASE_READ_URL, **engine_options(DATABASE_READ_URL, use_async=True))
+        configure_engine(async_read_engine.sync_engine)
+        AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
+
+def get_pool_stats() -> Dict:
+    """Pool occupancy and checkout wait times of the database engines"""
+    stats = {}
+    engines = (("sync", engine), ("async", async_engine), ("read", read_engine), ("async_read", async_read_engine))
+    for name, pool_engine in engines:
+        if pool_engine is None:
+            continue
+        pool = pool_engine.pool
+        entry = {"pool": pool.__class__.__name__}
+        if isinstance(pool, QueuePool):
+            entry.update({
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow()
+            })
+        wait_stats = getattr(pool, "wait_stats", None)
+        if wait_stats is not None:
+            entry["wait"] = wait_stats.snapshot()
+        stats[name] = entry
+    return stats
+
+def dispose_inherited_connections():
+    """Drop pooled connections inherited from a parent process (call in forked workers)"""
+    engine.dispose(close=False)
+    if read_engine is not None:
+        read_engine.dispose(close=False)
+
+# Users with a recent write, by id
+recent_writers = TTLCache(maxsize=int(os.getenv("READ_YOUR_WRITES_MAXSIZE", "10000")), ttl=READ_YOUR_WRITES_SECONDS)
+_read_routing = {"replica": 0, "primary": 0}
+_read_routing_lock = threading.Lock()
+
+def record_user_write(user_id: Optional[int]):
+    """Route the user's reads to the primary for the next READ_YOUR_WRITES_SECONDS"""
+    if read_engine is not None and user_id is not None:
+        recent_writers.set(user_id, True)
+
+def use_read_replica(user_id: Optional[int]) -> bool:
+    """Whether a read of this user can go to the replica"""
+    if read_engine is None:
+        return False
+    replica = user_id is None or recent_writers.get(user_id) is None
+    with _read_routing_lock:
+        _read_routing["replica" if replica else "primary"] += 1
+    return replica
+
+def get_read_routing_stats() -> Dict:
+    """Reads sent to the replica, and to the primary after a recent write"""
+    with _read_routing_lock:
+        return {"replica_configured": read_engine is not None, **_read_routing}
+
 # Create Base class
 Base = declarative_base()
 
@@ -34,3 +256,39 @@ def get_db():
         yield db
     finally:
         db.close()
+
+class AsyncDB:
+    """
+    Database handle for async endpoints.
+
+    run(fn, *args) calls fn(session, *args) with a sync ORM Session: through
+    AsyncSession.run_sync in async mode, so database waits don't hold a thread,
+    or in the threadpool otherwise, so they never block the event loop.
+    """
+
+    def __init__(self, session):
+        self.session = session
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        if isinstance(self.session, AsyncSession):
+            return await self.session.run_sync(fn, *args, **kwargs)
+        return await run_in_threadpool(fn, self.session, *args, **kwargs)
+
+@asynccontextmanager
+async def async_db_handle(replica: bool = False):
+    """AsyncDB on the primary, or on the read replica"""
+    async_factory, factory = (AsyncReadSessionLocal, ReadSessionLocal) if replica else (AsyncSessionLocal, SessionLocal)
+    if async_factory is not None:
+        async with async_factory() as session:
+            yield AsyncDB(session)
+    else:
+        db: Session = factory()
+        try:
+            yield AsyncDB(db)
+        finally:
+            db.close()
+
+# Dependency to get a DB handle in async endpoints
+async def get_async_db():
+    async with async_db_handle() as db:
+        yield db
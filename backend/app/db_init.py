@@ -1,11 +1,44 @@
+from sqlalchemy import inspect, text
 from sqlalchemy.orm import Session
 from app.database import SessionLocal, engine, Base
 from app.models.category import Category
+from app.models.categorization_rule import CategorizationRule
+from app.models.merchant_category import MerchantCategory
+from app.models.transaction import Transaction
+from app.models.transaction_rollup import TransactionRollup
+from app.models.recurring_series import RecurringSeries
+from app.services.categorization import get_rule_registry, seed_default_rules
+from app.services.deduplication import backfill_fingerprints
+from app.services.merchant_index import backfill_merchant_keys, rebuild_merchant_index
+from app.services.recurring import rebuild_recurring_series
+from app.services.rollups import rebuild_rollups
+from app.services.search import ensure_search_index
 
 def init_db():
     """Initialize the database with default data"""
+    # An empty series table is normal, so detect on existing data only when it is new
+    recurring_table_existed = inspect(engine).has_table(RecurringSeries.__tablename__)
     Base.metadata.create_all(bind=engine)
     
+    # create_all doesn't alter existing tables; add nullable columns introduced since
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing_columns and column.nullable:
+                column_type = column.type.compile(dialect=engine.dialect)
+                with engine.begin() as connection:
+                    connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                print(f"Added column {table.name}.{column.name}")
+    
+    # create_all only indexes new tables; add indexes introduced since a table was created
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    
+    # Full-text search index over descriptions (FTS5 on SQLite, tsvector/pg_trgm on Postgres)
+    ensure_search_index(engine)
+    
     db = SessionLocal()
     
     # Check if we already have categories
@@ -34,6 +67,44 @@ def init_db():
         db.commit()
         print(f"Added {len(default_categories)} default categories")
     
+    # Seed the categorization rules (and the categories they point at) once
+    if db.query(CategorizationRule.id).first() is None:
+        rule_count = seed_default_rules(db)
+        print(f"Added {rule_count} default categorization rules")
+    
+    # Backfill merchant keys of transactions stored before they existed
+    backfilled = 0
+    if db.query(Transaction.id).filter(Transaction.merchant_key.is_(None)).first() is not None:
+        backfilled = backfill_merchant_keys(db)
+        print(f"Computed merchant keys for {backfilled} transactions")
+    
+    # Fingerprint transactions stored before import deduplication
+    if db.query(Transaction.id).filter(Transaction.fingerprint.is_(None), Transaction.date.isnot(None)).first() is not None:
+        fingerprinted = backfill_fingerprints(db)
+        print(f"Computed fingerprints for {fingerprinted} transactions")
+    
+    # Backfill the learned merchant index from existing categorized transactions,
+    # or rebuild it when merchant keys were just computed (older indexes used other keys)
+    if (backfilled or db.query(MerchantCategory.id).first() is None) and \
+            db.query(Transaction.id).filter(Transaction.category_id.isnot(None)).first() is not None:
+        merchant_count = rebuild_merchant_index(db)
+        print(f"Learned {merchant_count} merchants from existing transactions")
+    
+    # Backfill the summary rollups from existing transactions
+    if db.query(TransactionRollup.id).first() is None and \
+            db.query(Transaction.id).filter(Transaction.user_id.isnot(None)).first() is not None:
+        rollup_count = rebuild_rollups(db)
+        print(f"Built {rollup_count} summary rollup rows from existing transactions")
+    
+    # Detect recurring transactions in existing data
+    if not recurring_table_existed and \
+            db.query(Transaction.id).filter(Transaction.user_id.isnot(None)).first() is not None:
+        series_count = rebuild_recurring_series(db)
+        print(f"Detected {series_count} recurring transaction series in existing transactions")
+    
+    # Compile the categorization rules once for the process
+    get_rule_registry(db)
+    
     db.close()
 
 if __name__ == "__main__":
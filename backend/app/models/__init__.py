@@ -1,3 +1,8 @@
 from app.models.category import Category
 from app.models.transaction import Transaction
 from app.models.user import User
+from app.models.merchant_category import MerchantCategory
+from app.models.import_job import ImportJob
+from app.models.transaction_rollup import TransactionRollup
+from app.models.categorization_rule import CategorizationRule, CategorizationRuleVersion
+from app.models.recurring_series import RecurringSeries
@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+class CategorizationRule(Base):
+    """
+    Rule assigning a category to descriptions matching a pattern.
+    Rules are tried by ascending priority (then id), the first match wins.
+    """
+    __tablename__ = "categorization_rules"
+
+    id = Column(Integer, primary_key=True, index=True)
+    category_id = Column(Integer, ForeignKey("categories.id"), nullable=False, index=True)
+    pattern = Column(String, nullable=False)
+    match_type = Column(String, nullable=False, default="substring")  # substring, prefix or regex
+    priority = Column(Integer, nullable=False, default=100)
+    # Optional inclusive range of the absolute transaction amount
+    min_amount = Column(Float, nullable=True)
+    max_amount = Column(Float, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+class CategorizationRuleVersion(Base):
+    """
+    Single row counting changes to categories and rules, so every process
+    (API workers, import workers) can tell when its compiled rules are stale.
+    """
+    __tablename__ = "categorization_rule_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
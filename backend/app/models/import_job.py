@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+class ImportJob(Base):
+    """Background CSV import job and its progress"""
+    __tablename__ = "import_jobs"
+
+    id = Column(String, primary_key=True)  # uuid4 hex
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    filename = Column(String, nullable=False)
+    file_path = Column(String, nullable=False)  # Spooled copy of the upload
+    status = Column(String, nullable=False, default="pending", index=True)  # pending, running, completed or failed
+    rows_processed = Column(Integer, nullable=False, default=0)
+    successful = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    duplicates = Column(Integer, nullable=True, default=0)  # Rows skipped as already imported
+    errors = Column(Text, nullable=True)  # JSON list of row-level errors
+    error = Column(Text, nullable=True)  # Fatal error that stopped the job
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+class MerchantCategory(Base):
+    """Learned mapping from a merchant key (normalize_merchant) to a category"""
+    __tablename__ = "merchant_categories"
+    __table_args__ = (
+        UniqueConstraint("user_id", "merchant_key", name="uq_merchant_categories_user_merchant"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)
+    merchant_key = Column(String, nullable=False)
+    category_id = Column(Integer, ForeignKey("categories.id"), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, String, Float, Boolean, Date, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+class RecurringSeries(Base):
+    """
+    A recurring charge or payment detected in a user's transactions (see
+    app/services/recurring.py). Re-detected per merchant whenever new
+    transactions of that merchant are written.
+    """
+    __tablename__ = "recurring_series"
+    __table_args__ = (
+        Index("ix_recurring_series_user_merchant", "user_id", "merchant_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    merchant_key = Column(String, nullable=False)
+    description = Column(String, nullable=True)  # Latest description of the series
+    transaction_type = Column(String, nullable=False)
+    category_id = Column(Integer, ForeignKey("categories.id"), nullable=True)  # Latest category
+    cadence = Column(String, nullable=False)  # weekly, biweekly, monthly, quarterly or annual
+    interval_days = Column(Float, nullable=False)  # Median days between transactions
+    regularity = Column(Float, nullable=False)  # Share of intervals that match the cadence
+    typical_amount = Column(Float, nullable=False)  # Median amount
+    amount_variation = Column(Float, nullable=False)  # Coefficient of variation of the amounts
+    amount_stable = Column(Boolean, nullable=False, default=False)
+    transaction_count = Column(Integer, nullable=False)
+    first_date = Column(Date, nullable=False)
+    last_date = Column(Date, nullable=False)
+    next_expected_date = Column(Date, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,19 +1,28 @@
-from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
 from app.database import Base
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Covers per-user listing ordered by date with keyset pagination
+        Index("ix_transactions_user_date_id", "user_id", "date", "id"),
+        # Per-merchant history, e.g. recurring series detection
+        Index("ix_transactions_user_merchant", "user_id", "merchant_key"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     date = Column(Date, index=True)
     description = Column(String, index=True)
+    merchant_key = Column(String, nullable=True)  # normalize_merchant(description)
     amount = Column(Float)
     transaction_type = Column(String)  # debit or credit
     raw_text = Column(String, nullable=True)  # Raw text from bank statement
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)  # User who owns this transaction
+    # Content hash used to skip re-imported statement lines (see app/services/deduplication.py)
+    fingerprint = Column(String, nullable=True, unique=True, index=True)
     
     # Relationship with Category
     category = relationship("Category", back_populates="transactions")
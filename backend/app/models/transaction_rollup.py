@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Index
+
+from app.database import Base
+
+class TransactionRollup(Base):
+    """
+    Monthly per-category totals of a user's transactions.
+    Kept up to date incrementally by every write path; summaries sum these rows.
+    """
+    __tablename__ = "transaction_rollups"
+    __table_args__ = (
+        Index("ix_transaction_rollups_key", "user_id", "year", "month", "category_id", "transaction_type"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    year = Column(Integer, nullable=False)
+    month = Column(Integer, nullable=False)
+    category_id = Column(Integer, ForeignKey("categories.id"), nullable=True)  # None for uncategorized
+    transaction_type = Column(String, nullable=False)
+    total_amount = Column(Float, nullable=False, default=0.0)
+    transaction_count = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,37 @@
+from typing import Any
+from datetime import date
+import json
+from fastapi.responses import JSONResponse
+
+# orjson is optional; without it responses are encoded with the stdlib json module
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _default(value: Any):
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps_json(content: Any) -> bytes:
+    """
+    Encode plain data (dicts, lists, str, numbers, dates) to JSON bytes.
+    Produces the same output as FastAPI's JSONResponse, without jsonable_encoder.
+    """
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+        default=_default
+    ).encode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse for content that is already plain data, encoded with orjson when available"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps_json(content)
@@ -1,19 +1,143 @@
+from typing import List
+import re
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
 from app.database import get_db
-from app.models.user import User
-from app.security import get_current_active_user
-from app.services.categorization import CategorizationService
+from app.models.category import Category
+from app.models.categorization_rule import CategorizationRule
+from app.security import CurrentUser, get_current_active_user, get_read_db
+from app.schemas.categorization_rule import (
+    CategorizationRuleCreate, CategorizationRuleUpdate, CategorizationRule as CategorizationRuleSchema
+)
+from app.services.categorization import CategorizationService, invalidate_category_rules
+from app.services.classifier import ClassifierTrainingError, load_user_model, train_user_model
+from app.services.matcher import MATCH_TYPES
 
 router = APIRouter()
 
 @router.post("/auto-categorize")
 def auto_categorize_transactions(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
-    """Auto-categorize all uncategorized transactions"""
+    """Auto-categorize all uncategorized transactions of the current user"""
     categorization_service = CategorizationService(db)
-    result = categorization_service.categorize_all_uncategorized()
+    result = categorization_service.categorize_all_uncategorized(user_id=current_user.id)
     return result
+
+@router.post("/model/retrain")
+def retrain_model(
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """Train a new version of the current user's classifier from their categorized transactions"""
+    try:
+        return train_user_model(db, current_user.id)
+    except ClassifierTrainingError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/model")
+def get_model(
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """Get the metadata of the current user's latest classifier"""
+    model = load_user_model(current_user.id)
+    if model is None:
+        raise HTTPException(status_code=404, detail="No trained model")
+    return model.meta
+
+def _validate_rule(db: Session, rule: CategorizationRule):
+    """Reject rules the matcher could not compile"""
+    if not rule.pattern or not rule.pattern.strip():
+        raise HTTPException(status_code=400, detail="Pattern must not be empty")
+    if rule.match_type not in MATCH_TYPES:
+        raise HTTPException(status_code=400, detail=f"Invalid match type. Use one of: {', '.join(MATCH_TYPES)}")
+    if rule.match_type == "regex":
+        try:
+            re.compile(rule.pattern)
+        except re.error as e:
+            raise HTTPException(status_code=400, detail=f"Invalid regular expression: {str(e)}")
+    if rule.min_amount is not None and rule.max_amount is not None and rule.min_amount > rule.max_amount:
+        raise HTTPException(status_code=400, detail="min_amount must not be greater than max_amount")
+    if db.query(Category.id).filter(Category.id == rule.category_id).first() is None:
+        raise HTTPException(status_code=404, detail="Category not found")
+
+@router.get("/rules", response_model=List[CategorizationRuleSchema])
+def get_rules(
+    skip: int = 0,
+    limit: int = 1000,
+    db: Session = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """Get categorization rules in the order they are applied"""
+    return db.query(CategorizationRule).order_by(
+        CategorizationRule.priority,
+        CategorizationRule.id
+    ).offset(skip).limit(limit).all()
+
+@router.post("/rules", response_model=CategorizationRuleSchema)
+def create_rule(
+    rule: CategorizationRuleCreate,
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """Create a categorization rule"""
+    db_rule = CategorizationRule(**rule.dict())
+    _validate_rule(db, db_rule)
+    
+    db.add(db_rule)
+    invalidate_category_rules(db)
+    db.commit()
+    db.refresh(db_rule)
+    return db_rule
+
+@router.get("/rules/{rule_id}", response_model=CategorizationRuleSchema)
+def get_rule(
+    rule_id: int,
+    db: Session = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """Get a specific categorization rule by ID"""
+    db_rule = db.query(CategorizationRule).filter(CategorizationRule.id == rule_id).first()
+    if db_rule is None:
+        raise HTTPException(status_code=404, detail="Rule not found")
+    return db_rule
+
+@router.put("/rules/{rule_id}", response_model=CategorizationRuleSchema)
+def update_rule(
+    rule_id: int,
+    rule: CategorizationRuleUpdate,
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """Update a categorization rule"""
+    db_rule = db.query(CategorizationRule).filter(CategorizationRule.id == rule_id).first()
+    if db_rule is None:
+        raise HTTPException(status_code=404, detail="Rule not found")
+    
+    update_data = rule.dict(exclude_unset=True)
+    for key, value in update_data.items():
+        setattr(db_rule, key, value)
+    _validate_rule(db, db_rule)
+    
+    invalidate_category_rules(db)
+    db.commit()
+    db.refresh(db_rule)
+    return db_rule
+
+@router.delete("/rules/{rule_id}")
+def delete_rule(
+    rule_id: int,
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """Delete a categorization rule"""
+    db_rule = db.query(CategorizationRule).filter(CategorizationRule.id == rule_id).first()
+    if db_rule is None:
+        raise HTTPException(status_code=404, detail="Rule not found")
+    
+    db.delete(db_rule)
+    invalidate_category_rules(db)
+    db.commit()
+    return {"message": "Rule deleted successfully"}
@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, status
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.models.import_job import ImportJob
+from app.security import CurrentUser, get_current_active_user
+from app.schemas.import_job import ImportJobCreated, ImportJob as ImportJobSchema
+from app.services.import_jobs import create_import_job, job_progress
+
+router = APIRouter()
+
+@router.post("/", response_model=ImportJobCreated, status_code=status.HTTP_202_ACCEPTED)
+def create_job(
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """Queue a CSV file for import in the background"""
+    # Validate file extension
+    if not file.filename.lower().endswith('.csv'):
+        raise HTTPException(status_code=400, detail="File must be a CSV")
+    
+    # Reject empty uploads before queueing
+    if not file.file.read(1):
+        raise HTTPException(status_code=400, detail="Empty file uploaded")
+    file.file.seek(0)
+    
+    job = create_import_job(db, current_user.id, file.filename, file.file)
+    return {"job_id": job.id, "status": job.status}
+
+@router.get("/{job_id}", response_model=ImportJobSchema)
+def get_job(
+    job_id: str,
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """Get the progress of an import job"""
+    job = db.query(ImportJob).filter(
+        ImportJob.id == job_id,
+        ImportJob.user_id == current_user.id
+    ).first()
+    if job is None:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job_progress(job)
@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Depends
+
+from app.database import get_pool_stats, get_read_routing_stats
+from app.security import CurrentUser, get_current_active_user, get_user_cache_stats
+from app.services.normalization import normalize_merchant
+from app.services.response_cache import get_response_cache_stats
+
+router = APIRouter()
+
+@router.get("/")
+def get_metrics(current_user: CurrentUser = Depends(get_current_active_user)):
+    """Get in-process cache counters and database pool stats"""
+    merchant_cache = normalize_merchant.cache_info()
+    return {
+        "user_cache": get_user_cache_stats(),
+        "merchant_cache": {
+            "hits": merchant_cache.hits,
+            "misses": merchant_cache.misses,
+            "size": merchant_cache.currsize,
+            "maxsize": merchant_cache.maxsize
+        },
+        "db_pool": get_pool_stats(),
+        "read_routing": get_read_routing_stats(),
+        "response_cache": get_response_cache_stats()
+    }
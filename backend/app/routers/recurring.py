@@ -0,0 +1,42 @@
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.models.recurring_series import RecurringSeries
+from app.security import CurrentUser, get_current_active_user, get_read_db
+from app.schemas.recurring_series import RecurringSeries as RecurringSeriesSchema
+from app.services.recurring import CADENCES, rebuild_recurring_series
+
+router = APIRouter()
+
+@router.get("/", response_model=List[RecurringSeriesSchema])
+def get_recurring_series(
+    cadence: Optional[str] = None,
+    transaction_type: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """Get the recurring transactions detected for the current user, most recently seen first"""
+    if cadence and cadence not in CADENCES:
+        raise HTTPException(status_code=400, detail=f"Invalid cadence. Use one of: {', '.join(CADENCES)}")
+    
+    query = db.query(RecurringSeries).filter(RecurringSeries.user_id == current_user.id)
+    if cadence:
+        query = query.filter(RecurringSeries.cadence == cadence)
+    if transaction_type:
+        query = query.filter(RecurringSeries.transaction_type == transaction_type)
+    
+    return query.order_by(
+        RecurringSeries.last_date.desc(),
+        RecurringSeries.id
+    ).all()
+
+@router.post("/rebuild")
+def rebuild_series(
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """Re-detect the current user's recurring transactions from their full history"""
+    count = rebuild_recurring_series(db, current_user.id)
+    return {"message": f"Detected {count} recurring series", "count": count}
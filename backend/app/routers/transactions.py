@@ -1,73 +1,29 @@
 from typing import List, Optional, Dict
 from datetime import datetime, date
 import calendar
-import pandas as pd
-from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, status, File, Query
+from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, status, File, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func, extract
+from sqlalchemy import or_
+from starlette.concurrency import run_in_threadpool
 
-from app.database import get_db
+from app.database import AsyncDB, get_async_db, get_db
 from app.models.transaction import Transaction
+from app.responses import FastJSONResponse
 from app.models.category import Category
-from app.models.user import User
-from app.security import get_current_active_user
+from app.security import CurrentUser, get_async_read_db, get_current_active_user
+from app.services.bulk_writes import bulk_assign_user
+from app.services.csv_import import CSVImportError, import_transactions_csv
+from app.services.export import EXPORT_FORMATS, ExportError, check_format, parse_columns, stream_export
+from app.services.deduplication import backfill_fingerprints, next_free_fingerprint
+from app.services.merchant_index import learn_merchant_categories
+from app.services.normalization import normalize_merchant
+from app.services.response_cache import cached_json_response
+from app.services.pagination import InvalidCursorError, encode_cursor, decode_cursor
+from app.services.recurring import update_recurring_series
+from app.services.search import apply_search
+from app.services.rollups import rollup_deltas, apply_rollup_deltas, monthly_category_totals, category_totals
 
-# Common keywords for auto-categorization
-CATEGORY_KEYWORDS = {
-    'Groceries': ['grocery', 'supermarket', 'food', 'market', 'whole foods', 'walmart', 'target', 'safeway', 'kroger', 'aldi'],
-    'Dining': ['restaurant', 'cafe', 'coffee', 'dinner', 'lunch', 'breakfast', 'pizza', 'burger', 'starbucks', 'mcdonald', 'taco', 'sushi'],
-    'Transportation': ['gas', 'fuel', 'uber', 'lyft', 'taxi', 'train', 'transit', 'parking', 'bus', 'subway', 'metro', 'chevron', 'shell'],
-    'Shopping': ['amazon', 'store', 'shop', 'mall', 'clothing', 'retail', 'purchase', 'ebay', 'etsy', 'gap', 'apple store'],
-    'Entertainment': ['movie', 'theater', 'cinema', 'netflix', 'spotify', 'hulu', 'disney', 'ticket', 'concert', 'event', 'game', 'amc'],
-    'Utilities': ['electric', 'water', 'gas', 'power', 'utility', 'internet', 'phone', 'bill', 'service', 'cable', 'broadband'],
-    'Housing': ['rent', 'mortgage', 'property', 'apartment', 'home', 'house', 'real estate', 'hoa', 'maintenance'],
-    'Health': ['doctor', 'medical', 'pharmacy', 'healthcare', 'dental', 'hospital', 'clinic', 'medicine', 'prescription', 'walgreens', 'cvs'],
-    'Income': ['salary', 'deposit', 'payroll', 'payment', 'income', 'direct deposit', 'wage', 'transfer', 'refund', 'tax return'],
-    'Subscriptions': ['subscription', 'membership', 'monthly', 'annual', 'recurring', 'fee']
-}
-
-def auto_categorize_transaction(db: Session, description: str) -> Optional[int]:
-    """Auto-categorize a transaction based on its description"""
-    # Convert description to lowercase for case-insensitive matching
-    description_lower = description.lower()
-    
-    # First, check if we already have a category for this transaction
-    # Look for similar transactions that have been categorized
-    similar_transaction = db.query(Transaction).filter(
-        Transaction.description.ilike(f"%{description_lower}%"),
-        Transaction.category_id.isnot(None)
-    ).first()
-    
-    if similar_transaction and similar_transaction.category_id:
-        return similar_transaction.category_id
-    
-    # If no similar transaction found, use keyword matching
-    for category_name, keywords in CATEGORY_KEYWORDS.items():
-        for keyword in keywords:
-            if keyword in description_lower:
-                # Check if category exists
-                category = db.query(Category).filter(Category.name == category_name).first()
-                
-                # If category doesn't exist, create it
-                if not category:
-                    category = Category(name=category_name, color=generate_color_for_category(category_name))
-                    db.add(category)
-                    db.commit()
-                    db.refresh(category)
-                
-                return category.id
-    
-    # If no match found, return None (uncategorized)
-    return None
-
-def generate_color_for_category(category_name: str) -> str:
-    """Generate a consistent color for a category based on its name"""
-    # Simple hash function to generate a color
-    hash_value = sum(ord(c) for c in category_name)
-    # Generate a hue value between 0 and 360
-    hue = hash_value % 360
-    # Return a HSL color with fixed saturation and lightness
-    return f"hsl({hue}, 70%, 50%)"
 from app.schemas.transaction import (
     TransactionCreate, 
     TransactionUpdate, 
@@ -77,99 +33,225 @@ from app.schemas.transaction import (
 
 router = APIRouter()
 
+# Columns of a listed transaction, in the order of the response schema
+TRANSACTION_FIELDS = list(TransactionSchema.model_fields)
+
 @router.get("/", response_model=List[TransactionSchema])
-def get_transactions(
+async def get_transactions(
     skip: int = 0, 
     limit: int = 100, 
     category_id: Optional[int] = None,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    q: Optional[str] = Query(None, description="Search descriptions: every word must match the start of a word"),
+    sort: str = Query("date", description="date (newest first) or relevance (best search match first, needs q)"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header of the previous page"),
+    db: AsyncDB = Depends(get_async_read_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
-    """Get all transactions with optional filtering"""
-    query = db.query(Transaction).filter(Transaction.user_id == current_user.id)
+    """
+    Get all transactions with optional filtering.
+    Pages are ordered by date (newest first). Pass the X-Next-Cursor response header
+    back as cursor to get the next page without scanning skipped rows.
+    With sort=relevance, search results are ranked and paged with skip instead.
+    """
+    if sort not in ("date", "relevance"):
+        raise HTTPException(status_code=400, detail="sort must be date or relevance")
+    if sort == "relevance" and (not q or cursor):
+        raise HTTPException(status_code=400, detail="sort=relevance needs q and pages with skip, not cursor")
+    
+    def load_page(db: Session):
+        # Plain rows of the schema's columns: no ORM objects, no per-row validation
+        query = db.query(*[getattr(Transaction, field) for field in TRANSACTION_FIELDS]).filter(
+            Transaction.user_id == current_user.id
+        )
+    
+        if category_id:
+            query = query.filter(Transaction.category_id == category_id)
+    
+        if start_date:
+            try:
+                start = datetime.strptime(start_date, "%Y-%m-%d").date()
+                query = query.filter(Transaction.date >= start)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid start_date format. Use YYYY-MM-DD")
+    
+        if end_date:
+            try:
+                end = datetime.strptime(end_date, "%Y-%m-%d").date()
+                query = query.filter(Transaction.date <= end)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid end_date format. Use YYYY-MM-DD")
+    
+        # Full-text search through the backend's text index
+        rank = None
+        if q:
+            query, rank = apply_search(query, q, current_user.id, db.get_bind().dialect.name)
+    
+        # Keyset pagination: continue after the (date, id) of the previous page's last row
+        if cursor:
+            try:
+                cursor_date, cursor_id = decode_cursor(cursor)
+            except InvalidCursorError:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            # date <= cursor bounds the index range scan, the OR resolves ties on date
+            query = query.filter(
+                Transaction.date <= cursor_date,
+                or_(Transaction.date < cursor_date, Transaction.id < cursor_id)
+            )
+    
+        if sort == "relevance" and rank is not None:
+            query = query.order_by(rank, Transaction.date.desc(), Transaction.id.desc())
+        else:
+            query = query.order_by(Transaction.date.desc(), Transaction.id.desc())
+        if not cursor:
+            query = query.offset(skip)
+    
+        # Fetch one extra row to know whether there is a next page
+        transactions = query.limit(limit + 1).all()
+    
+        next_cursor = None
+        if len(transactions) > limit:
+            transactions = transactions[:limit]
+            last = transactions[-1]
+            # Cursors follow date order; relevance pages continue with skip
+            if sort == "date":
+                next_cursor = encode_cursor(last.date, last.id)
     
-    if category_id:
-        query = query.filter(Transaction.category_id == category_id)
+        return [dict(zip(TRANSACTION_FIELDS, row)) for row in transactions], next_cursor
+    
+    transactions, next_cursor = await db.run(load_page)
+    response = FastJSONResponse(transactions)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
+
+# Registered before /{transaction_id}, which would otherwise match "export"
+@router.get("/export")
+def export_transactions(
+    format: str = Query("csv", description="csv, parquet or arrow (Arrow IPC stream); parquet and arrow need pyarrow"),
+    columns: Optional[str] = Query(None, description="Comma separated columns to export, all by default"),
+    category_id: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    q: Optional[str] = Query(None, description="Search descriptions, as in the transaction list"),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """
+    Stream all of the user's transactions (oldest first) as CSV, Parquet or Arrow.
+    Takes the same filters as the transaction list, without paging.
+    """
+    start = end = None
     
     if start_date:
         try:
             start = datetime.strptime(start_date, "%Y-%m-%d").date()
-            query = query.filter(Transaction.date >= start)
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid start_date format. Use YYYY-MM-DD")
     
     if end_date:
         try:
             end = datetime.strptime(end_date, "%Y-%m-%d").date()
-            query = query.filter(Transaction.date <= end)
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid end_date format. Use YYYY-MM-DD")
     
-    transactions = query.order_by(Transaction.date.desc()).offset(skip).limit(limit).all()
-    return transactions
+    # Validate before the response starts, errors can't be reported once it is streaming
+    try:
+        check_format(format)
+        selected = parse_columns(columns)
+    except ExportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    media_type, extension = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        stream_export(format, current_user.id, selected, category_id, start, end, q),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="transactions.{extension}"'}
+    )
 
 @router.post("/", response_model=TransactionSchema)
-def create_transaction(
+async def create_transaction(
     transaction: TransactionCreate, 
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncDB = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
     """Create a new transaction"""
-    # Check if category exists if provided
-    if transaction.category_id:
-        category = db.query(Category).filter(Category.id == transaction.category_id).first()
-        if not category:
-            raise HTTPException(status_code=404, detail="Category not found")
-    
-    # Create transaction with current user's ID
-    transaction_data = transaction.dict()
-    db_transaction = Transaction(**transaction_data, user_id=current_user.id)
-    db.add(db_transaction)
-    db.commit()
-    db.refresh(db_transaction)
-    return db_transaction
+    def create(db: Session):
+        # Check if category exists if provided
+        if transaction.category_id:
+            category = db.query(Category).filter(Category.id == transaction.category_id).first()
+            if not category:
+                raise HTTPException(status_code=404, detail="Category not found")
+    
+        # Create transaction with current user's ID
+        transaction_data = transaction.dict()
+        transaction_data["user_id"] = current_user.id
+        transaction_data["merchant_key"] = normalize_merchant(transaction.description)
+        transaction_data["fingerprint"] = next_free_fingerprint(
+            db, current_user.id, transaction.date, transaction.description, transaction.amount, transaction.transaction_type
+        )
+        db_transaction = Transaction(**transaction_data)
+        db.add(db_transaction)
+    
+        # Remember the category for future imports of the same merchant
+        if db_transaction.category_id:
+            learn_merchant_categories(db, [(current_user.id, db_transaction.description, db_transaction.category_id)])
+    
+        apply_rollup_deltas(db, rollup_deltas([db_transaction]))
+        update_recurring_series(db, current_user.id, [db_transaction.merchant_key])
+        db.commit()
+        db.refresh(db_transaction)
+        return db_transaction
+    
+    return await db.run(create)
 
 @router.get("/{transaction_id}", response_model=TransactionSchema)
-def get_transaction(
+async def get_transaction(
     transaction_id: int, 
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncDB = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
     """Get a specific transaction by ID"""
-    db_transaction = db.query(Transaction).filter(
-        Transaction.id == transaction_id,
-        Transaction.user_id == current_user.id
-    ).first()
-    if db_transaction is None:
-        raise HTTPException(status_code=404, detail="Transaction not found")
-    return db_transaction
+    def load(db: Session):
+        db_transaction = db.query(Transaction).filter(
+            Transaction.id == transaction_id,
+            Transaction.user_id == current_user.id
+        ).first()
+        if db_transaction is None:
+            raise HTTPException(status_code=404, detail="Transaction not found")
+        return db_transaction
+    
+    return await db.run(load)
 
 
 @router.delete("/{transaction_id}")
-def delete_transaction(
+async def delete_transaction(
     transaction_id: int, 
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncDB = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
     """Delete a transaction"""
-    db_transaction = db.query(Transaction).filter(
-        Transaction.id == transaction_id,
-        Transaction.user_id == current_user.id
-    ).first()
-    if db_transaction is None:
-        raise HTTPException(status_code=404, detail="Transaction not found")
-    
-    db.delete(db_transaction)
-    db.commit()
-    return {"message": "Transaction deleted successfully"}
+    def remove(db: Session):
+        db_transaction = db.query(Transaction).filter(
+            Transaction.id == transaction_id,
+            Transaction.user_id == current_user.id
+        ).first()
+        if db_transaction is None:
+            raise HTTPException(status_code=404, detail="Transaction not found")
+    
+        apply_rollup_deltas(db, rollup_deltas([db_transaction], sign=-1))
+        db.delete(db_transaction)
+        update_recurring_series(db, current_user.id, [db_transaction.merchant_key])
+        db.commit()
+        return {"message": "Transaction deleted successfully"}
+    
+    return await db.run(remove)
 
 @router.post("/upload-csv", response_model=TransactionUploadResponse)
 async def upload_csv(
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: CurrentUser = Depends(get_current_active_user),
     save_to_user: bool = True
 ):
     """Upload and process a CSV file of transactions"""
@@ -178,98 +260,17 @@ async def upload_csv(
         raise HTTPException(status_code=400, detail="File must be a CSV")
     
     try:
-        # Read CSV content
-        contents = await file.read()
-        if not contents:
+        # Reject empty uploads without reading the whole file
+        if not await file.read(1):
             raise HTTPException(status_code=400, detail="Empty file uploaded")
+        await file.seek(0)
         
-        # Parse CSV with pandas
+        # Stream the file through the parse/categorize/insert pipeline chunk by chunk,
+        # in a worker thread so the event loop keeps serving other requests
         try:
-            df = pd.read_csv(pd.io.common.BytesIO(contents))
-        except Exception as e:
-            raise HTTPException(status_code=400, detail=f"Failed to parse CSV: {str(e)}")
-        
-        # Validate required columns
-        required_columns = ['Date', 'Description', 'Amount']
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        
-        if missing_columns:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Missing required columns: {', '.join(missing_columns)}"
-            )
-        
-        if df.empty:
-            raise HTTPException(status_code=400, detail="CSV file contains no data rows")
-        
-        # Process transactions
-        total_rows = len(df)
-        successful = 0
-        errors = []
-        
-        for idx, row in df.iterrows():
-            try:
-                # Validate required fields
-                if pd.isna(row['Date']) or pd.isna(row['Description']) or pd.isna(row['Amount']):
-                    errors.append(f"Error in row {idx+2}: Missing required values")
-                    continue
-                
-                # Convert date string to date object
-                try:
-                    transaction_date = datetime.strptime(str(row['Date']), "%Y-%m-%d").date()
-                except ValueError:
-                    try:
-                        transaction_date = datetime.strptime(str(row['Date']), "%m/%d/%Y").date()
-                    except ValueError:
-                        try:
-                            transaction_date = datetime.strptime(str(row['Date']), "%d/%m/%Y").date()
-                        except ValueError:
-                            errors.append(f"Error in row {idx+2}: Invalid date format. Use YYYY-MM-DD, MM/DD/YYYY, or DD/MM/YYYY")
-                            continue
-                
-                # Validate and convert amount
-                try:
-                    amount = float(row['Amount'])
-                except (ValueError, TypeError):
-                    errors.append(f"Error in row {idx+2}: Invalid amount value")
-                    continue
-                
-                # Determine transaction type based on amount
-                transaction_type = "credit" if amount >= 0 else "debit"
-                
-                # Get raw text if available
-                raw_text = str(row['RawText']) if 'RawText' in df.columns and not pd.isna(row['RawText']) else None
-                
-                # Try to auto-categorize the transaction based on description
-                category_id = auto_categorize_transaction(db, str(row['Description']))
-                
-                # Create transaction object
-                transaction = Transaction(
-                    date=transaction_date,
-                    description=str(row['Description']),
-                    amount=abs(amount),  # Store absolute amount
-                    transaction_type=transaction_type,
-                    raw_text=raw_text,
-                    category_id=category_id,
-                    user_id=current_user.id
-                )
-                
-                db.add(transaction)
-                successful += 1
-                
-            except Exception as e:
-                errors.append(f"Error in row {idx+2}: {str(e)}")
-        
-        # Commit all successful transactions
-        if successful > 0:
-            db.commit()
-        
-        return {
-            "total_imported": total_rows,
-            "successful": successful,
-            "failed": total_rows - successful,
-            "errors": errors if errors else None
-        }
+            return await run_in_threadpool(import_transactions_csv, db, file.file, current_user.id)
+        except CSVImportError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
     except HTTPException:
         # Re-raise HTTP exceptions as-is
@@ -282,145 +283,114 @@ async def upload_csv(
         raise HTTPException(status_code=500, detail=f"Failed to process CSV file: {str(e)}")
 
 @router.post("/save-to-user", status_code=status.HTTP_200_OK)
-def save_transactions_to_user(
+async def save_transactions_to_user(
     transaction_ids: List[int],
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncDB = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
     """Save transactions to the current user"""
-    if not transaction_ids:
-        raise HTTPException(status_code=400, detail="No transaction IDs provided")
-    
-    # Get transactions by IDs that are not already assigned to a user
-    transactions = db.query(Transaction).filter(
-        Transaction.id.in_(transaction_ids),
-        Transaction.user_id.is_(None)
-    ).all()
+    def assign(db: Session):
+        if not transaction_ids:
+            raise HTTPException(status_code=400, detail="No transaction IDs provided")
     
-    if not transactions:
-        raise HTTPException(status_code=404, detail="No unassigned transactions found with the provided IDs")
+        # Associate transactions that are not already assigned to a user, in chunked bulk updates
+        count, errors = bulk_assign_user(db, transaction_ids, current_user.id)
+        if count:
+            # Only the rows just assigned lost their fingerprints
+            backfill_fingerprints(db, ids=transaction_ids)
     
-    # Associate transactions with the current user
-    for transaction in transactions:
-        transaction.user_id = current_user.id
+        if not count and not errors:
+            raise HTTPException(status_code=404, detail="No unassigned transactions found with the provided IDs")
     
-    db.commit()
+        result = {"message": f"Successfully saved {count} transactions to user", "count": count}
+        if errors:
+            result["errors"] = errors
+        return result
     
-    return {"message": f"Successfully saved {len(transactions)} transactions to user", "count": len(transactions)}
+    return await db.run(assign)
 
 @router.get("/summary/monthly", response_model=Dict[str, Dict[str, float]])
-def get_monthly_summary(
+async def get_monthly_summary(
+    request: Request,
     year: int = Query(..., description="Year for the monthly summary"),
     month: Optional[int] = Query(None, description="Month for the summary (1-12). If not provided, returns all months."),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncDB = Depends(get_async_read_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
-    """Get monthly spending summary by category"""
-    # Build the base query
-    query = db.query(
-        extract('month', Transaction.date).label('month'),
-        Category.name.label('category_name'),
-        func.sum(Transaction.amount).label('total_amount')
-    ).join(
-        Category,
-        Transaction.category_id == Category.id
-    ).filter(
-        extract('year', Transaction.date) == year,
-        Transaction.transaction_type == 'debit',  # Only include expenses
-        Transaction.user_id == current_user.id  # Only include current user's transactions
-    )
+    """Get monthly spending summary by category (cached per user, with an ETag)"""
+    def summarize(db: Session):
+        # Filter by month if provided
+        if month:
+            if month < 1 or month > 12:
+                raise HTTPException(status_code=400, detail="Month must be between 1 and 12")
     
-    # Filter by month if provided
-    if month:
-        if month < 1 or month > 12:
-            raise HTTPException(status_code=400, detail="Month must be between 1 and 12")
-        query = query.filter(extract('month', Transaction.date) == month)
-    
-    # Filter by user_id if transactions are associated with users
-    if current_user:
-        query = query.filter(Transaction.user_id == current_user.id)
-    
-    # Group by month and category
-    query = query.group_by(
-        extract('month', Transaction.date),
-        Category.name
-    ).order_by(
-        extract('month', Transaction.date),
-        Category.name
-    )
+        # Served from the precomputed monthly rollups; only include expenses
+        results = monthly_category_totals(db, current_user.id, year, month, transaction_type='debit')
     
-    results = query.all()
+        # Format results as a nested dictionary: {month: {category: amount}}
+        summary = {}
+        for result in results:
+            month_name = calendar.month_name[int(result.month)]
+            if month_name not in summary:
+                summary[month_name] = {}
+            summary[month_name][result.category_name] = float(result.total_amount)
     
-    # Format results as a nested dictionary: {month: {category: amount}}
-    summary = {}
-    for result in results:
-        month_name = calendar.month_name[int(result.month)]
-        if month_name not in summary:
-            summary[month_name] = {}
-        summary[month_name][result.category_name] = float(result.total_amount)
+        return summary
     
-    return summary
+    return await cached_json_response(
+        request, current_user.id, "summary/monthly", {"year": year, "month": month},
+        lambda: db.run(summarize)
+    )
 
 @router.get("/summary/by-category", response_model=List[dict])
-def get_summary_by_category(
+async def get_summary_by_category(
+    request: Request,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     transaction_type: Optional[str] = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncDB = Depends(get_async_read_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
-    """Get a summary of transactions grouped by category"""
-    query = db.query(
-        Category.id,
-        Category.name,
-        Category.color,
-        func.sum(Transaction.amount).label("total_amount"),
-        func.count(Transaction.id).label("transaction_count")
-    ).join(
-        Transaction, 
-        Category.id == Transaction.category_id, 
-        isouter=True
-    ).filter(
-        Transaction.user_id == current_user.id  # Only include current user's transactions
-    )
+    """Get a summary of transactions grouped by category (cached per user, with an ETag)"""
+    def summarize(db: Session):
+        start = end = None
     
-    # Filter by user_id if transactions are associated with users
-    if current_user:
-        query = query.filter(Transaction.user_id == current_user.id)
+        if start_date:
+            try:
+                start = datetime.strptime(start_date, "%Y-%m-%d").date()
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid start_date format. Use YYYY-MM-DD")
     
-    # Filter by transaction type if specified
-    if transaction_type:
-        query = query.filter(Transaction.transaction_type == transaction_type)
-        
-    query = query.group_by(
-        Category.id
-    )
+        if end_date:
+            try:
+                end = datetime.strptime(end_date, "%Y-%m-%d").date()
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid end_date format. Use YYYY-MM-DD")
     
-    if start_date:
-        try:
-            start = datetime.strptime(start_date, "%Y-%m-%d").date()
-            query = query.filter(Transaction.date >= start)
-        except ValueError:
-            raise HTTPException(status_code=400, detail="Invalid start_date format. Use YYYY-MM-DD")
+        # Whole months come from the rollups, partial months at the range edges from transactions
+        totals = category_totals(db, current_user.id, start, end, transaction_type)
     
-    if end_date:
-        try:
-            end = datetime.strptime(end_date, "%Y-%m-%d").date()
-            query = query.filter(Transaction.date <= end)
-        except ValueError:
-            raise HTTPException(status_code=400, detail="Invalid end_date format. Use YYYY-MM-DD")
+        categories = db.query(Category).filter(Category.id.in_(list(totals))).order_by(Category.id).all() if totals else []
+        results = [
+            (category, totals[category.id][0], totals[category.id][1])
+            for category in categories
+        ]
     
-    results = query.all()
+        # Format results as a list of dictionaries
+        summary = []
+        for category, total_amount, transaction_count in results:
+            summary.append({
+                "category_id": category.id,
+                "category_name": category.name,
+                "color": category.color,
+                "total_amount": float(total_amount) if total_amount else 0.0,
+                "transaction_count": transaction_count
+            })
     
-    # Format results as a list of dictionaries
-    summary = []
-    for result in results:
-        summary.append({
-            "category_id": result.id,
-            "category_name": result.name,
-            "color": result.color,
-            "total_amount": float(result.total_amount) if result.total_amount else 0.0,
-            "transaction_count": result.transaction_count
-        })
+        return summary
     
-    return summary
+    return await cached_json_response(
+        request, current_user.id, "summary/by-category",
+        {"start_date": start_date, "end_date": end_date, "transaction_type": transaction_type},
+        lambda: db.run(summarize)
+    )
@@ -0,0 +1,34 @@
+from typing import Optional
+from datetime import datetime
+from pydantic import BaseModel
+
+# Shared properties
+class CategorizationRuleBase(BaseModel):
+    category_id: int
+    pattern: str
+    match_type: str = "substring"  # substring, prefix or regex
+    priority: int = 100
+    min_amount: Optional[float] = None
+    max_amount: Optional[float] = None
+
+# Properties to receive on rule creation
+class CategorizationRuleCreate(CategorizationRuleBase):
+    pass
+
+# Properties to receive on rule update
+class CategorizationRuleUpdate(BaseModel):
+    category_id: Optional[int] = None
+    pattern: Optional[str] = None
+    match_type: Optional[str] = None
+    priority: Optional[int] = None
+    min_amount: Optional[float] = None
+    max_amount: Optional[float] = None
+
+# Properties to return to client
+class CategorizationRule(CategorizationRuleBase):
+    id: int
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
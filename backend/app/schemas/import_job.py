@@ -0,0 +1,24 @@
+from datetime import datetime
+from typing import Optional, List
+from pydantic import BaseModel
+
+# Returned when a job is queued
+class ImportJobCreated(BaseModel):
+    job_id: str
+    status: str
+
+# Job progress returned to client
+class ImportJob(BaseModel):
+    job_id: str
+    filename: str
+    status: str
+    rows_processed: int
+    successful: int
+    failed: int
+    duplicates: int = 0
+    errors: Optional[List[str]] = None
+    error: Optional[str] = None
+    rows_per_second: Optional[float] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
@@ -0,0 +1,25 @@
+from datetime import date, datetime
+from typing import Optional
+from pydantic import BaseModel
+
+# Detected recurring series returned to client
+class RecurringSeries(BaseModel):
+    id: int
+    merchant_key: str
+    description: Optional[str] = None
+    transaction_type: str
+    category_id: Optional[int] = None
+    cadence: str
+    interval_days: float
+    regularity: float
+    typical_amount: float
+    amount_variation: float
+    amount_stable: bool
+    transaction_count: int
+    first_date: date
+    last_date: date
+    next_expected_date: date
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
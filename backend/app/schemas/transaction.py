@@ -29,6 +29,7 @@ class TransactionUpdate(BaseModel):
 # Properties shared by models stored in DB
 class TransactionInDBBase(TransactionBase):
     id: int
+    merchant_key: Optional[str] = None
     
     class Config:
         from_attributes = True
@@ -46,4 +47,5 @@ class TransactionUploadResponse(BaseModel):
     total_imported: int
     successful: int
     failed: int
+    duplicates: int = 0
     errors: Optional[List[str]] = None
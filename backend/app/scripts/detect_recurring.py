@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Script to re-detect recurring transactions from the full transaction history.
+Imports keep the series up to date for the merchants they touch; use this to
+backfill the series table or after changing the detection settings.
+"""
+
+import sys
+import os
+import argparse
+
+# Add the parent directory to the path so we can import from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.database import SessionLocal
+import app.models
+from app.services.recurring import rebuild_recurring_series
+
+def run(args):
+    """Re-detect the recurring series"""
+    db = SessionLocal()
+    
+    try:
+        scope = f"user {args.user_id}" if args.user_id is not None else "all users"
+        print(f"Detecting recurring transactions for {scope}...")
+        count = rebuild_recurring_series(db, args.user_id)
+        print(f"Found {count} recurring series.")
+        return 0
+        
+    except Exception as e:
+        db.rollback()
+        print(f"Error detecting recurring transactions: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Detect recurring transactions")
+    parser.add_argument("--user-id", type=int, help="Only re-detect this user's series")
+    
+    args = parser.parse_args()
+    sys.exit(run(args))
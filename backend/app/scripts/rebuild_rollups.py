@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Script to rebuild the monthly transaction rollups used by the summary endpoints.
+Use it to backfill the rollup table, or with --check to verify that it matches
+a live aggregate of the transactions table.
+"""
+
+import sys
+import os
+import argparse
+
+# Add the parent directory to the path so we can import from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.database import SessionLocal
+import app.models
+from app.services.rollups import rebuild_rollups, compare_rollups
+
+def run(args):
+    """Rebuild or verify the rollup table"""
+    db = SessionLocal()
+    
+    try:
+        if args.check:
+            mismatches = compare_rollups(db, args.user_id)
+            if mismatches:
+                print(f"Found {len(mismatches)} rollup rows that differ from the live aggregate:")
+                for mismatch in mismatches:
+                    print(f"  {mismatch}")
+                return 1
+            print("Rollups match the live aggregate.")
+            return 0
+        
+        scope = f"user {args.user_id}" if args.user_id is not None else "all users"
+        print(f"Rebuilding rollups for {scope}...")
+        count = rebuild_rollups(db, args.user_id)
+        print(f"Wrote {count} rollup rows.")
+        return 0
+        
+    except Exception as e:
+        db.rollback()
+        print(f"Error rebuilding rollups: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild monthly transaction rollups")
+    parser.add_argument("--user-id", type=int, help="Only rebuild or check this user's rollups")
+    parser.add_argument("--check", action="store_true", help="Compare the rollups with a live aggregate instead of rebuilding")
+    
+    args = parser.parse_args()
+    sys.exit(run(args))
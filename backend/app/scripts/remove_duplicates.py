@@ -1,94 +1,185 @@
 #!/usr/bin/env python3
 """
 Script to remove redundant transactions from the database.
-This script identifies duplicate transactions based on date, description, and amount,
-and removes all but one copy of each duplicate.
+This script identifies duplicate transactions of the same user, the rows with the
+same canonical content as the import fingerprints (date, normalized description,
+amount and type, see app/services/deduplication.py), and removes all but one copy
+(the lowest id) of each.
+
+Repeated lines can't be told apart from a statement imported twice, so repeats are
+removed too. The importer agrees: a line whose content is already stored is skipped
+at every occurrence, so uploading the statement again does not bring them back.
+The kept row gets the first-occurrence fingerprint the importer checks for.
+
+Grouping and deletion run in the database: each user's duplicates are deleted with
+DELETE ... WHERE id NOT IN (SELECT min(id) ... GROUP BY content), --batch-size rows
+per statement, so memory use does not grow with the number of transactions. On
+SQLite descriptions are compared lowercased and trimmed but runs of whitespace
+inside them are not collapsed, so such near-copies are kept. Rows without a date
+have no fingerprint and are left alone. Use --dry-run to only report what would be removed.
 """
 
 import sys
 import os
-from sqlalchemy import func, and_
-from sqlalchemy.orm import aliased
+import time
+import argparse
+from sqlalchemy import Numeric, bindparam, cast, delete, func, select, update
 
 # Add the parent directory to the path so we can import from app
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from app.database import SessionLocal, engine
+from app.database import SessionLocal
+import app.models
 from app.models.transaction import Transaction
+from app.services.deduplication import existing_fingerprints, fingerprint_for, transaction_content
+from app.services.recurring import rebuild_recurring_series
+from app.services.rollups import rebuild_rollups
+
+def _user_filter(user_id):
+    return Transaction.user_id.is_(None) if user_id is None else Transaction.user_id == user_id
+
+def _content_key(dialect):
+    """SQL expressions of the fields transaction_content normalizes"""
+    description = func.lower(func.trim(Transaction.description))
+    if dialect == "postgresql":
+        description = func.regexp_replace(description, r"\s+", " ", "g")
+    return (
+        Transaction.date,
+        description,
+        func.round(cast(func.abs(func.coalesce(Transaction.amount, 0.0)), Numeric), 2),
+        Transaction.transaction_type
+    )
+
+def _groups(user_id, key):
+    return select(func.min(Transaction.id).label("kept_id"), func.count().label("copies")).where(
+        _user_filter(user_id),
+        Transaction.date.isnot(None)
+    ).group_by(*key)
+
+def find_duplicates(db, user_id, batch_size):
+    """
+    Duplicates of one user as (sets of duplicates, rows to remove, {kept id: fingerprint}).
+    The lowest id of each set is kept; the mapping holds the kept rows whose
+    fingerprint is not the first-occurrence one yet.
+    """
+    groups = _groups(user_id, _content_key(db.get_bind().dialect.name)).having(func.count() > 1).subquery()
+    group_count, extra_rows = db.execute(
+        select(func.count(), func.coalesce(func.sum(groups.c.copies - 1), 0))
+    ).one()
+    if not extra_rows:
+        return 0, 0, {}
+
+    kept = {}
+    rows = db.query(
+        Transaction.id,
+        Transaction.date,
+        Transaction.description,
+        Transaction.amount,
+        Transaction.transaction_type,
+        Transaction.fingerprint
+    ).filter(Transaction.id.in_(select(groups.c.kept_id))).yield_per(batch_size)
+    for row in rows:
+        fingerprint = fingerprint_for(
+            transaction_content(user_id, row.date, row.description, row.amount, row.transaction_type), 0
+        )
+        if row.fingerprint != fingerprint:
+            kept[row.id] = fingerprint
+    return group_count, extra_rows, kept
+
+def remove_user_duplicates(db, user_id, kept, batch_size):
+    """Delete a user's duplicates, at most batch_size per DELETE, then renumber the kept rows. Returns rows deleted"""
+    key = _content_key(db.get_bind().dialect.name)
+    kept_ids = select(_groups(user_id, key).subquery().c.kept_id)
+    deleted = 0
+    while True:
+        batch = select(Transaction.id).where(
+            _user_filter(user_id),
+            Transaction.date.isnot(None),
+            Transaction.id.notin_(kept_ids)
+        ).limit(batch_size)
+        result = db.execute(
+            delete(Transaction)
+            .where(Transaction.id.in_(batch))
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        if not result.rowcount:
+            break
+        deleted += result.rowcount
+
+    # The deleted copies held the other fingerprints, so these are free now unless
+    # a near-copy the database grouped apart (see above) still holds one
+    taken = existing_fingerprints(db, kept.values())
+    values = [
+        {"row_id": row_id, "fingerprint": fingerprint}
+        for row_id, fingerprint in kept.items() if fingerprint not in taken
+    ]
+    if values:
+        db.execute(
+            update(Transaction.__table__)
+            .where(Transaction.__table__.c.id == bindparam("row_id"))
+            .values(fingerprint=bindparam("fingerprint")),
+            values
+        )
+        db.commit()
+    return deleted
 
-def remove_duplicate_transactions():
+def remove_duplicate_transactions(dry_run=False, batch_size=10000, user_id=None):
     """
-    Remove duplicate transactions from the database.
-    Duplicates are identified by having the same date, description, and amount.
+    Remove duplicate transactions from the database, partitioned by user.
+    Returns the number of transactions removed (or that would be removed with dry_run).
     """
     # Create a session
     db = SessionLocal()
-    
+    started = time.perf_counter()
+
     try:
         print("Starting duplicate transaction removal process...")
-        
-        # First, identify duplicate transactions
-        # We consider transactions to be duplicates if they have the same date, description, and amount
-        # We'll keep transactions that are already assigned to a user
-        
-        # Count the duplicates to see how many we'll be removing
-        duplicate_count = db.query(
-            Transaction.date, 
-            Transaction.description, 
-            Transaction.amount,
-            func.count().label('count')
-        ).group_by(
-            Transaction.date, 
-            Transaction.description, 
-            Transaction.amount
-        ).having(
-            func.count() > 1
-        ).count()
-        
-        print(f"Found {duplicate_count} sets of duplicate transactions.")
-        
-        if duplicate_count == 0:
+
+        if user_id is not None:
+            user_ids = [user_id]
+        else:
+            user_ids = [uid for (uid,) in db.query(Transaction.user_id).distinct()]
+
+        total_groups = 0
+        total_rows = 0
+        affected_users = []
+
+        for uid in user_ids:
+            owner = f"user {uid}" if uid is not None else "unassigned transactions"
+            group_count, extra_rows, kept = find_duplicates(db, uid, batch_size)
+            if not extra_rows:
+                continue
+            total_groups += group_count
+
+            if dry_run:
+                print(f"{owner}: {group_count} sets of duplicates, {extra_rows} transactions would be removed")
+                total_rows += extra_rows
+                continue
+
+            user_started = time.perf_counter()
+            deleted = remove_user_duplicates(db, uid, kept, batch_size)
+            total_rows += deleted
+            if uid is not None:
+                affected_users.append(uid)
+            print(f"{owner}: removed {deleted} transactions from {group_count} sets of duplicates "
+                  f"in {time.perf_counter() - user_started:.2f}s")
+
+        if total_rows == 0:
             print("No duplicate transactions found. Database is clean.")
-            return
-        
-        # Get the IDs of transactions to keep (one from each duplicate set)
-        # We'll keep the transaction with the lowest ID (oldest) or one that's assigned to a user
-        subquery = db.query(
-            Transaction.date, 
-            Transaction.description, 
-            Transaction.amount,
-            func.min(Transaction.id).label('min_id')
-        ).group_by(
-            Transaction.date, 
-            Transaction.description, 
-            Transaction.amount
-        ).subquery()
-        
-        # Get all transactions that are duplicates and not the ones we want to keep
-        # This version removes all duplicates regardless of user assignment
-        t1 = aliased(Transaction)
-        duplicate_transactions = db.query(t1).join(
-            subquery,
-            and_(
-                t1.date == subquery.c.date,
-                t1.description == subquery.c.description,
-                t1.amount == subquery.c.amount,
-                t1.id != subquery.c.min_id
-                # Removed the user_id filter to delete all duplicates
-            )
-        ).all()
-        
-        print(f"Preparing to delete {len(duplicate_transactions)} duplicate transactions...")
-        
-        # Delete the duplicate transactions
-        for transaction in duplicate_transactions:
-            db.delete(transaction)
-        
-        # Commit the changes
-        db.commit()
-        
-        print(f"Successfully removed {len(duplicate_transactions)} duplicate transactions.")
-        
+        elif dry_run:
+            print(f"Dry run: {total_rows} duplicate transactions in {total_groups} sets would be removed.")
+        else:
+            # Summaries are served from rollups and recurring series are counted from
+            # transactions, recompute both for the users that changed
+            for uid in affected_users:
+                rebuild_rollups(db, uid)
+                rebuild_recurring_series(db, uid)
+            print(f"Successfully removed {total_rows} duplicate transactions from {total_groups} sets.")
+
+        print(f"Finished in {time.perf_counter() - started:.2f}s")
+        return total_rows
+
     except Exception as e:
         db.rollback()
         print(f"Error removing duplicate transactions: {str(e)}")
@@ -97,4 +188,10 @@ def remove_duplicate_transactions():
         db.close()
 
 if __name__ == "__main__":
-    remove_duplicate_transactions()
+    parser = argparse.ArgumentParser(description="Remove duplicate transactions")
+    parser.add_argument("--dry-run", action="store_true", help="Only report the duplicates that would be removed")
+    parser.add_argument("--batch-size", type=int, default=10000, help="Transactions deleted per statement")
+    parser.add_argument("--user-id", type=int, help="Only remove this user's duplicates")
+
+    args = parser.parse_args()
+    remove_duplicate_transactions(dry_run=args.dry_run, batch_size=args.batch_size, user_id=args.user_id)
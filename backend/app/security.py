@@ -1,12 +1,17 @@
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Optional
+import os
+import time
 from passlib.context import CryptContext
 from jose import JWTError, jwt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.cache import TTLCache
+from app.database import AsyncDB, ReadSessionLocal, SessionLocal, async_db_handle, get_async_db, use_read_replica
 from app.models.user import User
 from app.schemas.user import TokenData
 
@@ -22,6 +27,40 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 # OAuth2 token URL
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/token")
 
+# Decoded tokens -> user snapshots, so authenticated requests skip the user lookup.
+# The TTL bounds how long a change the cache isn't told about (see
+# invalidate_cached_user) keeps a deactivated or deleted user signed in.
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_MAXSIZE = int(os.getenv("USER_CACHE_MAXSIZE", "1024"))
+user_cache = TTLCache(maxsize=USER_CACHE_MAXSIZE, ttl=USER_CACHE_TTL_SECONDS)
+
+@dataclass(frozen=True)
+class CurrentUser:
+    """Snapshot of the authenticated user, safe to share between requests"""
+    id: int
+    username: str
+    is_active: bool
+
+def invalidate_cached_user(user_id: int) -> int:
+    """
+    Drop every cached token of a user. Returns the number of entries removed.
+
+    Runs automatically for ORM updates and deletes of User objects in this process.
+    Core statements (update(User), bulk updates) and changes made by other processes
+    are not seen; call this after them, or rely on USER_CACHE_TTL_SECONDS.
+    """
+    return user_cache.delete_where(lambda token, user: user.id == user_id)
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_user_on_change(mapper, connection, target):
+    # Deactivated, renamed or deleted users must not be served from the cache
+    invalidate_cached_user(target.id)
+
+def get_user_cache_stats():
+    """Hit/miss counters of the authenticated user cache"""
+    return user_cache.stats()
+
 def verify_password(plain_password, hashed_password):
     """Verify password against hash"""
     return pwd_context.verify(plain_password, hashed_password)
@@ -30,9 +69,13 @@ def get_password_hash(password):
     """Hash password"""
     return pwd_context.hash(password)
 
+def get_user(db: Session, username: str) -> Optional[User]:
+    """Get a user by username"""
+    return db.query(User).filter(User.username == username).first()
+
 def authenticate_user(db: Session, username: str, password: str):
     """Authenticate user with username and password"""
-    user = db.query(User).filter(User.username == username).first()
+    user = get_user(db, username)
     if not user:
         return False
     if not verify_password(password, user.hashed_password):
@@ -50,8 +93,15 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(request: Request, token: str = Depends(oauth2_scheme), db: AsyncDB = Depends(get_async_db)):
     """Get current user from JWT token"""
+    # Tokens are only cached after a successful decode, and never past their expiry
+    cached_user = user_cache.get(token)
+    if cached_user is not None:
+        # Lets the write tracking middleware attribute the request to the user
+        request.state.user_id = cached_user.id
+        return cached_user
+    
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -65,13 +115,32 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         token_data = TokenData(username=username)
     except JWTError:
         raise credentials_exception
-    user = db.query(User).filter(User.username == token_data.username).first()
+    user = await db.run(get_user, token_data.username)
     if user is None:
         raise credentials_exception
-    return user
+    
+    current_user = CurrentUser(id=user.id, username=user.username, is_active=bool(user.is_active))
+    expires_in = payload["exp"] - time.time() if payload.get("exp") else USER_CACHE_TTL_SECONDS
+    user_cache.set(token, current_user, ttl=min(USER_CACHE_TTL_SECONDS, expires_in))
+    request.state.user_id = current_user.id
+    return current_user
 
-async def get_current_active_user(current_user: User = Depends(get_current_user)):
+async def get_current_active_user(current_user: CurrentUser = Depends(get_current_user)):
     """Check if user is active"""
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
+
+# Dependency to get a DB session for read-only endpoints
+def get_read_db(current_user: CurrentUser = Depends(get_current_active_user)):
+    """Session on the read replica, or on the primary if the user just wrote (or there is no replica)"""
+    db: Session = (ReadSessionLocal if use_read_replica(current_user.id) else SessionLocal)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# Dependency to get a DB handle in read-only async endpoints
+async def get_async_read_db(current_user: CurrentUser = Depends(get_current_active_user)):
+    async with async_db_handle(replica=use_read_replica(current_user.id)) as db:
+        yield db
@@ -0,0 +1,101 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+import os
+from sqlalchemy import insert, update, select
+from sqlalchemy.orm import Session
+
+from app.models.transaction import Transaction
+from app.services.rollups import rollup_deltas, apply_rollup_deltas
+
+# Rows written per commit by the bulk write paths
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "1000"))
+
+def bulk_insert_transactions(
+    db: Session,
+    records: List[Dict],
+    row_numbers: Optional[Sequence[int]] = None,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    commit: bool = True
+) -> Tuple[int, List[str]]:
+    """
+    Insert transaction rows with a Core executemany, committing every chunk_size rows
+    together with the matching rollup updates.
+
+    A chunk that fails is rolled back and reported as one error covering its rows,
+    the other chunks are still written. Returns (inserted_count, errors).
+
+    With commit=False nothing is committed, so the caller can commit the rows with
+    other changes; a failure then rolls back and reports every record.
+    """
+    inserted = 0
+    errors = []
+    statement = insert(Transaction.__table__)
+
+    def describe(start: int, end: int) -> str:
+        if row_numbers is not None:
+            return f"rows {row_numbers[start]}-{row_numbers[end - 1]}"
+        return f"records {start + 1}-{end}"
+
+    for start in range(0, len(records), chunk_size):
+        chunk = records[start:start + chunk_size]
+        try:
+            db.execute(statement, chunk)
+            apply_rollup_deltas(db, rollup_deltas(chunk))
+            if commit:
+                db.commit()
+            inserted += len(chunk)
+        except Exception as e:
+            db.rollback()
+            if not commit:
+                # The earlier chunks were rolled back with it
+                return 0, [f"Error in {describe(0, len(records))}: {str(e)}"]
+            errors.append(f"Error in {describe(start, start + len(chunk))}: {str(e)}")
+
+    return inserted, errors
+
+def bulk_assign_user(
+    db: Session,
+    transaction_ids: Sequence[int],
+    user_id: int,
+    chunk_size: int = IMPORT_CHUNK_SIZE
+) -> Tuple[int, List[str]]:
+    """
+    Assign unowned transactions to a user with one UPDATE ... WHERE id IN (...) per chunk,
+    adding them to the user's rollups in the same transaction.
+    Returns (updated_count, errors) with one error per failed chunk.
+    """
+    updated = 0
+    errors = []
+    ids = list(dict.fromkeys(transaction_ids))
+
+    for start in range(0, len(ids), chunk_size):
+        chunk = ids[start:start + chunk_size]
+        try:
+            # The rows gain an owner, so they now count towards that user's rollups
+            moved = db.execute(
+                select(
+                    Transaction.date,
+                    Transaction.category_id,
+                    Transaction.transaction_type,
+                    Transaction.amount
+                ).where(Transaction.id.in_(chunk), Transaction.user_id.is_(None))
+            ).all()
+
+            # Fingerprints include the owner; the caller recomputes the cleared ones
+            result = db.execute(
+                update(Transaction)
+                .where(Transaction.id.in_(chunk), Transaction.user_id.is_(None))
+                .values(user_id=user_id, fingerprint=None)
+                .execution_options(synchronize_session=False)
+            )
+            apply_rollup_deltas(db, rollup_deltas(
+                {"user_id": user_id, "date": row.date, "category_id": row.category_id,
+                 "transaction_type": row.transaction_type, "amount": row.amount}
+                for row in moved
+            ))
+            db.commit()
+            updated += result.rowcount
+        except Exception as e:
+            db.rollback()
+            errors.append(f"Error updating {len(chunk)} transactions starting at id {chunk[0]}: {str(e)}")
+
+    return updated, errors
@@ -1,52 +1,201 @@
 from typing import Dict, List, Optional
+import os
 import re
+import threading
+from sqlalchemy import event, select, update
 from sqlalchemy.orm import Session
 
 from app.models.category import Category
+from app.models.categorization_rule import CategorizationRule, CategorizationRuleVersion
 from app.models.transaction import Transaction
+from app.services.classifier import predict_categories
+from app.services.matcher import MatchRule, get_rule_matcher
+from app.services.merchant_index import MerchantIndex, lookup_merchant_category, learn_merchant_categories
+from app.services.rollups import rollup_deltas, merge_deltas, apply_rollup_deltas
+
+# Uncategorized transactions read and written back per page by the batch categorizer
+CATEGORIZE_BATCH_SIZE = int(os.getenv("CATEGORIZE_BATCH_SIZE", "1000"))
+
+# Seed rules, in priority order, written to the categorization_rules table by init_db.
+# Merged from the former import keywords and CategorizationService defaults;
+# 'gas' belongs to Transportation only.
+DEFAULT_CATEGORY_RULES = {
+    'Groceries': ['grocery', 'supermarket', 'food', 'market', 'whole foods', 'walmart', 'target', 'safeway', 'kroger', 'aldi'],
+    'Dining': ['restaurant', 'cafe', 'coffee', 'dinner', 'lunch', 'breakfast', 'pizza', 'burger', 'starbucks', 'mcdonald', 'taco', 'sushi', 'takeout', 'food delivery'],
+    'Transportation': ['gas', 'fuel', 'uber', 'lyft', 'taxi', 'train', 'transit', 'parking', 'bus', 'subway', 'metro', 'chevron', 'shell', 'transport'],
+    'Shopping': ['amazon', 'store', 'shop', 'mall', 'clothing', 'retail', 'purchase', 'ebay', 'etsy', 'gap', 'apple store'],
+    'Entertainment': ['movie', 'theater', 'theatre', 'cinema', 'netflix', 'spotify', 'hulu', 'disney', 'ticket', 'concert', 'event', 'game', 'amc'],
+    'Utilities': ['electric', 'water', 'power', 'utility', 'internet', 'phone', 'bill', 'service', 'cable', 'broadband'],
+    'Housing': ['rent', 'mortgage', 'property', 'apartment', 'home', 'house', 'real estate', 'hoa', 'maintenance'],
+    'Health': ['doctor', 'medical', 'pharmacy', 'healthcare', 'health', 'fitness', 'dental', 'hospital', 'clinic', 'medicine', 'prescription', 'walgreens', 'cvs'],
+    'Travel': ['hotel', 'flight', 'airline', 'airbnb', 'booking'],
+    'Income': ['salary', 'deposit', 'payroll', 'payment', 'income', 'direct deposit', 'wage', 'transfer', 'refund', 'tax return'],
+    'Subscriptions': ['subscription', 'membership', 'monthly', 'annual', 'recurring', 'fee']
+}
+
+# Gap between the seeded priorities of consecutive categories, leaves room for custom rules
+DEFAULT_PRIORITY_STEP = 10
+
+def seed_default_rules(db: Session) -> int:
+    """Write DEFAULT_CATEGORY_RULES, creating missing categories. Returns the number of rules"""
+    categories = {name.lower(): category_id for category_id, name in db.query(Category.id, Category.name)}
+    
+    rules = []
+    for rank, (category_name, keywords) in enumerate(DEFAULT_CATEGORY_RULES.items()):
+        category_id = categories.get(category_name.lower())
+        if category_id is None:
+            category = Category(name=category_name, color=generate_color_for_category(category_name))
+            db.add(category)
+            db.flush()
+            category_id = category.id
+        
+        priority = (rank + 1) * DEFAULT_PRIORITY_STEP
+        rules.extend(
+            CategorizationRule(category_id=category_id, pattern=keyword, match_type="substring", priority=priority)
+            for keyword in keywords
+        )
+    
+    db.add_all(rules)
+    invalidate_category_rules(db)
+    db.commit()
+    return len(rules)
+
+class RuleRegistry:
+    """Categorization rules in priority order, with their compiled matcher"""
+    
+    def __init__(self, version: int, rules: List[MatchRule]):
+        self.version = version
+        self.rules = rules
+        self.matcher = get_rule_matcher(rules)
+
+# Process-wide registry. _rules_version is the version of the rules this process
+# last read from the categorization_rule_version row (None: read it again); the
+# registry is rebuilt when that moves past the registry's version.
+_rules_version: Optional[int] = None
+_rule_registry: Optional[RuleRegistry] = None
+_rule_registry_lock = threading.Lock()
+
+def _stored_rules_version(db: Session) -> int:
+    version = db.query(CategorizationRuleVersion.version).filter(CategorizationRuleVersion.id == 1).scalar()
+    return version or 0
+
+def invalidate_category_rules(db: Session):
+    """
+    Mark the rule registry stale in every process; call before committing changes
+    to categories or rules. The stored version is bumped in the same transaction,
+    this process reloads after the commit and others at their next sync_category_rules.
+    """
+    bumped = db.query(CategorizationRuleVersion).filter(CategorizationRuleVersion.id == 1).update(
+        {CategorizationRuleVersion.version: CategorizationRuleVersion.version + 1},
+        synchronize_session=False
+    )
+    if not bumped:
+        db.add(CategorizationRuleVersion(id=1, version=1))
+    db.info["rules_changed"] = True
+
+@event.listens_for(Session, "after_commit")
+def _reload_changed_rules(session):
+    global _rules_version
+    if session.info.pop("rules_changed", False):
+        with _rule_registry_lock:
+            _rules_version = None
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_changed_rules(session, previous_transaction):
+    session.info.pop("rules_changed", None)
+
+def sync_category_rules(db: Session):
+    """
+    Pick up rule changes committed by other processes, with one primary key read.
+    Called at the start of each import and categorization run.
+    """
+    global _rules_version
+    version = _stored_rules_version(db)
+    with _rule_registry_lock:
+        _rules_version = version
+
+def get_rule_registry(db: Session) -> RuleRegistry:
+    """
+    Get the compiled category rules.
+    Only reads the database when the registry is missing or stale, and never writes.
+    """
+    global _rule_registry, _rules_version
+    registry = _rule_registry
+    if registry is not None and registry.version == _rules_version:
+        return registry
+    
+    with _rule_registry_lock:
+        if _rules_version is None:
+            _rules_version = _stored_rules_version(db)
+        if _rule_registry is None or _rule_registry.version != _rules_version:
+            version = _rules_version
+            # Rules of deleted categories are skipped
+            rows = db.query(
+                CategorizationRule.category_id,
+                CategorizationRule.pattern,
+                CategorizationRule.match_type,
+                CategorizationRule.min_amount,
+                CategorizationRule.max_amount
+            ).join(
+                Category,
+                CategorizationRule.category_id == Category.id
+            ).order_by(
+                CategorizationRule.priority,
+                CategorizationRule.id
+            )
+            rules = [MatchRule(*row) for row in rows]
+            _rule_registry = RuleRegistry(version, rules)
+        return _rule_registry
+
+def auto_categorize_transaction(
+    db: Session,
+    description: str,
+    merchant_index: Optional[MerchantIndex] = None,
+    user_id: Optional[int] = None,
+    amount: Optional[float] = None
+) -> Optional[int]:
+    """Auto-categorize a transaction based on its description (and amount, for amount rules)"""
+    matcher = get_rule_registry(db).matcher
+    
+    # Rules with an amount range are more specific than the merchant history
+    if matcher.amount_sensitive:
+        rule = matcher.match_rule(description, amount)
+        if rule is not None and rule.amount_bound:
+            return rule.key
+    
+    # First, check if we already have a category for this transaction
+    # Look up the merchant in the learned merchant index (in memory during imports)
+    if merchant_index is not None:
+        learned_category_id = merchant_index.lookup(description)
+    else:
+        learned_category_id = lookup_merchant_category(db, description, user_id)
+    
+    if learned_category_id:
+        return learned_category_id
+    
+    # If no similar transaction found, use the categorization rules
+    # If no match found, this is None (uncategorized)
+    return matcher.match(description, amount)
+
+def generate_color_for_category(category_name: str) -> str:
+    """Generate a consistent color for a category based on its name"""
+    # Simple hash function to generate a color
+    hash_value = sum(ord(c) for c in category_name)
+    # Generate a hue value between 0 and 360
+    hue = hash_value % 360
+    # Return a HSL color with fixed saturation and lightness
+    return f"hsl({hue}, 70%, 50%)"
 
 class CategorizationService:
     """Service for auto-categorizing transactions based on their descriptions"""
     
     def __init__(self, db: Session):
         self.db = db
-        self.category_rules = {}
-        self._load_category_rules()
-    
-    def _load_category_rules(self):
-        """Load category rules from the database"""
-        # This could be extended to load rules from a separate table
-        # For now, we'll use a simple mapping of keywords to categories
-        categories = self.db.query(Category).all()
-        
-        # Default rules based on common transaction descriptions
-        default_rules = {
-            "Groceries": ["supermarket", "grocery", "food", "market"],
-            "Dining": ["restaurant", "cafe", "coffee", "takeout", "food delivery"],
-            "Transportation": ["uber", "lyft", "taxi", "transport", "gas", "fuel", "parking"],
-            "Utilities": ["electric", "water", "gas", "internet", "phone", "utility"],
-            "Housing": ["rent", "mortgage", "property"],
-            "Entertainment": ["movie", "cinema", "theatre", "concert", "subscription"],
-            "Shopping": ["amazon", "walmart", "target", "store", "shop"],
-            "Health": ["doctor", "medical", "pharmacy", "health", "fitness"],
-            "Travel": ["hotel", "flight", "airline", "airbnb", "booking"],
-            "Income": ["salary", "deposit", "income", "payment received"]
-        }
-        
-        # Create any missing categories with default rules
-        for category_name, keywords in default_rules.items():
-            category = next((c for c in categories if c.name.lower() == category_name.lower()), None)
-            
-            if not category:
-                # Create the category if it doesn't exist
-                category = Category(name=category_name)
-                self.db.add(category)
-                self.db.commit()
-                self.db.refresh(category)
-                categories.append(category)
-            
-            # Add rules for this category
-            self.category_rules[category.id] = keywords
+        # Shared across requests; compiled at startup and after category changes
+        sync_category_rules(db)
+        registry = get_rule_registry(db)
+        self.rules = registry.rules
+        self.matcher = registry.matcher
     
     def categorize_transaction(self, transaction: Transaction) -> Optional[int]:
         """
@@ -56,38 +205,110 @@ class CategorizationService:
         if not transaction.description:
             return None
         
-        description = transaction.description.lower()
-        
-        # Try to find a matching category based on keywords
-        for category_id, keywords in self.category_rules.items():
-            for keyword in keywords:
-                if keyword.lower() in description:
-                    return category_id
-        
-        return None
+        # Try to find a matching category based on the rules
+        return self.matcher.match(transaction.description, transaction.amount)
     
-    def categorize_all_uncategorized(self) -> Dict[str, int]:
+    def categorize_all_uncategorized(
+        self,
+        user_id: Optional[int] = None,
+        batch_size: int = CATEGORIZE_BATCH_SIZE
+    ) -> Dict[str, int]:
         """
-        Categorize all uncategorized transactions
+        Categorize the uncategorized transactions of a user
         Returns a summary of how many transactions were categorized
+
+        Rows are read in id-ordered pages of batch_size, each page is matched once per
+        distinct description and written back with one UPDATE per category, then
+        committed, so memory use does not grow with the size of the backlog.
         """
-        uncategorized = self.db.query(Transaction).filter(
-            Transaction.category_id == None
-        ).all()
-        
+        total = 0
         categorized_count = 0
+        last_id = 0
         
-        for transaction in uncategorized:
-            category_id = self.categorize_transaction(transaction)
-            if category_id:
-                transaction.category_id = category_id
-                categorized_count += 1
-        
-        if categorized_count > 0:
-            self.db.commit()
+        while True:
+            page = self.db.execute(
+                select(
+                    Transaction.id,
+                    Transaction.user_id,
+                    Transaction.date,
+                    Transaction.description,
+                    Transaction.transaction_type,
+                    Transaction.amount
+                ).where(
+                    Transaction.user_id == user_id,
+                    Transaction.category_id.is_(None),
+                    Transaction.id > last_id
+                ).order_by(Transaction.id).limit(batch_size)
+            ).all()
+            if not page:
+                break
+            
+            total += len(page)
+            last_id = page[-1].id
+            categorized_count += self._categorize_page(page, user_id)
         
         return {
-            "total_uncategorized": len(uncategorized),
+            "total_uncategorized": total,
             "categorized": categorized_count,
-            "remaining_uncategorized": len(uncategorized) - categorized_count
+            "remaining_uncategorized": total - categorized_count
         }
+    
+    def _categorize_page(self, page, user_id: Optional[int]) -> int:
+        """Categorize one page of uncategorized rows and commit it. Returns the number categorized"""
+        # Match each distinct description (and amount, when rules have amount ranges) once
+        def match_key(row):
+            return (row.description, row.amount) if self.matcher.amount_sensitive else row.description
+        
+        matches = {}
+        for row in page:
+            key = match_key(row)
+            if key not in matches:
+                matches[key] = self.matcher.match_rule(row.description, row.amount)
+        
+        # Descriptions no rule matched go through the user's classifier in one batch
+        unmatched = list(dict.fromkeys(row.description for row in page if matches[match_key(row)] is None))
+        predicted = dict(zip(unmatched, predict_categories(user_id, unmatched))) if unmatched else {}
+        
+        ids_by_category: Dict[int, List[int]] = {}
+        learned = []
+        deltas = {}
+        for row in page:
+            rule = matches[match_key(row)]
+            if rule is not None:
+                category_id = rule.key
+                # A merchant is only learned from rules that hold for any amount
+                if not rule.amount_bound:
+                    learned.append((row.user_id, row.description, category_id))
+            else:
+                category_id = predicted.get(row.description)
+                if category_id is None:
+                    continue
+            ids_by_category.setdefault(category_id, []).append(row.id)
+            
+            # Move the transaction from the uncategorized rollup to its category's
+            moved = {"user_id": row.user_id, "date": row.date, "category_id": None,
+                     "transaction_type": row.transaction_type, "amount": row.amount}
+            merge_deltas(deltas, rollup_deltas([moved], sign=-1))
+            merge_deltas(deltas, rollup_deltas([dict(moved, category_id=category_id)]))
+        
+        if not ids_by_category:
+            return 0
+        
+        categorized_count = 0
+        for category_id, ids in ids_by_category.items():
+            result = self.db.execute(
+                update(Transaction)
+                .where(
+                    Transaction.id.in_(ids),
+                    Transaction.user_id == user_id,
+                    Transaction.category_id.is_(None)
+                )
+                .values(category_id=category_id)
+                .execution_options(synchronize_session=False)
+            )
+            categorized_count += result.rowcount
+        
+        learn_merchant_categories(self.db, learned)
+        apply_rollup_deltas(self.db, deltas)
+        self.db.commit()
+        return categorized_count
@@ -0,0 +1,289 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+from datetime import datetime, timezone
+from functools import lru_cache
+import json
+import os
+import re
+import threading
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models.transaction import Transaction
+from app.services.normalization import normalize_description
+
+# Where trained models are stored, one directory per user
+CLASSIFIER_MODELS_DIR = os.getenv("CLASSIFIER_MODELS_DIR", "./classifier_models")
+
+# Predictions below this probability are left uncategorized
+CLASSIFIER_MIN_CONFIDENCE = float(os.getenv("CLASSIFIER_MIN_CONFIDENCE", "0.6"))
+
+# Training needs at least this many distinct categorized descriptions
+CLASSIFIER_MIN_SAMPLES = int(os.getenv("CLASSIFIER_MIN_SAMPLES", "20"))
+
+# Most recent distinct descriptions used for training
+CLASSIFIER_MAX_SAMPLES = int(os.getenv("CLASSIFIER_MAX_SAMPLES", "50000"))
+
+# Model versions kept on disk per user
+CLASSIFIER_KEEP_VERSIONS = int(os.getenv("CLASSIFIER_KEEP_VERSIONS", "3"))
+
+# Descriptions featurized at once; bounds the memory used by batch prediction
+PREDICT_BATCH_SIZE = 5000
+
+_MODEL_FILE = re.compile(r"^v(\d+)\.npz$")
+
+def _hash_ngrams(
+    descriptions: Sequence[str],
+    n_features: int,
+    ngram_range: Tuple[int, int]
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Hashed character n-gram features of a batch of descriptions.
+
+    Returns parallel (rows, columns, values) arrays: every n-gram of row i adds
+    an entry in its hashed column, weighted 1/sqrt(number of n-grams in the row).
+    The hash is a polynomial over the UTF-8 bytes computed for all windows at once,
+    so it is stable across processes (unlike hash()).
+    """
+    encoded = [(" " + normalize_description(d or "") + " ").encode("utf-8") for d in descriptions]
+    lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+    data = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint64)
+    ends = np.cumsum(lengths)
+    doc_of_position = np.repeat(np.arange(len(encoded)), lengths)
+
+    rows, columns = [], []
+    for n in range(ngram_range[0], ngram_range[1] + 1):
+        windows = len(data) - n + 1
+        if windows <= 0:
+            continue
+        hashes = np.full(windows, n, dtype=np.uint64)
+        for offset in range(n):
+            # uint64 arithmetic wraps around, which is what we want for a hash
+            hashes = hashes * np.uint64(1000003) + data[offset:offset + windows]
+        hashes ^= hashes >> np.uint64(29)
+
+        # Drop windows that run into the next description
+        docs = doc_of_position[:windows]
+        valid = np.arange(windows) + n <= ends[docs]
+        rows.append(docs[valid])
+        columns.append((hashes[valid] % np.uint64(n_features)).astype(np.int64))
+
+    rows = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+    columns = np.concatenate(columns) if columns else np.zeros(0, dtype=np.int64)
+    counts = np.bincount(rows, minlength=len(encoded))
+    values = (1.0 / np.sqrt(np.maximum(counts, 1)))[rows].astype(np.float32)
+    return rows, columns, values
+
+class TextClassifier:
+    """
+    Multinomial logistic regression over hashed character n-grams, in NumPy.
+
+    Small enough to train on a user's history in seconds on a CPU, and batch
+    prediction is a handful of vectorized passes per PREDICT_BATCH_SIZE descriptions.
+    """
+
+    def __init__(self, n_features: int = 2 ** 16, ngram_range: Tuple[int, int] = (2, 4)):
+        self.n_features = n_features
+        self.ngram_range = ngram_range
+        self.classes = np.zeros(0, dtype=np.int64)
+        self.weights = np.zeros((n_features, 0), dtype=np.float32)
+        self.bias = np.zeros(0, dtype=np.float32)
+        self.meta: Dict = {}
+
+    def _logits(self, rows, columns, values, batch_size: int) -> np.ndarray:
+        logits = np.tile(self.bias, (batch_size, 1))
+        contributions = self.weights[columns] * values[:, None]
+        for k in range(len(self.classes)):
+            logits[:, k] += np.bincount(rows, weights=contributions[:, k], minlength=batch_size)
+        return logits
+
+    @staticmethod
+    def _softmax(logits: np.ndarray) -> np.ndarray:
+        logits = logits - logits.max(axis=1, keepdims=True)
+        np.exp(logits, out=logits)
+        logits /= logits.sum(axis=1, keepdims=True)
+        return logits
+
+    def fit(
+        self,
+        descriptions: Sequence[str],
+        labels: Sequence[int],
+        epochs: int = 8,
+        learning_rate: float = 0.5,
+        batch_size: int = 64,
+        l2: float = 1e-6,
+        seed: int = 0
+    ) -> "TextClassifier":
+        """Train with mini-batch SGD on the softmax cross-entropy"""
+        rng = np.random.default_rng(seed)
+        self.classes, targets = np.unique(np.asarray(labels, dtype=np.int64), return_inverse=True)
+        n_classes = len(self.classes)
+        self.weights = np.zeros((self.n_features, n_classes), dtype=np.float32)
+        self.bias = np.zeros(n_classes, dtype=np.float32)
+
+        # Featurize once, in a random order, as CSR-style row ranges
+        order = rng.permutation(len(descriptions))
+        rows, columns, values = _hash_ngrams([descriptions[i] for i in order], self.n_features, self.ngram_range)
+        targets = targets[order]
+        sort = np.argsort(rows, kind="stable")
+        rows, columns, values = rows[sort], columns[sort], values[sort]
+        indptr = np.searchsorted(rows, np.arange(len(descriptions) + 1))
+
+        batch_starts = np.arange(0, len(descriptions), batch_size)
+        for _ in range(epochs):
+            for start in rng.permutation(batch_starts):
+                stop = min(start + batch_size, len(descriptions))
+                lo, hi = indptr[start], indptr[stop]
+                batch_rows = rows[lo:hi] - start
+                batch_columns, batch_values = columns[lo:hi], values[lo:hi]
+
+                probabilities = self._softmax(self._logits(batch_rows, batch_columns, batch_values, stop - start))
+                probabilities[np.arange(stop - start), targets[start:stop]] -= 1.0
+                gradient = probabilities / (stop - start)
+
+                np.add.at(
+                    self.weights,
+                    batch_columns,
+                    (-learning_rate * batch_values[:, None] * gradient[batch_rows]).astype(np.float32)
+                )
+                self.bias -= (learning_rate * gradient.sum(axis=0)).astype(np.float32)
+            if l2:
+                self.weights *= np.float32(1.0 - learning_rate * l2)
+
+        return self
+
+    def predict_proba(self, descriptions: Sequence[str]) -> np.ndarray:
+        """Class probabilities, one row per description (columns follow self.classes)"""
+        probabilities = np.zeros((len(descriptions), len(self.classes)), dtype=np.float32)
+        for start in range(0, len(descriptions), PREDICT_BATCH_SIZE):
+            batch = descriptions[start:start + PREDICT_BATCH_SIZE]
+            rows, columns, values = _hash_ngrams(batch, self.n_features, self.ngram_range)
+            probabilities[start:start + len(batch)] = self._softmax(self._logits(rows, columns, values, len(batch)))
+        return probabilities
+
+    def predict(
+        self,
+        descriptions: Sequence[str],
+        min_confidence: float = CLASSIFIER_MIN_CONFIDENCE
+    ) -> List[Optional[int]]:
+        """Predicted category ids, None where the model is not confident enough"""
+        if not len(descriptions) or not len(self.classes):
+            return [None] * len(descriptions)
+        probabilities = self.predict_proba(descriptions)
+        best = probabilities.argmax(axis=1)
+        confident = probabilities[np.arange(len(descriptions)), best] >= min_confidence
+        return [int(self.classes[b]) if ok else None for b, ok in zip(best, confident)]
+
+    def save(self, path: str):
+        """Write the model atomically"""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as target:
+            np.savez_compressed(
+                target,
+                weights=self.weights,
+                bias=self.bias,
+                classes=self.classes,
+                ngram_range=np.asarray(self.ngram_range),
+                meta=np.asarray(json.dumps(self.meta))
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "TextClassifier":
+        with np.load(path, allow_pickle=False) as data:
+            model = cls(n_features=data["weights"].shape[0], ngram_range=tuple(int(n) for n in data["ngram_range"]))
+            model.weights = data["weights"]
+            model.bias = data["bias"]
+            model.classes = data["classes"]
+            model.meta = json.loads(str(data["meta"]))
+        return model
+
+class ClassifierTrainingError(ValueError):
+    """Raised when a user's history is not enough to train a model"""
+
+def _user_dir(user_id: int) -> str:
+    return os.path.join(CLASSIFIER_MODELS_DIR, f"user_{user_id}")
+
+def _model_versions(user_id: int) -> List[int]:
+    """Stored model versions of a user, oldest first"""
+    try:
+        names = os.listdir(_user_dir(user_id))
+    except FileNotFoundError:
+        return []
+    return sorted(int(m.group(1)) for m in map(_MODEL_FILE.match, names) if m)
+
+@lru_cache(maxsize=64)
+def _load_version(user_id: int, version: int) -> TextClassifier:
+    # Versions are immutable once written, so they can be cached by number
+    return TextClassifier.load(os.path.join(_user_dir(user_id), f"v{version}.npz"))
+
+def load_user_model(user_id: Optional[int]) -> Optional[TextClassifier]:
+    """Get the latest trained model of a user, if any"""
+    if user_id is None:
+        return None
+    versions = _model_versions(user_id)
+    return _load_version(user_id, versions[-1]) if versions else None
+
+_training_lock = threading.Lock()
+
+def train_user_model(db: Session, user_id: int) -> Dict:
+    """
+    Train a new model version from the user's categorized transactions.
+    Returns the model metadata; older versions beyond CLASSIFIER_KEEP_VERSIONS are removed.
+    """
+    # Latest category of each distinct description, most recent first
+    rows = db.query(Transaction.description, Transaction.category_id).filter(
+        Transaction.user_id == user_id,
+        Transaction.category_id.isnot(None)
+    ).order_by(Transaction.id.desc()).yield_per(10000)
+
+    samples: Dict[str, int] = {}
+    for description, category_id in rows:
+        key = normalize_description(description or "")
+        if key and key not in samples:
+            samples[key] = category_id
+            if len(samples) >= CLASSIFIER_MAX_SAMPLES:
+                break
+
+    if len(samples) < CLASSIFIER_MIN_SAMPLES:
+        raise ClassifierTrainingError(
+            f"Need at least {CLASSIFIER_MIN_SAMPLES} distinct categorized descriptions to train, found {len(samples)}"
+        )
+    if len(set(samples.values())) < 2:
+        raise ClassifierTrainingError("Need categorized transactions in at least 2 categories to train")
+
+    descriptions = list(samples)
+    labels = list(samples.values())
+
+    started = datetime.now(timezone.utc)
+    model = TextClassifier().fit(descriptions, labels)
+    training_seconds = (datetime.now(timezone.utc) - started).total_seconds()
+    training_accuracy = float(np.mean(np.asarray(model.predict(descriptions, min_confidence=0.0)) == np.asarray(labels)))
+
+    with _training_lock:
+        os.makedirs(_user_dir(user_id), exist_ok=True)
+        versions = _model_versions(user_id)
+        version = versions[-1] + 1 if versions else 1
+        model.meta = {
+            "version": version,
+            "trained_at": started.isoformat(),
+            "samples": len(descriptions),
+            "categories": len(model.classes),
+            "training_accuracy": round(training_accuracy, 4),
+            "training_seconds": round(training_seconds, 3)
+        }
+        model.save(os.path.join(_user_dir(user_id), f"v{version}.npz"))
+
+        for old_version in (versions + [version])[:-CLASSIFIER_KEEP_VERSIONS]:
+            try:
+                os.remove(os.path.join(_user_dir(user_id), f"v{old_version}.npz"))
+            except OSError:
+                pass
+
+    return model.meta
+
+def predict_categories(user_id: Optional[int], descriptions: Sequence[str]) -> List[Optional[int]]:
+    """Batch predict categories with the user's latest model; all None without a model"""
+    model = load_user_model(user_id)
+    if model is None:
+        return [None] * len(descriptions)
+    return model.predict(descriptions)
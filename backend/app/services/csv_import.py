@@ -0,0 +1,319 @@
+from typing import BinaryIO, Callable, Dict, List, Optional, Set, Tuple
+import os
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from app.services.bulk_writes import bulk_insert_transactions
+from app.services.categorization import auto_categorize_transaction, get_rule_registry, sync_category_rules
+from app.services.classifier import predict_categories
+from app.services.deduplication import FingerprintCounter, import_fingerprints, transaction_content
+from app.services.merchant_index import MerchantIndex
+from app.services.normalization import normalize_merchant
+from app.services.recurring import update_recurring_series
+
+# Rows read from an uploaded file per chunk; bounds import memory use
+CSV_CHUNK_ROWS = int(os.getenv("CSV_CHUNK_ROWS", "10000"))
+
+# Columns every statement must have
+REQUIRED_COLUMNS = ['Date', 'Description', 'Amount']
+
+# Accepted date formats, tried in order
+DATE_FORMATS = ["%Y-%m-%d", "%m/%d/%Y", "%d/%m/%Y"]
+
+def parse_dates(values: pd.Series) -> pd.Series:
+    """Parse a column of date strings, falling back through DATE_FORMATS"""
+    text = values.astype(str)
+    dates = pd.to_datetime(text, format=DATE_FORMATS[0], errors='coerce')
+
+    for date_format in DATE_FORMATS[1:]:
+        unparsed = dates.isna()
+        if not unparsed.any():
+            break
+        dates[unparsed] = pd.to_datetime(text[unparsed], format=date_format, errors='coerce')
+
+    return dates
+
+def parse_transaction_rows(df: pd.DataFrame) -> Tuple[pd.DataFrame, List[str]]:
+    """
+    Parse and validate statement rows column-wise.
+
+    Returns a frame with date, description, amount (absolute), transaction_type
+    and raw_text for the valid rows, and row-level error messages for the rest.
+    Row numbers in the messages are the CSV line numbers (index + 2, after the header).
+    """
+    missing = df['Date'].isna() | df['Description'].isna() | df['Amount'].isna()
+
+    dates = parse_dates(df['Date'])
+    invalid_date = ~missing & dates.isna()
+
+    amounts = pd.to_numeric(df['Amount'], errors='coerce')
+    invalid_amount = ~missing & ~invalid_date & amounts.isna()
+
+    # Error messages in row order, the first failing check wins
+    failed = missing | invalid_date | invalid_amount
+    messages = np.select(
+        [missing[failed], invalid_date[failed], invalid_amount[failed]],
+        [
+            "Missing required values",
+            "Invalid date format. Use YYYY-MM-DD, MM/DD/YYYY, or DD/MM/YYYY",
+            "Invalid amount value"
+        ],
+        default=""
+    )
+    errors = [
+        f"Error in row {idx+2}: {message}"
+        for idx, message in zip(df.index[failed], messages)
+    ]
+
+    valid = ~failed
+    amounts = amounts[valid]
+
+    if 'RawText' in df.columns:
+        raw_text = df.loc[valid, 'RawText']
+        raw_text = raw_text.astype(str).where(raw_text.notna(), None)
+    else:
+        raw_text = None
+
+    parsed = pd.DataFrame({
+        'date': dates[valid].dt.date,
+        'description': df.loc[valid, 'Description'].astype(str),
+        # Store absolute amount, the sign becomes the transaction type
+        'amount': amounts.abs(),
+        'transaction_type': np.where(amounts >= 0, "credit", "debit"),
+        'raw_text': raw_text
+    }, index=df.index[valid])
+
+    return parsed, errors
+
+class CSVImportError(ValueError):
+    """Raised when an uploaded statement cannot be imported at all"""
+
+def _row_contents(parsed: pd.DataFrame, user_id: Optional[int]) -> List[str]:
+    return [
+        transaction_content(user_id, transaction_date, description, amount, transaction_type)
+        for transaction_date, description, amount, transaction_type in zip(
+            parsed['date'].tolist(),
+            parsed['description'].tolist(),
+            parsed['amount'].tolist(),
+            parsed['transaction_type'].tolist()
+        )
+    ]
+
+def import_transaction_chunk(
+    db: Session,
+    df: pd.DataFrame,
+    user_id: Optional[int],
+    merchant_index: MerchantIndex,
+    fingerprints: FingerprintCounter,
+    merchant_keys: Optional[Set[str]] = None,
+    commit: bool = True
+) -> Tuple[int, int, List[str]]:
+    """
+    Parse, categorize and insert one chunk of statement rows.
+    Rows already imported (by fingerprint) are skipped. Returns (successful, duplicates, errors)
+    The merchant keys of inserted rows are added to merchant_keys, if given.
+    With commit=False the rows are left for the caller to commit.
+    """
+    parsed, errors = parse_transaction_rows(df)
+
+    # Skip lines already imported, with one existence check per chunk
+    row_fingerprints, duplicate = import_fingerprints(db, fingerprints, _row_contents(parsed, user_id))
+    duplicates = sum(duplicate)
+    if duplicates:
+        keep = ~np.array(duplicate, dtype=bool)
+        parsed = parsed[keep]
+        row_fingerprints = [fingerprint for fingerprint, skip in zip(row_fingerprints, duplicate) if not skip]
+
+    # Categorize each distinct description once, or each distinct
+    # (description, amount) pair when some rules have an amount range
+    descriptions = parsed['description'].tolist()
+    amounts = parsed['amount'].tolist()
+    matcher = get_rule_registry(db).matcher
+    amount_sensitive = matcher.amount_sensitive
+    keys = list(zip(descriptions, amounts)) if amount_sensitive else descriptions
+    category_ids = {}
+    for key in dict.fromkeys(keys):
+        description, amount = key if amount_sensitive else (key, None)
+        category_id = auto_categorize_transaction(db, description, merchant_index, amount=amount)
+        category_ids[key] = category_id
+        
+        # A merchant is only learned from rules that hold for any amount
+        if amount_sensitive:
+            rule = matcher.match_rule(description, amount)
+            if rule is not None and rule.amount_bound and rule.key == category_id:
+                continue
+        merchant_index.learn(description, category_id)
+
+    # Fall back to the user's trained classifier for whatever no rule or merchant matched,
+    # in one batch for the chunk. Predictions are not learned as merchants.
+    unmatched = [key for key, category_id in category_ids.items() if category_id is None]
+    if unmatched:
+        predicted = predict_categories(user_id, [key[0] if amount_sensitive else key for key in unmatched])
+        for key, category_id in zip(unmatched, predicted):
+            category_ids[key] = category_id
+
+    records = [
+        {
+            "date": transaction_date,
+            "description": description,
+            "merchant_key": normalize_merchant(description),
+            "amount": amount,
+            "transaction_type": transaction_type,
+            "raw_text": raw_text,
+            "category_id": category_ids[key],
+            "user_id": user_id,
+            "fingerprint": fingerprint
+        }
+        for transaction_date, description, amount, transaction_type, raw_text, key, fingerprint in zip(
+            parsed['date'].tolist(),
+            descriptions,
+            amounts,
+            parsed['transaction_type'].tolist(),
+            parsed['raw_text'].tolist(),
+            keys,
+            row_fingerprints
+        )
+    ]
+
+    # Bulk insert, committing in chunks
+    successful, insert_errors = bulk_insert_transactions(db, records, row_numbers=(parsed.index + 2).tolist(), commit=commit)
+    errors.extend(insert_errors)
+
+    if successful > 0:
+        merchant_index.flush()
+        if commit:
+            db.commit()
+        if merchant_keys is not None:
+            merchant_keys.update(record["merchant_key"] for record in records)
+
+    return successful, duplicates, errors
+
+def import_transactions_csv(
+    db: Session,
+    source: BinaryIO,
+    user_id: Optional[int],
+    chunk_rows: int = CSV_CHUNK_ROWS,
+    skip_rows: int = 0,
+    on_chunk: Optional[Callable[[Dict], None]] = None
+) -> Dict:
+    """
+    Stream a CSV statement into the transactions table.
+
+    The file is read chunk_rows rows at a time and each chunk is categorized and
+    inserted before the next one is read, so memory use depends on the chunk size
+    rather than the file size. Returns the TransactionUploadResponse totals.
+
+    skip_rows data rows are skipped (to resume an interrupted import), and
+    on_chunk is called with the running totals after every chunk. The chunk's
+    rows are committed after on_chunk returns, in one transaction with whatever
+    it changed, so recorded progress always matches the rows written.
+
+    Lines already imported (same user, date, description, amount and type, see
+    app/services/deduplication.py) are skipped and counted as duplicates,
+    including repeats of such a line within the file.
+
+    Afterwards the recurring series of the merchants in the file are re-detected
+    (see app/services/recurring.py); other merchants are not rescanned.
+    """
+    fingerprints = FingerprintCounter()
+    merchant_keys: Set[str] = set()
+
+    # Rules may have changed in another process since the last import
+    sync_category_rules(db)
+
+    if skip_rows:
+        # Count repeated lines among the skipped rows, so the rest keep the
+        # fingerprints they would have had in an uninterrupted import
+        try:
+            for df in pd.read_csv(source, chunksize=chunk_rows, nrows=skip_rows):
+                parsed, _ = parse_transaction_rows(df)
+                for content in _row_contents(parsed, user_id):
+                    fingerprints.next(content)
+                # Rows of the interrupted run may not have been analyzed yet
+                merchant_keys.update(normalize_merchant(description) for description in parsed['description'].tolist())
+            source.seek(0)
+        except Exception as e:
+            raise CSVImportError(f"Failed to parse CSV: {str(e)}")
+
+    try:
+        if skip_rows:
+            reader = pd.read_csv(source, chunksize=chunk_rows, skiprows=range(1, skip_rows + 1))
+        else:
+            reader = pd.read_csv(source, chunksize=chunk_rows)
+    except Exception as e:
+        raise CSVImportError(f"Failed to parse CSV: {str(e)}")
+
+    # Load the user's learned merchants once for the whole import
+    merchant_index = MerchantIndex(db, user_id)
+
+    total_rows = 0
+    successful = 0
+    duplicates = 0
+    errors = []
+    first_chunk = True
+    chunks = iter(reader)
+
+    while True:
+        try:
+            df = next(chunks)
+        except StopIteration:
+            break
+        except Exception as e:
+            # Nothing has been written yet, so fail the whole upload as before
+            if first_chunk:
+                raise CSVImportError(f"Failed to parse CSV: {str(e)}")
+            errors.append(f"Failed to parse CSV after row {total_rows + 1}: {str(e)}")
+            break
+
+        if first_chunk:
+            # Validate required columns
+            missing_columns = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+            if missing_columns:
+                raise CSVImportError(f"Missing required columns: {', '.join(missing_columns)}")
+            first_chunk = False
+
+        if df.empty:
+            continue
+
+        # Keep row numbers relative to the whole file
+        if skip_rows:
+            df.index = df.index + skip_rows
+
+        total_rows += len(df)
+        chunk_successful, chunk_duplicates, chunk_errors = import_transaction_chunk(
+            db, df, user_id, merchant_index, fingerprints, merchant_keys, commit=on_chunk is None
+        )
+        successful += chunk_successful
+        duplicates += chunk_duplicates
+        errors.extend(chunk_errors)
+
+        if on_chunk:
+            on_chunk({
+                "rows_processed": total_rows,
+                "successful": successful,
+                "failed": total_rows - successful - duplicates,
+                "duplicates": duplicates,
+                "errors": chunk_errors
+            })
+            db.commit()
+
+    if total_rows == 0 and not skip_rows:
+        raise CSVImportError("CSV file contains no data rows")
+
+    # Recurring series are per user; a failure here doesn't undo the import
+    if user_id is not None and merchant_keys:
+        try:
+            update_recurring_series(db, user_id, merchant_keys)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Recurring transaction detection failed: {str(e)}")
+
+    return {
+        "total_imported": total_rows,
+        "successful": successful,
+        "failed": total_rows - successful - duplicates,
+        "duplicates": duplicates,
+        "errors": errors if errors else None
+    }
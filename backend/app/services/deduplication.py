@@ -0,0 +1,194 @@
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from datetime import date
+import hashlib
+from sqlalchemy import bindparam, update
+from sqlalchemy.orm import Session
+
+from app.models.transaction import Transaction
+from app.services.normalization import normalize_description
+
+# Fingerprints per IN (...) query, kept well below the SQLite bound parameter limit
+LOOKUP_BATCH_SIZE = 500
+
+def transaction_content(
+    user_id: Optional[int],
+    transaction_date: date,
+    description: str,
+    amount: float,
+    transaction_type: str
+) -> str:
+    """
+    The fields that identify a statement line, in canonical form.
+
+    Uses the normalized description rather than the merchant key: the merchant key
+    drops store numbers, locations and dates, so two same-day purchases at different
+    branches of a chain would look like one line and the second would be skipped.
+    """
+    return "|".join([
+        str(user_id),
+        transaction_date.isoformat(),
+        normalize_description(description),
+        f"{abs(amount or 0.0):.2f}",
+        str(transaction_type)
+    ])
+
+def fingerprint_for(content: str, occurrence: int) -> str:
+    """
+    Fingerprint of the occurrence-th line (0-based) with this content.
+
+    Identical lines inside one statement are legitimate (two coffees on the same
+    day), so each gets its own fingerprint. A line whose content an earlier import
+    already stored is skipped along with its repeats, see import_fingerprints.
+    """
+    return hashlib.sha1(f"{content}|{occurrence}".encode("utf-8")).hexdigest()
+
+class FingerprintCounter:
+    """Assigns fingerprints to the rows of one import, counting repeated content across chunks"""
+
+    def __init__(self):
+        self.occurrences: Dict[str, int] = {}
+        # Content first seen by this import -> whether it was new to the database
+        self.new_contents: Dict[str, bool] = {}
+
+    def next(self, content: str) -> str:
+        occurrence = self.occurrences.get(content, 0)
+        self.occurrences[content] = occurrence + 1
+        return fingerprint_for(content, occurrence)
+
+    def assign(self, records: List[Dict]):
+        """Set the fingerprint of transaction records (dicts with the Transaction columns)"""
+        for record in records:
+            record["fingerprint"] = self.next(transaction_content(
+                record["user_id"],
+                record["date"],
+                record["description"],
+                record["amount"],
+                record["transaction_type"]
+            ))
+
+def existing_fingerprints(db: Session, fingerprints: Iterable[str]) -> Set[str]:
+    """The given fingerprints that are already stored, with one IN (...) query per batch"""
+    fingerprints = list(fingerprints)
+    found = set()
+    for start in range(0, len(fingerprints), LOOKUP_BATCH_SIZE):
+        batch = fingerprints[start:start + LOOKUP_BATCH_SIZE]
+        found.update(
+            fingerprint for (fingerprint,) in
+            db.query(Transaction.fingerprint).filter(Transaction.fingerprint.in_(batch))
+        )
+    return found
+
+def import_fingerprints(db: Session, counter: FingerprintCounter, contents: List[str]) -> Tuple[List[str], List[bool]]:
+    """
+    Fingerprints of the next imported lines with these contents, and whether each is a duplicate.
+
+    Content already stored before this import is a duplicate at every occurrence, so
+    an upload never adds copies of a line kept by earlier imports or by
+    app/scripts/remove_duplicates.py. Repeats of new content are all imported.
+    Lines whose first occurrence was skipped on resume fall back to their own fingerprint.
+    """
+    occurrences = []
+    fingerprints = []
+    for content in contents:
+        occurrences.append(counter.occurrences.get(content, 0))
+        fingerprints.append(counter.next(content))
+    stored = existing_fingerprints(db, fingerprints)
+
+    duplicate = []
+    for content, occurrence, fingerprint in zip(contents, occurrences, fingerprints):
+        if occurrence == 0:
+            counter.new_contents[content] = fingerprint not in stored
+            duplicate.append(not counter.new_contents[content])
+        elif content in counter.new_contents:
+            duplicate.append(not counter.new_contents[content] or fingerprint in stored)
+        else:
+            duplicate.append(fingerprint in stored)
+    return fingerprints, duplicate
+
+def next_free_fingerprint(
+    db: Session,
+    user_id: Optional[int],
+    transaction_date: date,
+    description: str,
+    amount: float,
+    transaction_type: str
+) -> str:
+    """Fingerprint for a single new transaction: the first occurrence of its content not yet stored"""
+    content = transaction_content(user_id, transaction_date, description, amount, transaction_type)
+    occurrence = 0
+    while True:
+        # Look ahead a few occurrences per query
+        candidates = [fingerprint_for(content, occurrence + i) for i in range(8)]
+        found = existing_fingerprints(db, candidates)
+        for fingerprint in candidates:
+            if fingerprint not in found:
+                return fingerprint
+        occurrence += len(candidates)
+
+def backfill_fingerprints(db: Session, batch_size: int = 10000, ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Fingerprint transactions stored without one, in id order. Returns the number of rows updated.
+    Rows with the same content get consecutive occurrences after the ones already stored.
+    With ids, only those transactions are looked at (one IN (...) query per batch)
+    instead of scanning the table.
+    """
+    if ids is not None:
+        ids = sorted(set(ids))
+        id_batches = [ids[start:start + LOOKUP_BATCH_SIZE] for start in range(0, len(ids), LOOKUP_BATCH_SIZE)]
+    else:
+        id_batches = [None]
+
+    counter = FingerprintCounter()
+    updated = 0
+    for id_batch in id_batches:
+        updated += _backfill_batch(db, counter, batch_size, id_batch)
+    return updated
+
+def _backfill_batch(db: Session, counter: FingerprintCounter, batch_size: int, ids: Optional[List[int]]) -> int:
+    updated = 0
+    last_id = 0
+    while True:
+        query = db.query(
+            Transaction.id,
+            Transaction.user_id,
+            Transaction.date,
+            Transaction.description,
+            Transaction.amount,
+            Transaction.transaction_type
+        ).filter(
+            Transaction.fingerprint.is_(None),
+            Transaction.date.isnot(None),
+            Transaction.id > last_id
+        )
+        if ids is not None:
+            query = query.filter(Transaction.id.in_(ids))
+        rows = query.order_by(Transaction.id).limit(batch_size).all()
+        if not rows:
+            break
+
+        contents = {
+            row.id: transaction_content(row.user_id, row.date, row.description, row.amount, row.transaction_type)
+            for row in rows
+        }
+        assigned = {row_id: counter.next(content) for row_id, content in contents.items()}
+
+        # Move past occurrences taken by rows fingerprinted earlier (imports, manual creates)
+        taken = existing_fingerprints(db, assigned.values())
+        while taken:
+            for row_id, fingerprint in assigned.items():
+                if fingerprint in taken:
+                    assigned[row_id] = counter.next(contents[row_id])
+            taken = existing_fingerprints(db, assigned.values())
+
+        values = [{"row_id": row_id, "fingerprint": fingerprint} for row_id, fingerprint in assigned.items()]
+
+        db.execute(
+            update(Transaction.__table__)
+            .where(Transaction.__table__.c.id == bindparam("row_id"))
+            .values(fingerprint=bindparam("fingerprint")),
+            values
+        )
+        db.commit()
+        updated += len(rows)
+        last_id = rows[-1].id
+    return updated
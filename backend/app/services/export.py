@@ -0,0 +1,186 @@
+from typing import Iterator, List, Optional, Sequence
+from datetime import date
+import csv
+import io
+import os
+from sqlalchemy import select
+
+from app.database import ReadSessionLocal, SessionLocal, use_read_replica
+from app.models.category import Category
+from app.models.transaction import Transaction
+from app.services.search import apply_search
+
+# pyarrow is optional, only the parquet and arrow formats need it
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Rows fetched from the database and written out per batch
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "10000"))
+
+# Exportable columns, in their default order
+EXPORT_COLUMNS = {
+    "id": Transaction.id,
+    "date": Transaction.date,
+    "description": Transaction.description,
+    "amount": Transaction.amount,
+    "transaction_type": Transaction.transaction_type,
+    "category_id": Transaction.category_id,
+    "category_name": Category.name,
+    "merchant_key": Transaction.merchant_key,
+    "raw_text": Transaction.raw_text
+}
+
+# format -> (content type, file extension)
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows")
+}
+
+class ExportError(ValueError):
+    """Raised for an export that can't be produced (unknown column or format, missing pyarrow)"""
+
+def parse_columns(columns: Optional[str]) -> List[str]:
+    """Validate a comma separated column projection; all columns when empty"""
+    if not columns:
+        return list(EXPORT_COLUMNS)
+    names = [name.strip() for name in columns.split(",") if name.strip()]
+    unknown = [name for name in names if name not in EXPORT_COLUMNS]
+    if unknown:
+        raise ExportError(f"Unknown columns: {', '.join(unknown)}. Available: {', '.join(EXPORT_COLUMNS)}")
+    return list(dict.fromkeys(names))
+
+def check_format(export_format: str):
+    if export_format not in EXPORT_FORMATS:
+        raise ExportError(f"Invalid format: {export_format}. Use {', '.join(EXPORT_FORMATS)}")
+    if export_format != "csv" and pa is None:
+        raise ExportError(f"The {export_format} format requires pyarrow to be installed")
+
+def _arrow_type(name: str):
+    if name in ("id", "category_id"):
+        return pa.int64()
+    if name == "date":
+        return pa.date32()
+    if name == "amount":
+        return pa.float64()
+    return pa.string()
+
+def iter_row_batches(
+    user_id: int,
+    columns: Sequence[str],
+    category_id: Optional[int] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    q: Optional[str] = None,
+    batch_size: int = EXPORT_BATCH_SIZE
+) -> Iterator[List[tuple]]:
+    """
+    A user's transactions in (date, id) order, batch_size rows at a time.
+
+    Uses its own session, since the response is still streaming after the request's
+    dependencies are closed, and a server-side cursor (yield_per), so only one
+    batch is held in memory.
+    """
+    db = (ReadSessionLocal if use_read_replica(user_id) else SessionLocal)()
+    try:
+        query = select(*[EXPORT_COLUMNS[name] for name in columns]).select_from(Transaction)
+        if "category_name" in columns:
+            query = query.outerjoin(Category, Transaction.category_id == Category.id)
+        query = query.where(Transaction.user_id == user_id)
+        if category_id:
+            query = query.where(Transaction.category_id == category_id)
+        if start:
+            query = query.where(Transaction.date >= start)
+        if end:
+            query = query.where(Transaction.date <= end)
+        if q:
+            query, _ = apply_search(query, q, user_id, db.get_bind().dialect.name)
+        query = query.order_by(Transaction.date, Transaction.id)
+
+        result = db.execute(query.execution_options(yield_per=batch_size))
+        for batch in result.partitions():
+            yield [tuple(row) for row in batch]
+    finally:
+        db.close()
+
+def _csv_stream(columns: Sequence[str], batches: Iterator[List[tuple]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+class _ChunkSink:
+    """Write-only file object that hands out what was written since the last take()"""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+def _arrow_stream(export_format: str, columns: Sequence[str], batches: Iterator[List[tuple]]) -> Iterator[bytes]:
+    schema = pa.schema([(name, _arrow_type(name)) for name in columns])
+    sink = _ChunkSink()
+    # One parquet row group / IPC record batch per database batch
+    if export_format == "parquet":
+        writer = pq.ParquetWriter(sink, schema)
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+    try:
+        for batch in batches:
+            arrays = [pa.array([row[i] for row in batch], type=field.type) for i, field in enumerate(schema)]
+            table = pa.Table.from_arrays(arrays, schema=schema)
+            if export_format == "parquet":
+                writer.write_table(table)
+            else:
+                writer.write(table)
+            yield sink.take()
+    finally:
+        writer.close()
+    yield sink.take()
+
+def stream_export(
+    export_format: str,
+    user_id: int,
+    columns: Sequence[str],
+    category_id: Optional[int] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    q: Optional[str] = None,
+    batch_size: int = EXPORT_BATCH_SIZE
+) -> Iterator[bytes]:
+    """Encoded export of a user's transactions, produced one batch at a time"""
+    check_format(export_format)
+    batches = iter_row_batches(user_id, columns, category_id, start, end, q, batch_size)
+    if export_format == "csv":
+        return _csv_stream(columns, batches)
+    return _arrow_stream(export_format, columns, batches)
@@ -0,0 +1,199 @@
+from typing import BinaryIO, Dict, Optional
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timezone
+import json
+import os
+import shutil
+import threading
+import traceback
+import uuid
+
+from app.database import SessionLocal, dispose_inherited_connections, record_user_write
+from app.models.import_job import ImportJob
+from app.services.csv_import import CSVImportError, import_transactions_csv
+from app.services.response_cache import RESPONSE_CACHE_BACKEND
+
+# Where uploaded files are kept until their job finishes
+IMPORT_JOBS_DIR = os.getenv("IMPORT_JOBS_DIR", "./import_jobs")
+
+# Worker pool settings: "thread" or "process" workers
+IMPORT_WORKER_MODE = os.getenv("IMPORT_WORKER_MODE", "thread")
+IMPORT_WORKERS = int(os.getenv("IMPORT_WORKERS", "2"))
+
+_executor: Optional[Executor] = None
+_executor_lock = threading.Lock()
+
+def check_worker_settings():
+    """
+    Raise ValueError for worker settings that can't work; called at startup.
+
+    Process workers invalidate cached responses in their own process, so the
+    in-process memory cache of the API would keep serving stale summaries.
+    """
+    if IMPORT_WORKER_MODE not in ("thread", "process"):
+        raise ValueError(f"Invalid IMPORT_WORKER_MODE: {IMPORT_WORKER_MODE}. Use 'thread' or 'process'")
+    if IMPORT_WORKER_MODE == "process" and RESPONSE_CACHE_BACKEND == "memory":
+        raise ValueError(
+            "IMPORT_WORKER_MODE=process needs a RESPONSE_CACHE_BACKEND shared between processes "
+            "(or 'none'), the memory backend would miss the workers' invalidations"
+        )
+
+def get_executor() -> Executor:
+    """Get the import worker pool, creating it on first use"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            check_worker_settings()
+            if IMPORT_WORKER_MODE == "process":
+                # Forked workers must not reuse the parent's pooled connections
+                _executor = ProcessPoolExecutor(max_workers=IMPORT_WORKERS, initializer=dispose_inherited_connections)
+            else:
+                _executor = ThreadPoolExecutor(max_workers=IMPORT_WORKERS, thread_name_prefix="import-job")
+        return _executor
+
+def submit_import_job(job_id: str, user_id: int):
+    """Queue a job; once it ends, the user's next reads go to the primary"""
+    future = get_executor().submit(run_import_job, job_id)
+    # Done callbacks run in this process, so this also covers process workers
+    future.add_done_callback(lambda _: record_user_write(user_id))
+
+def shutdown_executor():
+    """Stop accepting jobs; queued jobs stay pending in the database and resume on restart"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+def create_import_job(db, user_id: int, filename: str, source: BinaryIO) -> ImportJob:
+    """Spool an uploaded file to disk, record the job and queue it"""
+    os.makedirs(IMPORT_JOBS_DIR, exist_ok=True)
+    job_id = uuid.uuid4().hex
+    file_path = os.path.join(IMPORT_JOBS_DIR, f"{job_id}.csv")
+
+    with open(file_path, "wb") as target:
+        shutil.copyfileobj(source, target)
+
+    job = ImportJob(id=job_id, user_id=user_id, filename=filename, file_path=file_path, status="pending")
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+
+    submit_import_job(job_id, user_id)
+    return job
+
+def resume_import_jobs() -> int:
+    """Queue jobs left pending or running by a previous process. Returns the number queued"""
+    db = SessionLocal()
+    try:
+        jobs = db.query(ImportJob.id, ImportJob.user_id).filter(
+            ImportJob.status.in_(["pending", "running"])
+        ).order_by(ImportJob.created_at).all()
+    finally:
+        db.close()
+
+    for job_id, user_id in jobs:
+        submit_import_job(job_id, user_id)
+    return len(jobs)
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+def run_import_job(job_id: str):
+    """
+    Worker entry point: run one import job with its own session.
+
+    Progress is committed in the same transaction as every chunk's rows, so a job
+    interrupted by a restart resumes right after its last committed chunk instead
+    of starting over, and rows it wrote are never counted again as duplicates.
+    """
+    db = SessionLocal()
+    try:
+        job = db.query(ImportJob).filter(ImportJob.id == job_id).first()
+        if job is None or job.status not in ("pending", "running"):
+            return
+
+        job.status = "running"
+        if job.started_at is None:
+            job.started_at = _utcnow()
+        db.commit()
+
+        errors = json.loads(job.errors) if job.errors else []
+        base = {
+            "rows_processed": job.rows_processed,
+            "successful": job.successful,
+            "failed": job.failed,
+            "duplicates": job.duplicates or 0
+        }
+
+        def record_progress(progress: Dict):
+            job.rows_processed = base["rows_processed"] + progress["rows_processed"]
+            job.successful = base["successful"] + progress["successful"]
+            job.failed = base["failed"] + progress["failed"]
+            job.duplicates = base["duplicates"] + progress["duplicates"]
+            if progress["errors"]:
+                errors.extend(progress["errors"])
+                job.errors = json.dumps(errors)
+
+        try:
+            with open(job.file_path, "rb") as source:
+                import_transactions_csv(
+                    db,
+                    source,
+                    job.user_id,
+                    skip_rows=job.rows_processed,
+                    on_chunk=record_progress
+                )
+            job.status = "completed"
+        except CSVImportError as e:
+            db.rollback()
+            job.status = "failed"
+            job.error = str(e)
+        except Exception as e:
+            db.rollback()
+            print(f"Import job {job_id} failed: {str(e)}")
+            print(traceback.format_exc())
+            job.status = "failed"
+            job.error = f"Failed to process CSV file: {str(e)}"
+
+        job.finished_at = _utcnow()
+        db.commit()
+
+        # The spooled upload is no longer needed
+        try:
+            os.remove(job.file_path)
+        except OSError:
+            pass
+    finally:
+        db.close()
+
+def job_progress(job: ImportJob) -> Dict:
+    """Build the progress report for a job, including throughput"""
+    rows_per_second = None
+    if job.started_at:
+        started_at = job.started_at
+        finished_at = job.finished_at or _utcnow()
+        # SQLite returns naive datetimes
+        if started_at.tzinfo is None:
+            started_at = started_at.replace(tzinfo=timezone.utc)
+        if finished_at.tzinfo is None:
+            finished_at = finished_at.replace(tzinfo=timezone.utc)
+        elapsed = (finished_at - started_at).total_seconds()
+        if elapsed > 0:
+            rows_per_second = round(job.rows_processed / elapsed, 1)
+
+    return {
+        "job_id": job.id,
+        "filename": job.filename,
+        "status": job.status,
+        "rows_processed": job.rows_processed,
+        "successful": job.successful,
+        "failed": job.failed,
+        "duplicates": job.duplicates or 0,
+        "errors": json.loads(job.errors) if job.errors else None,
+        "error": job.error,
+        "rows_per_second": rows_per_second,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at
+    }
@@ -0,0 +1,199 @@
+from typing import Dict, Hashable, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+from functools import lru_cache
+import re
+
+def _trie_pattern(node: dict) -> Optional[str]:
+    """Render a keyword trie as a regex that matches the longest keyword at a position"""
+    terminal = "" in node
+    alternatives = []
+    for char in sorted(k for k in node if k):
+        alternatives.append(re.escape(char) + (_trie_pattern(node[char]) or ""))
+
+    if not alternatives:
+        return None
+    if len(alternatives) == 1 and not terminal:
+        return alternatives[0]
+
+    group = "(?:" + "|".join(alternatives) + ")"
+    # Greedy optional group: try the longer keywords before stopping here
+    return group + "?" if terminal else group
+
+class KeywordMatcher:
+    """
+    Compiled multi-keyword matcher shared by the categorization code paths.
+
+    Rules are given as (key, keywords) pairs in priority order. All keywords are
+    compiled into one trie-shaped regular expression which is scanned once per
+    description. The result is the key of the first rule (in priority order)
+    with a keyword contained in the description - the same answer as the nested
+    "for rule: for keyword: if keyword in text" loops.
+
+    With anchored=True keywords only match at the start of the description.
+    """
+
+    def __init__(self, rules: Iterable[Tuple[Hashable, Iterable[str]]], anchored: bool = False):
+        self.keys: List[Hashable] = []
+        # Keyword -> priorities of every rule that lists it
+        priorities: Dict[str, set] = {}
+
+        for priority, (key, keywords) in enumerate(rules):
+            self.keys.append(key)
+            for keyword in keywords:
+                keyword = keyword.lower()
+                if keyword:
+                    priorities.setdefault(keyword, set()).add(priority)
+
+        trie: dict = {}
+        for keyword in priorities:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[""] = True
+
+        # The scan reports the longest keyword starting at each position, so the
+        # other keywords matching there are exactly its prefixes that are keywords
+        self.matched_priorities: Dict[str, Tuple[int, ...]] = {}
+        for keyword in priorities:
+            found = set()
+            for i in range(1, len(keyword) + 1):
+                found.update(priorities.get(keyword[:i], ()))
+            self.matched_priorities[keyword] = tuple(sorted(found))
+        self.best_priority = {k: p[0] for k, p in self.matched_priorities.items()}
+
+        # The lookahead makes the scan visit every position, so overlapping keywords are seen
+        body = _trie_pattern(trie)
+        if body:
+            self.pattern = re.compile(("^" if anchored else "") + "(?=(" + body + "))")
+        else:
+            self.pattern = None
+
+    def match(self, text: Optional[str]) -> Optional[Hashable]:
+        """Return the key of the highest priority rule matching the text"""
+        if not text or self.pattern is None:
+            return None
+
+        found = self.pattern.findall(text.lower())
+        if not found:
+            return None
+
+        return self.keys[min(map(self.best_priority.__getitem__, found))]
+
+    def match_all(self, text: Optional[str]) -> List[Hashable]:
+        """Return the keys of every rule matching the text, in priority order"""
+        if not text or self.pattern is None:
+            return []
+
+        priorities = set()
+        for keyword in self.pattern.findall(text.lower()):
+            priorities.update(self.matched_priorities[keyword])
+        return [self.keys[priority] for priority in sorted(priorities)]
+
+# Match types supported by RuleMatcher
+MATCH_TYPES = ("substring", "prefix", "regex")
+
+class MatchRule(NamedTuple):
+    """One categorization rule; amounts are compared with the absolute transaction amount"""
+    key: Hashable
+    pattern: str
+    match_type: str = "substring"
+    min_amount: Optional[float] = None
+    max_amount: Optional[float] = None
+
+    @property
+    def amount_bound(self) -> bool:
+        return self.min_amount is not None or self.max_amount is not None
+
+class RuleMatcher:
+    """
+    Matcher for rules with a match type and an optional amount range.
+
+    Rules are given in priority order and the first matching rule wins. Substring
+    and prefix rules are compiled into one KeywordMatcher each (scanned once per
+    description); regex rules are compiled individually and only tried while they
+    can still beat the best keyword match. A rule with an amount range only
+    matches when an amount is given and lies inside the range (inclusive).
+    """
+
+    def __init__(self, rules: Iterable[MatchRule]):
+        self.rules: List[MatchRule] = list(rules)
+
+        substring, prefix = [], []
+        self.regexes: List[Tuple[int, "re.Pattern"]] = []
+        for index, rule in enumerate(self.rules):
+            if rule.match_type == "substring":
+                substring.append((index, [rule.pattern]))
+            elif rule.match_type == "prefix":
+                prefix.append((index, [rule.pattern]))
+            elif rule.match_type == "regex":
+                self.regexes.append((index, re.compile(rule.pattern, re.IGNORECASE)))
+            else:
+                raise ValueError(f"Invalid match type: {rule.match_type}")
+
+        # Keys of the keyword matchers are rule indexes, so their order is the rule order
+        self.substring = KeywordMatcher(substring)
+        self.prefix = KeywordMatcher(prefix, anchored=True)
+
+        # Without amount ranges the best keyword match is enough, no need for all of them
+        self.amount_sensitive = any(rule.amount_bound for rule in self.rules)
+
+    def _amount_ok(self, index: int, amount: Optional[float]) -> bool:
+        rule = self.rules[index]
+        if not rule.amount_bound:
+            return True
+        if amount is None:
+            return False
+        amount = abs(amount)
+        if rule.min_amount is not None and amount < rule.min_amount:
+            return False
+        return rule.max_amount is None or amount <= rule.max_amount
+
+    def _best_keyword(self, matcher: KeywordMatcher, text: str, amount: Optional[float]) -> Optional[int]:
+        if not self.amount_sensitive:
+            return matcher.match(text)
+        return next((index for index in matcher.match_all(text) if self._amount_ok(index, amount)), None)
+
+    def match(self, text: Optional[str], amount: Optional[float] = None) -> Optional[Hashable]:
+        """Return the key of the first rule matching the text and amount"""
+        rule = self.match_rule(text, amount)
+        return rule.key if rule is not None else None
+
+    def match_rule(self, text: Optional[str], amount: Optional[float] = None) -> Optional[MatchRule]:
+        """Return the first rule matching the text and amount"""
+        if not text:
+            return None
+
+        best = None
+        for matcher in (self.substring, self.prefix):
+            # Prefix rules ignore leading whitespace
+            index = self._best_keyword(matcher, text if matcher is self.substring else text.lstrip(), amount)
+            if index is not None and (best is None or index < best):
+                best = index
+
+        for index, regex in self.regexes:
+            if best is not None and index > best:
+                break
+            if regex.search(text) and self._amount_ok(index, amount):
+                best = index
+                break
+
+        return self.rules[best] if best is not None else None
+
+@lru_cache(maxsize=32)
+def _build_matcher(rules: Tuple[Tuple[Hashable, Tuple[str, ...]], ...]) -> KeywordMatcher:
+    return KeywordMatcher(rules)
+
+def get_matcher(rules: Sequence[Tuple[Hashable, Iterable[str]]]) -> KeywordMatcher:
+    """
+    Get a compiled matcher for the given rules.
+    Matchers are cached on the rule contents, so they are only rebuilt when the rules change.
+    """
+    frozen = tuple((key, tuple(keywords)) for key, keywords in rules)
+    return _build_matcher(frozen)
+
+@lru_cache(maxsize=32)
+def _build_rule_matcher(rules: Tuple[MatchRule, ...]) -> RuleMatcher:
+    return RuleMatcher(rules)
+
+def get_rule_matcher(rules: Sequence[MatchRule]) -> RuleMatcher:
+    """Get a compiled RuleMatcher, cached on the rule contents like get_matcher"""
+    return _build_rule_matcher(tuple(MatchRule(*rule) for rule in rules))
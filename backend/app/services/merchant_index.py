@@ -0,0 +1,145 @@
+from typing import Dict, Iterable, Optional, Tuple
+from sqlalchemy import bindparam, update
+from sqlalchemy.orm import Session
+
+from app.models.merchant_category import MerchantCategory
+from app.models.transaction import Transaction
+from app.services.normalization import normalize_merchant
+
+# Keys per IN (...) query, kept well below the SQLite bound parameter limit
+LOOKUP_BATCH_SIZE = 500
+
+class MerchantIndex:
+    """
+    In-memory cache of the learned merchant -> category map for one user, keyed by
+    normalize_merchant so store numbers and locations don't split a merchant.
+
+    Loaded once per import so that history-based categorization is a dict lookup
+    instead of a query per row. New mappings are collected and written back with flush().
+    """
+
+    def __init__(self, db: Session, user_id: Optional[int]):
+        self.db = db
+        self.user_id = user_id
+        self.categories: Dict[str, int] = {}
+        self.pending: Dict[str, int] = {}
+        self._load()
+
+    def _load(self):
+        """Load the user's learned merchants"""
+        rows = self.db.query(MerchantCategory.merchant_key, MerchantCategory.category_id).filter(
+            MerchantCategory.user_id == self.user_id
+        )
+        self.categories = {key: category_id for key, category_id in rows}
+
+    def lookup(self, description: str) -> Optional[int]:
+        """Get the learned category for a description, if any"""
+        return self.categories.get(normalize_merchant(description))
+
+    def learn(self, description: str, category_id: Optional[int]):
+        """Remember the category of a description"""
+        key = normalize_merchant(description)
+        if not key or not category_id or self.categories.get(key) == category_id:
+            return
+        self.categories[key] = category_id
+        self.pending[key] = category_id
+
+    def flush(self):
+        """Write learned mappings to the session (the caller commits)"""
+        if self.pending:
+            _upsert(self.db, self.user_id, self.pending)
+            self.pending = {}
+
+def _upsert(db: Session, user_id: Optional[int], mapping: Dict[str, int]):
+    """Insert or update merchant -> category rows for a user"""
+    keys = list(mapping)
+    for start in range(0, len(keys), LOOKUP_BATCH_SIZE):
+        batch = keys[start:start + LOOKUP_BATCH_SIZE]
+        existing = db.query(MerchantCategory).filter(
+            MerchantCategory.user_id == user_id,
+            MerchantCategory.merchant_key.in_(batch)
+        ).all()
+
+        found = set()
+        for row in existing:
+            row.category_id = mapping[row.merchant_key]
+            found.add(row.merchant_key)
+
+        db.add_all([
+            MerchantCategory(user_id=user_id, merchant_key=key, category_id=mapping[key])
+            for key in batch if key not in found
+        ])
+
+def lookup_merchant_category(db: Session, description: str, user_id: Optional[int]) -> Optional[int]:
+    """Single indexed lookup of the learned category for a description"""
+    row = db.query(MerchantCategory.category_id).filter(
+        MerchantCategory.user_id == user_id,
+        MerchantCategory.merchant_key == normalize_merchant(description)
+    ).first()
+    return row.category_id if row else None
+
+def learn_merchant_categories(db: Session, items: Iterable[Tuple[Optional[int], str, int]]):
+    """
+    Record (user_id, description, category_id) categorizations in the merchant index.
+    Later items win over earlier ones. The caller commits.
+    """
+    by_user: Dict[Optional[int], Dict[str, int]] = {}
+    for user_id, description, category_id in items:
+        key = normalize_merchant(description)
+        if key and category_id:
+            by_user.setdefault(user_id, {})[key] = category_id
+
+    for user_id, mapping in by_user.items():
+        _upsert(db, user_id, mapping)
+
+def rebuild_merchant_index(db: Session, batch_size: int = 10000) -> int:
+    """
+    Rebuild the merchant index from already categorized transactions.
+    The most recent transaction (highest id) for a merchant wins. Returns the number of merchants.
+    """
+    learned: Dict[Tuple[Optional[int], str], int] = {}
+    rows = db.query(
+        Transaction.user_id,
+        Transaction.merchant_key,
+        Transaction.description,
+        Transaction.category_id
+    ).filter(
+        Transaction.category_id.isnot(None)
+    ).order_by(Transaction.id).yield_per(batch_size)
+
+    for user_id, merchant_key, description, category_id in rows:
+        key = merchant_key or normalize_merchant(description)
+        if key:
+            learned[(user_id, key)] = category_id
+
+    db.query(MerchantCategory).delete(synchronize_session=False)
+    db.add_all([
+        MerchantCategory(user_id=user_id, merchant_key=key, category_id=category_id)
+        for (user_id, key), category_id in learned.items()
+    ])
+    db.commit()
+
+    return len(learned)
+
+def backfill_merchant_keys(db: Session, batch_size: int = 10000) -> int:
+    """Compute merchant_key for transactions stored without one. Returns the number of rows updated"""
+    updated = 0
+    last_id = 0
+    while True:
+        rows = db.query(Transaction.id, Transaction.description).filter(
+            Transaction.merchant_key.is_(None),
+            Transaction.id > last_id
+        ).order_by(Transaction.id).limit(batch_size).all()
+        if not rows:
+            break
+
+        db.execute(
+            update(Transaction.__table__)
+            .where(Transaction.__table__.c.id == bindparam("row_id"))
+            .values(merchant_key=bindparam("key")),
+            [{"row_id": row_id, "key": normalize_merchant(description)} for row_id, description in rows]
+        )
+        db.commit()
+        updated += len(rows)
+        last_id = rows[-1].id
+    return updated
@@ -0,0 +1,84 @@
+from functools import lru_cache
+import os
+import re
+
+# Distinct descriptions whose merchant key is memoized
+MERCHANT_CACHE_SIZE = int(os.getenv("MERCHANT_CACHE_SIZE", "65536"))
+
+_WHITESPACE = re.compile(r"\s+")
+
+# Card processor / payment network prefixes written before the merchant name
+_PROCESSOR_PREFIXES = {
+    "sq", "tst", "pp", "paypal", "sp", "py", "ec", "pay", "in", "gglpay", "apl", "applepay", "cko", "bt", "dd", "ic", "wpy", "fs"
+}
+
+# Statement boilerplate before the merchant name
+_LEADING_NOISE = re.compile(
+    r"^(?:(?:pos|debit|credit|card|check ?card|visa|mc|ach|purchase|recurring|"
+    r"authorized on|auth)\b[\s\-:]*)+"
+)
+
+# Dates like 03/14, 03/14/24, 2024-03-14, 14.03.2024
+_DATES = re.compile(r"\b(?:\d{4}-\d{1,2}-\d{1,2}|\d{1,2}[/.-]\d{1,2}(?:[/.-]\d{2,4})?)\b")
+
+# Store/terminal numbers: #1234, no. 1234, store 1234 and any number of 3+ digits
+_STORE_NUMBER = re.compile(r"(?:#\s*|\bno\.?\s*|\bstore\s+)?\b\d{3,}\b|#\s*\d+")
+
+# Trailing US state / country codes
+_LOCATION_CODES = {
+    "al", "ak", "az", "ar", "ca", "co", "ct", "de", "fl", "ga", "hi", "id", "il", "in", "ia", "ks", "ky", "la",
+    "me", "md", "ma", "mi", "mn", "ms", "mo", "mt", "ne", "nv", "nh", "nj", "nm", "ny", "nc", "nd", "oh", "ok",
+    "or", "pa", "ri", "sc", "sd", "tn", "tx", "ut", "vt", "va", "wa", "wv", "wi", "wy", "dc", "us", "usa"
+}
+
+_LEADING_NUMBERS = re.compile(r"^(?:[\s#]*\d{3,}\b)+")
+
+_APOSTROPHES = re.compile(r"['\u2019]")
+
+_NON_WORD = re.compile(r"[^a-z0-9&]+")
+
+def normalize_description(description: str) -> str:
+    """Normalize a transaction description into the key used for history lookups"""
+    if not description:
+        return ""
+    return _WHITESPACE.sub(" ", str(description).strip().lower())
+
+@lru_cache(maxsize=MERCHANT_CACHE_SIZE)
+def normalize_merchant(description: str) -> str:
+    """
+    Canonical merchant key of a bank description, e.g.
+    "SQ *BLUE BOTTLE 8823 SAN FRAN CA" -> "blue bottle".
+
+    Strips statement boilerplate, card processor prefixes, dates, store numbers and
+    the location that follows them. Falls back to normalize_description when nothing
+    would be left. Memoized, since the same strings repeat throughout an import.
+    """
+    text = normalize_description(description)
+    if not text:
+        return ""
+
+    text = _LEADING_NOISE.sub("", text)
+
+    # "SQ *MERCHANT" drops the processor; "MERCHANT*REFERENCE" drops the reference
+    if "*" in text:
+        head, _, tail = text.partition("*")
+        if head.strip() in _PROCESSOR_PREFIXES and tail.strip():
+            text = tail.split("*")[0]
+        elif head.strip():
+            text = head
+
+    text = _APOSTROPHES.sub("", _DATES.sub(" ", text))
+    text = _LEADING_NUMBERS.sub("", text)
+
+    # Whatever follows the first store number is location or reference text
+    number = _STORE_NUMBER.search(text)
+    if number and text[:number.start()].strip():
+        text = text[:number.start()]
+    else:
+        text = _STORE_NUMBER.sub(" ", text)
+
+    words = _NON_WORD.sub(" ", text).split()
+    while len(words) > 1 and words[-1] in _LOCATION_CODES:
+        words.pop()
+
+    return " ".join(words) or normalize_description(description)
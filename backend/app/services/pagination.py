@@ -0,0 +1,21 @@
+from typing import Tuple
+from datetime import date
+import base64
+import json
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+def encode_cursor(transaction_date: date, transaction_id: int) -> str:
+    """Encode the (date, id) position of the last row of a page as an opaque cursor"""
+    payload = json.dumps([transaction_date.isoformat(), transaction_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[date, int]:
+    """Decode a cursor produced by encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        transaction_date, transaction_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return date.fromisoformat(transaction_date), int(transaction_id)
+    except Exception:
+        raise InvalidCursorError("Invalid cursor")
@@ -0,0 +1,194 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from datetime import timedelta
+import os
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models.recurring_series import RecurringSeries
+from app.models.transaction import Transaction
+from app.services.merchant_index import LOOKUP_BATCH_SIZE
+
+# cadence -> (period in days, tolerance in days, minimum number of transactions)
+CADENCES = {
+    "weekly": (7.0, 1.0, 4),
+    "biweekly": (14.0, 2.0, 4),
+    "monthly": (30.44, 4.0, 3),
+    "quarterly": (91.31, 8.0, 3),
+    "annual": (365.25, 15.0, 2)
+}
+
+# Share of the intervals between transactions that must match the cadence
+RECURRING_MIN_REGULARITY = float(os.getenv("RECURRING_MIN_REGULARITY", "0.75"))
+
+# Amounts with a coefficient of variation up to this are considered stable
+RECURRING_AMOUNT_TOLERANCE = float(os.getenv("RECURRING_AMOUNT_TOLERANCE", "0.1"))
+
+# Relative gap between sorted amounts that starts a new amount band
+AMOUNT_BAND_GAP = 0.02
+
+def detect_cadence(days: np.ndarray) -> Optional[Tuple[str, float, float]]:
+    """
+    Cadence of sorted day numbers as (cadence, median interval, regularity),
+    or None when they don't repeat on one of the CADENCES
+    """
+    # Transactions on the same day count once
+    days = np.unique(days)
+    if len(days) < 2:
+        return None
+
+    intervals = np.diff(days)
+    median = float(np.median(intervals))
+    for cadence, (period, tolerance, min_count) in CADENCES.items():
+        if len(days) < min_count or abs(median - period) > tolerance:
+            continue
+        regularity = float(np.mean(np.abs(intervals - period) <= tolerance))
+        if regularity >= RECURRING_MIN_REGULARITY:
+            return cadence, median, regularity
+    return None
+
+def series_stats(days: np.ndarray, amounts: np.ndarray) -> Optional[Dict]:
+    """Cadence and amount statistics of sorted transactions, or None if they don't recur"""
+    cadence = detect_cadence(days)
+    if cadence is None:
+        return None
+
+    mean = float(np.mean(amounts))
+    variation = float(np.std(amounts) / mean) if mean else 0.0
+    stable = bool(variation <= RECURRING_AMOUNT_TOLERANCE)
+    # Two transactions a year apart only count when they are for the same amount
+    if len(days) < 3 and not stable:
+        return None
+
+    return {
+        "cadence": cadence[0],
+        "interval_days": cadence[1],
+        "regularity": cadence[2],
+        "typical_amount": float(np.median(amounts)),
+        "amount_variation": variation,
+        "amount_stable": stable
+    }
+
+def amount_bands(amounts: np.ndarray) -> List[np.ndarray]:
+    """Indices of the amounts, grouped into bands of near-equal values"""
+    order = np.argsort(amounts, kind="stable")
+    ordered = amounts[order]
+    gaps = np.diff(ordered) > AMOUNT_BAND_GAP * np.maximum(ordered[:-1], 0.01)
+    return [np.sort(band) for band in np.split(order, np.flatnonzero(gaps) + 1)]
+
+def detect_series(days: np.ndarray, amounts: np.ndarray) -> List[Tuple[np.ndarray, Dict]]:
+    """
+    Recurring series among one merchant's transactions, sorted by date.
+    Returns (indices, stats) per series.
+
+    The whole history is tried first, so a subscription whose price changed stays
+    one series. Otherwise each band of near-equal amounts is tried on its own,
+    which finds e.g. a monthly membership among a store's other purchases. Bands
+    need at least 3 transactions, two similar purchases are likely a coincidence.
+    """
+    stats = series_stats(days, amounts)
+    if stats is not None:
+        return [(np.arange(len(days)), stats)]
+
+    series = []
+    bands = amount_bands(amounts)
+    if len(bands) > 1:
+        for band in bands:
+            if len(band) < 3:
+                continue
+            stats = series_stats(days[band], amounts[band])
+            if stats is not None:
+                series.append((band, stats))
+    return series
+
+def _detect_rows(user_id: int, rows: List) -> Iterator[Dict]:
+    """Series mappings of transaction rows sorted by (merchant_key, transaction_type, date)"""
+    if not rows:
+        return
+
+    merchant_keys, transaction_types, dates, amounts, category_ids, descriptions = zip(*rows)
+    days = np.array(dates, dtype="datetime64[D]").astype(np.int64)
+    amounts = np.array(amounts, dtype=np.float64)
+
+    # Rows are grouped by merchant and type; split where the group changes
+    _, groups = np.unique([f"{key}\x00{kind}" for key, kind in zip(merchant_keys, transaction_types)], return_inverse=True)
+    starts = np.flatnonzero(np.diff(groups)) + 1
+    for group in np.split(np.arange(len(rows)), starts):
+        for indices, stats in detect_series(days[group], amounts[group]):
+            rows_of_series = group[indices]
+            first, last = int(rows_of_series[0]), int(rows_of_series[-1])
+            yield {
+                "user_id": user_id,
+                "merchant_key": merchant_keys[first],
+                "description": descriptions[last],
+                "transaction_type": transaction_types[first],
+                "category_id": category_ids[last],
+                "transaction_count": len(rows_of_series),
+                "first_date": dates[first],
+                "last_date": dates[last],
+                "next_expected_date": dates[last] + timedelta(days=round(stats["interval_days"])),
+                **stats
+            }
+
+def update_recurring_series(db: Session, user_id: int, merchant_keys: Iterable[str]) -> int:
+    """
+    Re-detect the recurring series of these merchants of a user, from their full
+    history (the caller commits). Returns the number of series found.
+    """
+    # Include the session's pending changes (sessions don't autoflush)
+    db.flush()
+    keys = sorted({key for key in merchant_keys if key})
+    found = 0
+    for start in range(0, len(keys), LOOKUP_BATCH_SIZE):
+        batch = keys[start:start + LOOKUP_BATCH_SIZE]
+        db.query(RecurringSeries).filter(
+            RecurringSeries.user_id == user_id,
+            RecurringSeries.merchant_key.in_(batch)
+        ).delete(synchronize_session=False)
+
+        rows = db.query(
+            Transaction.merchant_key,
+            Transaction.transaction_type,
+            Transaction.date,
+            Transaction.amount,
+            Transaction.category_id,
+            Transaction.description
+        ).filter(
+            Transaction.user_id == user_id,
+            Transaction.merchant_key.in_(batch),
+            Transaction.date.isnot(None),
+            Transaction.amount.isnot(None)
+        ).order_by(
+            Transaction.merchant_key,
+            Transaction.transaction_type,
+            Transaction.date,
+            Transaction.id
+        ).all()
+
+        series = list(_detect_rows(user_id, rows))
+        db.bulk_insert_mappings(RecurringSeries, series)
+        found += len(series)
+    return found
+
+def rebuild_recurring_series(db: Session, user_id: Optional[int] = None) -> int:
+    """
+    Re-detect the recurring series of every merchant, for one user or everyone.
+    Returns the number of series found.
+    """
+    delete_query = db.query(RecurringSeries)
+    if user_id is not None:
+        delete_query = delete_query.filter(RecurringSeries.user_id == user_id)
+    delete_query.delete(synchronize_session=False)
+
+    query = db.query(Transaction.user_id, Transaction.merchant_key).filter(
+        Transaction.user_id.isnot(None),
+        Transaction.merchant_key.isnot(None)
+    )
+    if user_id is not None:
+        query = query.filter(Transaction.user_id == user_id)
+    merchants: Dict[int, List[str]] = {}
+    for owner, merchant_key in query.distinct():
+        merchants.setdefault(owner, []).append(merchant_key)
+
+    found = sum(update_recurring_series(db, owner, keys) for owner, keys in merchants.items())
+    db.commit()
+    return found
@@ -0,0 +1,182 @@
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+import hashlib
+import importlib
+import json
+import os
+import threading
+import uuid
+from fastapi import Request, Response
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.cache import TTLCache
+from app.responses import dumps_json
+
+# "memory" (in-process LRU), "none", or "package.module:factory" returning a CacheBackend
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "300"))
+RESPONSE_CACHE_MAXSIZE = int(os.getenv("RESPONSE_CACHE_MAXSIZE", "2048"))
+
+class CacheBackend:
+    """
+    Store for cached responses and data versions. Keys are strings and values
+    strings or bytes, so a shared cache (e.g. Redis) can implement it directly.
+    A ttl of None means the backend default, float("inf") no expiry.
+    """
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+class MemoryCacheBackend(CacheBackend):
+    """In-process LRU with a time-to-live"""
+
+    def __init__(self, maxsize: int = RESPONSE_CACHE_MAXSIZE, ttl: float = RESPONSE_CACHE_TTL_SECONDS):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, key: str) -> Optional[Any]:
+        return self.cache.get(key)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self.cache.set(key, value, ttl=ttl)
+
+    def stats(self) -> Dict[str, Any]:
+        return self.cache.stats()
+
+class NullCacheBackend(CacheBackend):
+    """Caches nothing; every request is computed"""
+
+    def get(self, key: str) -> Optional[Any]:
+        return None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        pass
+
+def _create_backend(name: str) -> CacheBackend:
+    if name == "memory":
+        return MemoryCacheBackend()
+    if name == "none":
+        return NullCacheBackend()
+    module_name, _, factory = name.partition(":")
+    if not factory:
+        raise ValueError(f"Invalid RESPONSE_CACHE_BACKEND: {name}. Use 'memory', 'none' or 'module:factory'")
+    return getattr(importlib.import_module(module_name), factory)()
+
+_backend: Optional[CacheBackend] = None
+_backend_lock = threading.Lock()
+
+def get_cache_backend() -> CacheBackend:
+    """Get the response cache backend, creating it on first use"""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = _create_backend(RESPONSE_CACHE_BACKEND)
+        return _backend
+
+def set_cache_backend(backend: CacheBackend):
+    """Replace the response cache backend (e.g. with a shared cache at startup)"""
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+# Data versions are random tokens rather than counters: a version evicted from
+# the cache is replaced by a new token, which can only cause misses, never a
+# stale hit. There is a version per user, and a global one for shared data
+# (category names and colors) that every user's responses include.
+_GLOBAL = "global"
+
+def _version_key(scope) -> str:
+    return f"data-version:{scope}"
+
+def data_version(scope) -> str:
+    backend = get_cache_backend()
+    version = backend.get(_version_key(scope))
+    if version is None:
+        version = uuid.uuid4().hex
+        # Versions don't expire on their own, they change on writes
+        backend.set(_version_key(scope), version, ttl=float("inf"))
+    return version
+
+def bump_data_version(user_id: Optional[int] = None):
+    """Invalidate the cached responses of a user, or of everyone when user_id is None"""
+    get_cache_backend().set(_version_key(_GLOBAL if user_id is None else user_id), uuid.uuid4().hex, ttl=float("inf"))
+
+def mark_data_changed(db: Session, user_ids: Iterable[Optional[int]]):
+    """
+    Bump the data version of these users when db commits (None means everyone).
+    Bumping only after the commit keeps a concurrent request from caching the
+    old data under the new version.
+    """
+    db.info.setdefault("changed_users", set()).update(user_ids)
+
+@event.listens_for(Session, "after_commit")
+def _bump_changed_users(session):
+    for user_id in session.info.pop("changed_users", ()):
+        bump_data_version(user_id)
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_changed_users(session, previous_transaction):
+    session.info.pop("changed_users", None)
+
+_counters = {"hits": 0, "misses": 0, "not_modified": 0}
+_counters_lock = threading.Lock()
+
+def _count(name: str):
+    with _counters_lock:
+        _counters[name] += 1
+
+def get_response_cache_stats() -> Dict[str, Any]:
+    """Response cache hits, misses and 304s, with the backend's own counters"""
+    with _counters_lock:
+        counters = dict(_counters)
+    lookups = counters["hits"] + counters["misses"] + counters["not_modified"]
+    counters["hit_rate"] = round((counters["hits"] + counters["not_modified"]) / lookups, 4) if lookups else None
+    return {**counters, "backend": type(get_cache_backend()).__name__, "store": get_cache_backend().stats()}
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+async def cached_json_response(
+    request: Request,
+    user_id: int,
+    name: str,
+    params: Dict[str, Any],
+    compute: Callable[[], Awaitable[Any]]
+) -> Response:
+    """
+    Serve a user's JSON response from the cache, computing it with compute() on a miss.
+
+    Entries are keyed by the endpoint, its query parameters and the current data
+    versions, so writes invalidate them without deleting anything. The ETag is
+    derived from the same key: a matching If-None-Match gets a 304 without
+    touching the database or the cached body.
+    """
+    versions = f"{data_version(_GLOBAL)}:{data_version(user_id)}"
+    key = f"response:{user_id}:{name}:{json.dumps(params, sort_keys=True, default=str)}:{versions}"
+    etag = '"' + hashlib.sha1(key.encode("utf-8")).hexdigest() + '"'
+    # Clients may reuse the response only after checking the ETag
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if _etag_matches(request, etag):
+        _count("not_modified")
+        return Response(status_code=304, headers=headers)
+
+    backend = get_cache_backend()
+    body = backend.get(key)
+    if body is None:
+        _count("misses")
+        # Cache the serialized body, so hits skip the JSON encoding too
+        body = dumps_json(await compute())
+        backend.set(key, body)
+    else:
+        _count("hits")
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,292 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import date, timedelta
+from sqlalchemy import func, extract, and_
+from sqlalchemy.orm import Session
+
+from app.models.category import Category
+from app.models.transaction import Transaction
+from app.models.transaction_rollup import TransactionRollup
+from app.services.response_cache import mark_data_changed
+
+# (user_id, year, month, category_id, transaction_type)
+RollupKey = Tuple[int, int, int, Optional[int], str]
+
+def rollup_deltas(rows: Iterable, sign: int = 1) -> Dict[RollupKey, List[float]]:
+    """
+    Aggregate transaction rows into rollup deltas: key -> [amount, count].
+    Rows are dicts or objects with user_id, date, category_id, transaction_type and amount.
+    Rows without a user are not rolled up (summaries are per user).
+    """
+    deltas: Dict[RollupKey, List[float]] = {}
+    for row in rows:
+        if isinstance(row, dict):
+            user_id, row_date = row["user_id"], row["date"]
+            category_id, transaction_type, amount = row["category_id"], row["transaction_type"], row["amount"]
+        else:
+            user_id, row_date = row.user_id, row.date
+            category_id, transaction_type, amount = row.category_id, row.transaction_type, row.amount
+        if user_id is None or row_date is None:
+            continue
+
+        key = (user_id, row_date.year, row_date.month, category_id, transaction_type)
+        delta = deltas.setdefault(key, [0.0, 0])
+        delta[0] += sign * (amount or 0.0)
+        delta[1] += sign
+    return deltas
+
+def merge_deltas(target: Dict[RollupKey, List[float]], other: Dict[RollupKey, List[float]]):
+    """Add the deltas of other into target"""
+    for key, (amount, count) in other.items():
+        delta = target.setdefault(key, [0.0, 0])
+        delta[0] += amount
+        delta[1] += count
+
+def _key_filter(key: RollupKey):
+    user_id, year, month, category_id, transaction_type = key
+    return and_(
+        TransactionRollup.user_id == user_id,
+        TransactionRollup.year == year,
+        TransactionRollup.month == month,
+        TransactionRollup.category_id.is_(None) if category_id is None else TransactionRollup.category_id == category_id,
+        TransactionRollup.transaction_type == transaction_type
+    )
+
+def apply_rollup_deltas(db: Session, deltas: Dict[RollupKey, List[float]]):
+    """
+    Apply deltas to the rollup table in the caller's transaction (the caller commits).
+    Rollup rows whose count drops to zero are removed.
+    """
+    # Cached summaries of these users are invalidated when the caller commits
+    mark_data_changed(db, {key[0] for key in deltas})
+    for key, (amount, count) in deltas.items():
+        if not count and not amount:
+            continue
+
+        updated = db.query(TransactionRollup).filter(_key_filter(key)).update({
+            TransactionRollup.total_amount: TransactionRollup.total_amount + amount,
+            TransactionRollup.transaction_count: TransactionRollup.transaction_count + count
+        }, synchronize_session=False)
+
+        if not updated:
+            user_id, year, month, category_id, transaction_type = key
+            db.add(TransactionRollup(
+                user_id=user_id,
+                year=year,
+                month=month,
+                category_id=category_id,
+                transaction_type=transaction_type,
+                total_amount=amount,
+                transaction_count=count
+            ))
+        elif count < 0:
+            db.query(TransactionRollup).filter(
+                _key_filter(key),
+                TransactionRollup.transaction_count <= 0
+            ).delete(synchronize_session=False)
+
+    db.flush()
+
+def live_rollup_query(db: Session, user_id: Optional[int] = None):
+    """Aggregate the transactions table into rollup rows"""
+    year = extract('year', Transaction.date)
+    month = extract('month', Transaction.date)
+    query = db.query(
+        Transaction.user_id,
+        year.label('year'),
+        month.label('month'),
+        Transaction.category_id,
+        Transaction.transaction_type,
+        func.sum(Transaction.amount).label('total_amount'),
+        func.count(Transaction.id).label('transaction_count')
+    ).filter(
+        Transaction.user_id.isnot(None),
+        Transaction.date.isnot(None)
+    )
+    if user_id is not None:
+        query = query.filter(Transaction.user_id == user_id)
+    return query.group_by(
+        Transaction.user_id, year, month, Transaction.category_id, Transaction.transaction_type
+    )
+
+def rebuild_rollups(db: Session, user_id: Optional[int] = None) -> int:
+    """
+    Recompute the rollup table from transactions, for one user or everyone.
+    Returns the number of rollup rows written.
+    """
+    delete_query = db.query(TransactionRollup)
+    if user_id is not None:
+        delete_query = delete_query.filter(TransactionRollup.user_id == user_id)
+    delete_query.delete(synchronize_session=False)
+    mark_data_changed(db, [user_id])
+
+    rows = live_rollup_query(db, user_id).all()
+    db.bulk_insert_mappings(TransactionRollup, [
+        {
+            "user_id": row.user_id,
+            "year": int(row.year),
+            "month": int(row.month),
+            "category_id": row.category_id,
+            "transaction_type": row.transaction_type,
+            "total_amount": float(row.total_amount or 0.0),
+            "transaction_count": row.transaction_count
+        }
+        for row in rows
+    ])
+    db.commit()
+    return len(rows)
+
+def compare_rollups(db: Session, user_id: Optional[int] = None, tolerance: float = 1e-6) -> List[str]:
+    """Compare the rollup table with a live aggregate; returns a description of each mismatch"""
+    live = {
+        (row.user_id, int(row.year), int(row.month), row.category_id, row.transaction_type):
+            (float(row.total_amount or 0.0), row.transaction_count)
+        for row in live_rollup_query(db, user_id)
+    }
+
+    query = db.query(
+        TransactionRollup.user_id,
+        TransactionRollup.year,
+        TransactionRollup.month,
+        TransactionRollup.category_id,
+        TransactionRollup.transaction_type,
+        func.sum(TransactionRollup.total_amount).label('total_amount'),
+        func.sum(TransactionRollup.transaction_count).label('transaction_count')
+    )
+    if user_id is not None:
+        query = query.filter(TransactionRollup.user_id == user_id)
+    query = query.group_by(
+        TransactionRollup.user_id,
+        TransactionRollup.year,
+        TransactionRollup.month,
+        TransactionRollup.category_id,
+        TransactionRollup.transaction_type
+    ).having(func.sum(TransactionRollup.transaction_count) != 0)
+    stored = {
+        (row.user_id, row.year, row.month, row.category_id, row.transaction_type):
+            (float(row.total_amount or 0.0), int(row.transaction_count))
+        for row in query
+    }
+
+    mismatches = []
+    for key in sorted(set(live) | set(stored), key=str):
+        expected = live.get(key, (0.0, 0))
+        actual = stored.get(key, (0.0, 0))
+        if expected[1] != actual[1] or abs(expected[0] - actual[0]) > tolerance:
+            mismatches.append(f"{key}: live={expected} rollup={actual}")
+    return mismatches
+
+def _month_start(value: date) -> date:
+    return value.replace(day=1)
+
+def _next_month(value: date) -> date:
+    return (value.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+def monthly_category_totals(
+    db: Session,
+    user_id: int,
+    year: int,
+    month: Optional[int] = None,
+    transaction_type: str = 'debit'
+):
+    """Rows of (month, category_name, total_amount) for a year, from the rollup table"""
+    query = db.query(
+        TransactionRollup.month.label('month'),
+        Category.name.label('category_name'),
+        func.sum(TransactionRollup.total_amount).label('total_amount')
+    ).join(
+        Category,
+        TransactionRollup.category_id == Category.id
+    ).filter(
+        TransactionRollup.user_id == user_id,
+        TransactionRollup.year == year,
+        TransactionRollup.transaction_type == transaction_type
+    )
+    if month:
+        query = query.filter(TransactionRollup.month == month)
+
+    return query.group_by(
+        TransactionRollup.month,
+        Category.name
+    ).having(
+        func.sum(TransactionRollup.transaction_count) > 0
+    ).order_by(
+        TransactionRollup.month,
+        Category.name
+    ).all()
+
+def category_totals(
+    db: Session,
+    user_id: int,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    transaction_type: Optional[str] = None
+) -> Dict[int, List[float]]:
+    """
+    Totals per category as {category_id: [total_amount, transaction_count]}.
+
+    Whole months inside [start, end] come from the rollup table; the partial
+    months at either end of the range are aggregated from transactions, which
+    only touches those days through the (user_id, date, id) index.
+    """
+    totals: Dict[int, List[float]] = {}
+
+    def add(rows):
+        for category_id, total_amount, transaction_count in rows:
+            if category_id is None or not transaction_count:
+                continue
+            total = totals.setdefault(category_id, [0.0, 0])
+            total[0] += float(total_amount or 0.0)
+            total[1] += transaction_count
+
+    # First and last whole months inside the range (None for an open end)
+    first_month = None
+    if start:
+        first_month = start if start.day == 1 else _next_month(start)
+    last_month = None
+    if end:
+        end_month = _month_start(end)
+        last_month = end_month if end + timedelta(days=1) == _next_month(end_month) else _month_start(end_month - timedelta(days=1))
+
+    edges = []
+    if first_month and last_month and first_month > last_month:
+        # No whole month in the range, aggregate it directly
+        edges.append((start, end))
+    else:
+        rollup_query = db.query(
+            TransactionRollup.category_id,
+            func.sum(TransactionRollup.total_amount),
+            func.sum(TransactionRollup.transaction_count)
+        ).filter(
+            TransactionRollup.user_id == user_id
+        )
+        if transaction_type:
+            rollup_query = rollup_query.filter(TransactionRollup.transaction_type == transaction_type)
+
+        period = TransactionRollup.year * 12 + TransactionRollup.month
+        if first_month:
+            rollup_query = rollup_query.filter(period >= first_month.year * 12 + first_month.month)
+        if last_month:
+            rollup_query = rollup_query.filter(period <= last_month.year * 12 + last_month.month)
+        add(rollup_query.group_by(TransactionRollup.category_id).all())
+
+        # Partial months at the edges of the range
+        if start and start < first_month:
+            edges.append((start, first_month - timedelta(days=1)))
+        if end and end >= _next_month(last_month):
+            edges.append((_next_month(last_month), end))
+
+    for edge_start, edge_end in edges:
+        edge_query = db.query(
+            Transaction.category_id,
+            func.sum(Transaction.amount),
+            func.count(Transaction.id)
+        ).filter(
+            Transaction.user_id == user_id,
+            Transaction.date >= edge_start,
+            Transaction.date <= edge_end
+        )
+        if transaction_type:
+            edge_query = edge_query.filter(Transaction.transaction_type == transaction_type)
+        add(edge_query.group_by(Transaction.category_id).all())
+
+    return totals
@@ -0,0 +1,121 @@
+from typing import List, Optional, Tuple
+import re
+from sqlalchemy import column, false, func, inspect, literal_column, or_, select, table, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+
+from app.models.transaction import Transaction
+
+# SQLite: contentless FTS5 table over transactions, kept in sync by triggers.
+# user_key holds "u<user_id>", so a user's search is intersected inside the index
+# instead of matching every user's rows and filtering afterwards.
+SQLITE_SEARCH_TABLE = "transactions_fts"
+SQLITE_SEARCH_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_SEARCH_TABLE} USING fts5(
+        user_key, description, raw_text,
+        content='', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS transactions_fts_insert AFTER INSERT ON transactions BEGIN
+        INSERT INTO {SQLITE_SEARCH_TABLE}(rowid, user_key, description, raw_text)
+        VALUES (new.id, 'u' || new.user_id, new.description, new.raw_text);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS transactions_fts_delete AFTER DELETE ON transactions BEGIN
+        INSERT INTO {SQLITE_SEARCH_TABLE}({SQLITE_SEARCH_TABLE}, rowid, user_key, description, raw_text)
+        VALUES ('delete', old.id, 'u' || old.user_id, old.description, old.raw_text);
+    END""",
+    # Only the indexed columns: category updates don't touch the index
+    f"""CREATE TRIGGER IF NOT EXISTS transactions_fts_update AFTER UPDATE OF user_id, description, raw_text ON transactions BEGIN
+        INSERT INTO {SQLITE_SEARCH_TABLE}({SQLITE_SEARCH_TABLE}, rowid, user_key, description, raw_text)
+        VALUES ('delete', old.id, 'u' || old.user_id, old.description, old.raw_text);
+        INSERT INTO {SQLITE_SEARCH_TABLE}(rowid, user_key, description, raw_text)
+        VALUES (new.id, 'u' || new.user_id, new.description, new.raw_text);
+    END"""
+]
+SQLITE_SEARCH_POPULATE = f"""INSERT INTO {SQLITE_SEARCH_TABLE}(rowid, user_key, description, raw_text)
+    SELECT id, 'u' || user_id, description, raw_text FROM transactions"""
+
+# Postgres: generated tsvector column with a GIN index for word search, and a
+# trigram index so substring matches on descriptions are indexed too
+POSTGRES_SEARCH_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """ALTER TABLE transactions ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (to_tsvector('simple', coalesce(description, '') || ' ' || coalesce(raw_text, ''))) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_transactions_search_vector ON transactions USING gin (search_vector)",
+    "CREATE INDEX IF NOT EXISTS ix_transactions_description_trgm ON transactions USING gin (description gin_trgm_ops)"
+]
+
+# Set by ensure_search_index; without an index searches fall back to LIKE
+_search_index_available = False
+
+def ensure_search_index(engine: Engine) -> bool:
+    """Create the full-text index of the database backend if missing. Returns whether one is available"""
+    global _search_index_available
+    dialect = engine.dialect.name
+    try:
+        if dialect == "sqlite":
+            created = SQLITE_SEARCH_TABLE not in inspect(engine).get_table_names()
+            with engine.begin() as connection:
+                for statement in SQLITE_SEARCH_DDL:
+                    connection.execute(text(statement))
+                indexed = connection.execute(text(SQLITE_SEARCH_POPULATE)).rowcount if created else 0
+            if indexed:
+                print(f"Indexed {indexed} transactions for search")
+        elif dialect == "postgresql":
+            with engine.begin() as connection:
+                for statement in POSTGRES_SEARCH_DDL:
+                    connection.execute(text(statement))
+        else:
+            return False
+    except OperationalError as e:
+        # e.g. SQLite built without FTS5
+        print(f"Full-text search unavailable, falling back to LIKE: {str(e)}")
+        return False
+    _search_index_available = True
+    return True
+
+def search_terms(q: str) -> List[str]:
+    """Words of a search string, lowercased; punctuation and query syntax are dropped"""
+    return re.findall(r"\w+", q.lower())
+
+def _like_pattern(q: str) -> str:
+    escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+def apply_search(query, q: str, user_id: Optional[int], dialect: str) -> Tuple[object, Optional[object]]:
+    """
+    Restrict a Query or Select over transactions to rows matching q.
+
+    Returns (query, rank): rank is an expression to order by for relevance,
+    best match first in ascending order, or None when there is no index to rank with.
+    Every word of q must match, as a prefix of a word in the description or raw text.
+    """
+    terms = search_terms(q)
+    if not terms:
+        return query.where(false()), None
+
+    if _search_index_available and dialect == "sqlite":
+        fts = table(SQLITE_SEARCH_TABLE, column("rowid"))
+        match = " ".join(f'"{term}"*' for term in terms)
+        if user_id is not None:
+            match = f'user_key:"u{user_id}" AND {{description raw_text}}: ({match})'
+        else:
+            match = f"{{description raw_text}}: ({match})"
+        matches = select(
+            fts.c.rowid.label("id"),
+            # Lower is better; user_key only filters, descriptions weigh more than raw text
+            func.bm25(literal_column(SQLITE_SEARCH_TABLE), 0.0, 1.0, 0.5).label("rank")
+        ).where(literal_column(SQLITE_SEARCH_TABLE).op("MATCH")(match)).subquery()
+        return query.join(matches, matches.c.id == Transaction.id), matches.c.rank
+
+    if _search_index_available and dialect == "postgresql":
+        search_vector = literal_column("transactions.search_vector")
+        tsquery = func.to_tsquery("simple", " & ".join(f"{term}:*" for term in terms))
+        condition = or_(search_vector.op("@@")(tsquery), Transaction.description.ilike(_like_pattern(q.strip()), escape="\\"))
+        rank = func.ts_rank(search_vector, tsquery) + func.similarity(Transaction.description, q.strip())
+        return query.where(condition), -rank
+
+    # No index: substring match on each word
+    for term in terms:
+        pattern = _like_pattern(term)
+        query = query.where(or_(Transaction.description.ilike(pattern, escape="\\"), Transaction.raw_text.ilike(pattern, escape="\\")))
+    return query, None
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+"""
+Benchmark the hashed n-gram classifier: training time, holdout accuracy and
+batch prediction latency/throughput over import-sized chunks.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import numpy as np
+
+# Add the backend directory to the path so we can import from app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.categorization import DEFAULT_CATEGORY_RULES
+from app.services.classifier import TextClassifier
+
+WORDS = ["pos", "purchase", "card", "ref", "online", "debit", "ach", "inc", "llc", "co", "nyc", "sf", "ca"]
+
+def build_samples(count, seed):
+    """Descriptions built around a category keyword, labelled with that category"""
+    rng = random.Random(seed)
+    categories = list(DEFAULT_CATEGORY_RULES)
+    descriptions, labels = [], []
+    for _ in range(count):
+        label = rng.randrange(len(categories))
+        parts = [rng.choice(WORDS).upper() for _ in range(rng.randint(1, 4))]
+        parts.insert(rng.randint(0, len(parts)), rng.choice(DEFAULT_CATEGORY_RULES[categories[label]]).upper())
+        parts.append(str(rng.randint(1000, 99999)))
+        descriptions.append(" ".join(parts))
+        labels.append(label)
+    return descriptions, labels
+
+def run(args):
+    train_descriptions, train_labels = build_samples(args.train, seed=1)
+    test_descriptions, test_labels = build_samples(args.rows, seed=2)
+    print(f"{len(DEFAULT_CATEGORY_RULES)} categories, {args.train} training rows, {args.rows} descriptions to predict")
+
+    start = time.perf_counter()
+    model = TextClassifier().fit(train_descriptions, train_labels)
+    train_time = time.perf_counter() - start
+
+    latencies = []
+    predictions = []
+    start = time.perf_counter()
+    for chunk_start in range(0, len(test_descriptions), args.chunk_rows):
+        chunk_time = time.perf_counter()
+        predictions.extend(model.predict(test_descriptions[chunk_start:chunk_start + args.chunk_rows], min_confidence=0.0))
+        latencies.append(time.perf_counter() - chunk_time)
+    predict_time = time.perf_counter() - start
+
+    accuracy = np.mean(np.asarray(predictions) == np.asarray(test_labels))
+    latencies_ms = np.asarray(latencies) * 1000
+
+    print(f"training:        {train_time:.3f} s")
+    print(f"batch predict:   {predict_time:.3f} s ({len(test_descriptions) / predict_time:,.0f} rows/s)")
+    print(f"chunk latency:   p50 {np.percentile(latencies_ms, 50):.1f} ms, p99 {np.percentile(latencies_ms, 99):.1f} ms ({args.chunk_rows} rows)")
+    print(f"accuracy:        {accuracy:.4f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the transaction classifier")
+    parser.add_argument("--rows", type=int, default=100000, help="Number of descriptions to predict")
+    parser.add_argument("--train", type=int, default=20000, help="Number of training descriptions")
+    parser.add_argument("--chunk-rows", type=int, default=10000, help="Descriptions per predict call, like one import chunk")
+
+    args = parser.parse_args()
+    run(args)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+"""
+Benchmark a transaction list page: the ORM objects + response model path that
+get_transactions used against the plain row + FastJSONResponse path it uses now.
+Runs against a temporary SQLite database.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from datetime import date, timedelta
+from typing import List
+
+# Use a scratch database; must be set before app.database is imported
+_tmpdir = tempfile.mkdtemp(prefix="bench_list_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmpdir, 'bench.db')}"
+
+# Add the backend directory to the path so we can import from app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.database import Base, SessionLocal, engine
+import app.models
+from app.models.transaction import Transaction
+from app.responses import FastJSONResponse, orjson
+from app.routers.transactions import TRANSACTION_FIELDS
+from app.schemas.transaction import Transaction as TransactionSchema
+from app.services.bulk_writes import bulk_insert_transactions
+
+USER_ID = 1
+
+def populate(rows):
+    rng = random.Random(3)
+    records = [{
+        "user_id": USER_ID,
+        "date": date(2020, 1, 1) + timedelta(days=rng.randint(0, 1800)),
+        "description": f"POS PURCHASE MERCHANT {rng.randint(1, 500)} #{rng.randint(1000, 99999)}",
+        "amount": round(rng.uniform(1, 500), 2),
+        "transaction_type": rng.choice(["debit", "credit"]),
+        "raw_text": rng.choice([None, "card ending 1234"]),
+        "category_id": rng.choice([None, 1, 2, 3]),
+        "merchant_key": f"merchant {rng.randint(1, 500)}",
+        "fingerprint": f"bench-{i}"
+    } for i in range(rows)]
+    db = SessionLocal()
+    try:
+        bulk_insert_transactions(db, records)
+    finally:
+        db.close()
+
+def page_query(db, columns, limit, offset):
+    return db.query(*columns).filter(Transaction.user_id == USER_ID).order_by(
+        Transaction.date.desc(), Transaction.id.desc()
+    ).offset(offset).limit(limit)
+
+adapter = TypeAdapter(List[TransactionSchema])
+
+def orm_page(db, limit, offset) -> bytes:
+    """ORM objects, validated and dumped through the response model, then JSONResponse"""
+    transactions = page_query(db, [Transaction], limit, offset).all()
+    content = adapter.dump_python(adapter.validate_python(transactions, from_attributes=True), mode="json")
+    return JSONResponse(content).body
+
+def lean_page(db, limit, offset) -> bytes:
+    """Rows of the schema's columns, encoded directly"""
+    rows = page_query(db, [getattr(Transaction, f) for f in TRANSACTION_FIELDS], limit, offset).all()
+    return FastJSONResponse([dict(zip(TRANSACTION_FIELDS, row)) for row in rows]).body
+
+def time_pages(fn, limit, pages):
+    db = SessionLocal()
+    try:
+        fn(db, limit, 0)  # warm up statement caches
+        timings = []
+        for page in range(pages):
+            # A fresh session per page, as in a request
+            db.expunge_all()
+            start = time.perf_counter()
+            fn(db, limit, page * limit)
+            timings.append(time.perf_counter() - start)
+        return timings
+    finally:
+        db.close()
+
+def run(args):
+    Base.metadata.create_all(bind=engine)
+    populate(args.rows)
+    print(f"{args.rows} transactions, {args.pages} pages of {args.limit}, encoder: {'orjson' if orjson else 'json'}")
+
+    db = SessionLocal()
+    try:
+        mismatches = sum(
+            1 for page in range(args.pages)
+            if orm_page(db, args.limit, page * args.limit) != lean_page(db, args.limit, page * args.limit)
+        )
+    finally:
+        db.close()
+
+    orm_times = time_pages(orm_page, args.limit, args.pages)
+    lean_times = time_pages(lean_page, args.limit, args.pages)
+    orm_ms = sum(orm_times) / len(orm_times) * 1000
+    lean_ms = sum(lean_times) / len(lean_times) * 1000
+
+    print(f"ORM + response model: {orm_ms:.2f} ms/page")
+    print(f"rows + fast JSON:     {lean_ms:.2f} ms/page")
+    print(f"speedup:              {orm_ms / lean_ms:.1f}x")
+    print(f"differing pages:      {mismatches}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark transaction list serialization")
+    parser.add_argument("--rows", type=int, default=50000, help="Transactions in the benchmark database")
+    parser.add_argument("--limit", type=int, default=1000, help="Transactions per page")
+    parser.add_argument("--pages", type=int, default=20, help="Pages timed per path")
+
+    args = parser.parse_args()
+    run(args)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""
+Benchmark the compiled keyword matcher against the nested keyword loops
+it replaced in auto_categorize_transaction and CategorizationService.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+# Add the backend directory to the path so we can import from app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.categorization import DEFAULT_CATEGORY_RULES
+from app.services.matcher import KeywordMatcher
+
+WORDS = ["pos", "purchase", "card", "ref", "online", "debit", "ach", "inc", "llc", "store", "co", "nyc", "sf", "ca"]
+
+def loop_match(rules, description):
+    """The original nested loop matcher"""
+    description = description.lower()
+    for key, keywords in rules.items():
+        for keyword in keywords:
+            if keyword in description:
+                return key
+    return None
+
+def loop_match_all(rules, description):
+    """Every rule matched by the nested loops, in priority order"""
+    description = description.lower()
+    return [key for key, keywords in rules.items() if any(k in description for k in keywords)]
+
+def build_rules(extra_rules):
+    """DEFAULT_CATEGORY_RULES plus synthetic rules to reach a realistic rule count"""
+    rules = dict(DEFAULT_CATEGORY_RULES)
+    rng = random.Random(7)
+    for i in range(extra_rules):
+        rules[f"Custom {i}"] = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(8)) for _ in range(5)]
+    return rules
+
+def build_descriptions(rules, count, hit_rate):
+    """Generate descriptions where roughly hit_rate of them contain a keyword"""
+    rng = random.Random(42)
+    keywords = [k for kws in rules.values() for k in kws]
+    descriptions = []
+    for _ in range(count):
+        parts = [rng.choice(WORDS).upper() for _ in range(rng.randint(2, 5))]
+        if rng.random() < hit_rate:
+            parts.insert(rng.randint(0, len(parts)), rng.choice(keywords).upper())
+        parts.append(str(rng.randint(1000, 99999)))
+        descriptions.append(" ".join(parts))
+    return descriptions
+
+def run(args):
+    rules = build_rules(args.extra_rules)
+    descriptions = build_descriptions(rules, args.rows, args.hit_rate)
+    keyword_count = sum(len(k) for k in rules.values())
+    print(f"{len(rules)} rules, {keyword_count} keywords, {len(descriptions)} descriptions")
+
+    start = time.perf_counter()
+    matcher = KeywordMatcher(rules.items())
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected = [loop_match(rules, d) for d in descriptions]
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = [matcher.match(d) for d in descriptions]
+    matcher_time = time.perf_counter() - start
+
+    mismatches = sum(1 for e, a in zip(expected, actual) if e != a)
+    mismatches += sum(1 for d in descriptions if matcher.match_all(d) != loop_match_all(rules, d))
+
+    print(f"matcher build:   {build_time * 1000:.2f} ms")
+    print(f"nested loops:    {loop_time:.3f} s ({len(descriptions) / loop_time:,.0f} rows/s)")
+    print(f"compiled trie:   {matcher_time:.3f} s ({len(descriptions) / matcher_time:,.0f} rows/s)")
+    print(f"speedup:         {loop_time / matcher_time:.1f}x")
+    print(f"mismatches:      {mismatches}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark keyword matching")
+    parser.add_argument("--rows", type=int, default=100000, help="Number of descriptions to categorize")
+    parser.add_argument("--extra-rules", type=int, default=200, help="Synthetic rules added on top of DEFAULT_CATEGORY_RULES")
+    parser.add_argument("--hit-rate", type=float, default=0.7, help="Fraction of descriptions containing a keyword")
+
+    args = parser.parse_args()
+    run(args)
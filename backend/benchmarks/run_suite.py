@@ -0,0 +1,374 @@
+#!/usr/bin/env python
+"""
+Benchmark suite for the main import, categorization and read paths, run in-process
+against a scratch SQLite database filled with synthetic statements (see synthetic.py).
+
+Cases, in order (later cases use the data the upload wrote):
+  upload_csv                    POST /api/transactions/upload-csv, one request per statement
+  auto_categorize_transaction   one call per description, with the import's merchant index
+  categorize_all_uncategorized  CategorizationService over all of the user's transactions
+  get_transactions              GET /api/transactions at increasing skip offsets
+  summary_monthly               GET /api/transactions/summary/monthly
+  summary_by_category           GET /api/transactions/summary/by-category, all time and a date range
+
+Each case runs in its own process, so the reported peak RSS is that case's.
+Summaries are measured with the response cache off. Results are saved as JSON;
+--compare reports the p50 change of every case against an earlier run.
+"""
+import os
+import sys
+import json
+import time
+import glob
+import shutil
+import sqlite3
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Add the backend directory to the path so we can import from app
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import write_statements
+
+CASES = [
+    "upload_csv",
+    "auto_categorize_transaction",
+    "categorize_all_uncategorized",
+    "get_transactions",
+    "summary_monthly",
+    "summary_by_category"
+]
+
+USERNAME = "bench"
+PASSWORD = "bench-password"
+
+# Depths of the get_transactions pages, as a fraction of the user's transactions
+OFFSET_FRACTIONS = [0.0, 0.5, 0.9, 0.99]
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident memory of this process so far"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def summarize(name: str, latencies: List[float], rows: Optional[int] = None, **extra) -> Dict:
+    """Throughput and latency percentiles of a case's timed runs"""
+    latencies_ms = np.asarray(latencies) * 1000
+    total = float(sum(latencies))
+    return {
+        "name": name,
+        "runs": len(latencies),
+        "rows": rows,
+        "total_seconds": round(total, 4),
+        "rows_per_second": round(rows / total, 1) if rows and total else None,
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 4),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 4),
+        "mean_ms": round(float(latencies_ms.mean()), 4),
+        "max_ms": round(float(latencies_ms.max()), 4),
+        **extra
+    }
+
+# Cases. Each runs in a child process with the app imported against the scratch
+# database and returns its results.
+
+def _login(client) -> Dict[str, str]:
+    client.post("/api/auth/signup", json={"username": USERNAME, "password": PASSWORD})
+    response = client.post("/api/auth/token", data={"username": USERNAME, "password": PASSWORD})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def _user_id(db) -> int:
+    from app.models.user import User
+    return db.query(User.id).filter(User.username == USERNAME).scalar()
+
+def _timed_requests(client, url: str, headers: Dict[str, str], repeat: int) -> List[float]:
+    # One untimed request first, so every timed one hits warm statement caches
+    client.get(url, headers=headers).raise_for_status()
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(url, headers=headers)
+        latencies.append(time.perf_counter() - start)
+        response.raise_for_status()
+    return latencies
+
+def case_upload_csv(client, headers, args, workdir) -> List[Dict]:
+    paths = sorted(glob.glob(os.path.join(workdir, "statements", "*.csv")))
+    latencies = []
+    rows = 0
+    for path in paths:
+        with open(path, "rb") as source:
+            body = source.read()
+        start = time.perf_counter()
+        response = client.post(
+            "/api/transactions/upload-csv",
+            files={"file": (os.path.basename(path), body, "text/csv")},
+            headers=headers
+        )
+        latencies.append(time.perf_counter() - start)
+        response.raise_for_status()
+        rows += response.json()["successful"]
+    return [summarize("upload_csv", latencies, rows, statements=len(paths))]
+
+def case_auto_categorize_transaction(client, headers, args, workdir) -> List[Dict]:
+    from app.database import SessionLocal
+    from app.services.categorization import auto_categorize_transaction, get_rule_registry
+    from app.services.merchant_index import MerchantIndex
+
+    statement = sorted(glob.glob(os.path.join(workdir, "statements", "*.csv")))[-1]
+    sample = pd.read_csv(statement).sample(n=args.sample, replace=True, random_state=args.seed)
+    db = SessionLocal()
+    try:
+        get_rule_registry(db)
+        merchant_index = MerchantIndex(db, _user_id(db))
+        latencies = []
+        for description, amount in zip(sample["Description"].tolist(), sample["Amount"].abs().tolist()):
+            start = time.perf_counter()
+            auto_categorize_transaction(db, description, merchant_index, amount=amount)
+            latencies.append(time.perf_counter() - start)
+    finally:
+        db.close()
+    return [summarize("auto_categorize_transaction", latencies, len(latencies))]
+
+def case_categorize_all_uncategorized(client, headers, args, workdir) -> List[Dict]:
+    from app.database import SessionLocal
+    from app.models.transaction import Transaction
+    from app.services.categorization import CategorizationService
+    from app.services.classifier import ClassifierTrainingError, train_user_model
+    from app.services.rollups import rebuild_rollups
+
+    db = SessionLocal()
+    try:
+        user_id = _user_id(db)
+        # Train the classifier fallback on the imported categories, then
+        # uncategorize everything, as after a change of the rules
+        try:
+            train_user_model(db, user_id)
+        except ClassifierTrainingError as e:
+            print(f"Classifier not trained: {str(e)}")
+        db.query(Transaction).filter(Transaction.user_id == user_id).update(
+            {Transaction.category_id: None}, synchronize_session=False
+        )
+        db.commit()
+        rebuild_rollups(db, user_id)
+
+        start = time.perf_counter()
+        result = CategorizationService(db).categorize_all_uncategorized(user_id=user_id)
+        latency = time.perf_counter() - start
+    finally:
+        db.close()
+    return [summarize("categorize_all_uncategorized", [latency], result["total_uncategorized"], categorized=result["categorized"])]
+
+def case_get_transactions(client, headers, args, workdir) -> List[Dict]:
+    from app.database import SessionLocal
+    from app.models.transaction import Transaction
+
+    db = SessionLocal()
+    try:
+        total = db.query(Transaction.id).filter(Transaction.user_id == _user_id(db)).count()
+    finally:
+        db.close()
+
+    results = []
+    for fraction in OFFSET_FRACTIONS:
+        skip = max(0, min(int(total * fraction), total - args.page_size))
+        latencies = _timed_requests(client, f"/api/transactions/?skip={skip}&limit={args.page_size}", headers, args.repeat)
+        results.append(summarize(f"get_transactions[skip={skip}]", latencies, args.page_size * len(latencies)))
+    return results
+
+def _date_range(workdir):
+    from sqlalchemy import func
+    from app.database import SessionLocal
+    from app.models.transaction import Transaction
+
+    db = SessionLocal()
+    try:
+        return db.query(func.min(Transaction.date), func.max(Transaction.date)).filter(
+            Transaction.user_id == _user_id(db)
+        ).one()
+    finally:
+        db.close()
+
+def case_summary_monthly(client, headers, args, workdir) -> List[Dict]:
+    _, last = _date_range(workdir)
+    latencies = _timed_requests(client, f"/api/transactions/summary/monthly?year={last.year}", headers, args.repeat)
+    return [summarize("summary_monthly", latencies)]
+
+def case_summary_by_category(client, headers, args, workdir) -> List[Dict]:
+    first, last = _date_range(workdir)
+    # Mid-month edges, so partial months are aggregated from transactions
+    start = max(first, last - timedelta(days=365)).replace(day=15)
+    url = "/api/transactions/summary/by-category"
+    return [
+        summarize("summary_by_category", _timed_requests(client, url, headers, args.repeat)),
+        summarize("summary_by_category[range]", _timed_requests(client, f"{url}?start_date={start}&end_date={last.replace(day=10)}", headers, args.repeat))
+    ]
+
+def run_case(args):
+    """Child process: run one case and write its results to args.result"""
+    workdir = args.workdir
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["RESPONSE_CACHE_BACKEND"] = "none"
+    os.environ.setdefault("IMPORT_JOBS_DIR", os.path.join(workdir, "import_jobs"))
+    os.environ.setdefault("CLASSIFIER_MODELS_DIR", os.path.join(workdir, "classifier_models"))
+
+    from fastapi.testclient import TestClient
+    import main
+
+    with TestClient(main.app) as client:
+        headers = _login(client)
+        setup_rss = peak_rss_mb()
+        results = globals()[f"case_{args.child}"](client, headers, args, workdir)
+
+    for result in results:
+        result["setup_rss_mb"] = setup_rss
+        result["peak_rss_mb"] = peak_rss_mb()
+    with open(args.result, "w") as output:
+        json.dump(results, output)
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _format(value, spec: str) -> str:
+    return "-" if value is None else format(value, spec)
+
+def print_result(result: Dict):
+    print(
+        f"{result['name']:<42} {result['runs']:>6} {_format(result['rows_per_second'], ',.0f'):>12} "
+        f"{result['p50_ms']:>11.3f} {result['p99_ms']:>11.3f} {_format(result['peak_rss_mb'], '.1f'):>10}"
+    )
+
+def compare(results: List[Dict], baseline_path: str, rows: int, max_regression: Optional[float]) -> int:
+    """Print the p50 change of each case against a baseline run; returns the number of regressions"""
+    with open(baseline_path) as source:
+        baseline = json.load(source)
+    if baseline["meta"]["args"].get("rows") != rows:
+        print("Warning: the baseline was run with a different --rows")
+    previous = {result["name"]: result for result in baseline["results"]}
+
+    print(f"\nCompared with {baseline_path} ({baseline['meta'].get('git_commit') or 'unknown commit'}):")
+    regressions = 0
+    for result in results:
+        old = previous.get(result["name"])
+        if old is None:
+            continue
+        change = result["p50_ms"] / old["p50_ms"] - 1 if old["p50_ms"] else 0.0
+        flag = ""
+        if max_regression is not None and change > max_regression:
+            regressions += 1
+            flag = "  REGRESSION"
+        print(f"{result['name']:<42} p50 {old['p50_ms']:>11.3f} -> {result['p50_ms']:>11.3f} ms ({change:+.1%}){flag}")
+    return regressions
+
+def run(args):
+    cases = args.cases.split(",") if args.cases else CASES
+    unknown = [case for case in cases if case not in CASES]
+    if unknown:
+        sys.exit(f"Unknown cases: {', '.join(unknown)}. Available: {', '.join(CASES)}")
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="bench_suite_")
+    statements_dir = os.path.join(workdir, "statements")
+    if "upload_csv" in cases:
+        # A fresh database and fresh statements
+        for name in ("bench.db", "bench.db-wal", "bench.db-shm"):
+            if os.path.exists(os.path.join(workdir, name)):
+                os.remove(os.path.join(workdir, name))
+        shutil.rmtree(statements_dir, ignore_errors=True)
+        start = time.perf_counter()
+        paths = write_statements(statements_dir, args.rows, statement_rows=args.statement_rows, merchants=args.merchants, seed=args.seed)
+        print(f"Generated {args.rows} transactions in {len(paths)} statements in {time.perf_counter() - start:.1f} s ({workdir})")
+    elif not os.path.exists(os.path.join(workdir, "bench.db")):
+        sys.exit("Without upload_csv, --workdir must point at the directory of an earlier run")
+
+    print(f"\n{'case':<42} {'runs':>6} {'rows/s':>12} {'p50 ms':>11} {'p99 ms':>11} {'peak MB':>10}")
+    results = []
+    for case in CASES:
+        if case not in cases:
+            continue
+        result_path = os.path.join(workdir, f"result_{case}.json")
+        log_path = os.path.join(workdir, f"{case}.log")
+        with open(log_path, "w") as log:
+            completed = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), *sys.argv[1:], "--workdir", workdir, "--child", case, "--result", result_path],
+                stdout=log,
+                stderr=subprocess.STDOUT,
+                cwd=workdir
+            )
+        if completed.returncode != 0:
+            with open(log_path) as log:
+                print(log.read()[-4000:])
+            sys.exit(f"Case {case} failed, see {log_path}")
+        with open(result_path) as source:
+            for result in json.load(source):
+                print_result(result)
+                results.append(result)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sqlite": sqlite3.sqlite_version,
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "args": {key: value for key, value in vars(args).items() if key not in ("child", "result", "compare", "output")}
+        },
+        "results": results
+    }
+    output = args.output or os.path.join(
+        BACKEND_DIR, "benchmarks", "results", f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{args.rows}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as target:
+        json.dump(report, target, indent=2)
+    print(f"\nSaved results to {output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.rows, args.max_regression)
+        if regressions:
+            sys.exit(f"{regressions} cases regressed by more than {args.max_regression:.0%}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark import, categorization and summaries against SQLite")
+    parser.add_argument("--rows", type=int, default=100000, help="Synthetic transactions to import (10k-5M)")
+    parser.add_argument("--statement-rows", type=int, default=10000, help="Transactions per uploaded statement")
+    parser.add_argument("--merchants", type=int, default=2000, help="Distinct merchants in the statements")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the synthetic data")
+    parser.add_argument("--sample", type=int, default=20000, help="Descriptions categorized by auto_categorize_transaction")
+    parser.add_argument("--page-size", type=int, default=100, help="Transactions per get_transactions page")
+    parser.add_argument("--repeat", type=int, default=50, help="Timed requests per read case")
+    parser.add_argument("--cases", help=f"Comma separated cases to run (default all): {', '.join(CASES)}")
+    parser.add_argument("--workdir", help="Directory for the database and statements; reuse one to rerun read cases without upload_csv")
+    parser.add_argument("--output", help="Results file (default benchmarks/results/<time>-<rows>.json)")
+    parser.add_argument("--compare", help="Results file of an earlier run to compare with")
+    parser.add_argument("--max-regression", type=float, help="With --compare, fail when a case's p50 grows by more than this fraction")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+    if args.child:
+        run_case(args)
+    else:
+        run(args)
@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+"""
+Synthetic bank statements for benchmarks: a Zipf-distributed mix of well-known
+and long-tail merchants, decorated the way card processors write them, with
+monthly subscriptions, bills and a biweekly salary on top.
+Deterministic for a given seed.
+"""
+import os
+import argparse
+from datetime import date, timedelta
+from typing import Iterator, List, Tuple
+import numpy as np
+import pandas as pd
+
+# (merchant, median amount) of merchants people shop at most, roughly by category
+KNOWN_MERCHANTS = [
+    ("WHOLE FOODS MARKET", 68.0), ("TRADER JOE'S", 45.0), ("SAFEWAY", 52.0), ("KROGER", 58.0),
+    ("ALDI", 38.0), ("WALMART SUPERCENTER", 64.0), ("TARGET", 41.0), ("COSTCO WHSE", 142.0),
+    ("STARBUCKS", 6.5), ("MCDONALD'S", 9.8), ("CHIPOTLE", 13.2), ("BLUE BOTTLE COFFEE", 5.9),
+    ("DOMINO'S PIZZA", 24.0), ("TACO BELL", 11.0), ("SUSHI ZONE", 38.0), ("PANERA BREAD", 14.5),
+    ("UBER TRIP", 18.0), ("LYFT RIDE", 16.0), ("SHELL OIL", 44.0), ("CHEVRON", 47.0),
+    ("CITY PARKING", 12.0), ("METRO TRANSIT", 2.75), ("AMAZON MKTPLACE PMTS", 32.0), ("AMAZON.COM", 27.0),
+    ("BEST BUY", 119.0), ("HOME DEPOT", 76.0), ("IKEA", 134.0), ("CVS PHARMACY", 19.0),
+    ("WALGREENS", 17.0), ("APPLE.COM/BILL", 4.99), ("STEAM GAMES", 19.99), ("AMC THEATRES", 28.0),
+    ("DELTA AIR LINES", 389.0), ("MARRIOTT HOTELS", 212.0), ("AIRBNB", 285.0), ("DOORDASH", 31.0)
+]
+
+# (merchant, amount, day of month, amount spread) charged every month
+MONTHLY_MERCHANTS = [
+    ("NETFLIX.COM", 15.49, 15, 0.0), ("SPOTIFY USA", 11.99, 3, 0.0), ("PLANET FITNESS", 24.99, 17, 0.0),
+    ("RENT PAYMENT PROPERTY MGMT", 1850.0, 1, 0.0), ("CITY POWER & LIGHT", 96.0, 21, 0.25),
+    ("COMCAST CABLE", 89.99, 9, 0.02), ("VERIZON WIRELESS", 72.0, 24, 0.05), ("STATE FARM INSURANCE", 132.0, 5, 0.0)
+]
+
+SALARY = ("ACME CORP PAYROLL DIRECT DEP", 3150.0)
+
+# Words for the long tail of local merchants
+TAIL_WORDS = [
+    "corner", "golden", "river", "main", "oak", "harbor", "sunset", "union", "north", "old", "green", "bay",
+    "deli", "bistro", "salon", "books", "hardware", "florist", "tailor", "bakery", "garage", "studio", "market", "cleaners"
+]
+
+# Tail merchant names end in a made-up word; numbers would be stripped as store numbers
+CONSONANTS = "bcdfghjklmnprstvwxz"
+VOWELS = "aeiou"
+SYLLABLES = [consonant + vowel for consonant in CONSONANTS for vowel in VOWELS]
+
+CITIES = [("SAN FRANCISCO", "CA"), ("NEW YORK", "NY"), ("AUSTIN", "TX"), ("SEATTLE", "WA"), ("CHICAGO", "IL"), ("DENVER", "CO")]
+
+# How statements write a merchant; {m} merchant, {n} store number, {c}/{s} city/state, {d} MM/DD
+DECORATIONS = [
+    "{m}", "{m} #{n}", "POS PURCHASE {m} #{n} {c} {s}", "SQ *{m} {c} {s}", "TST* {m} {n}",
+    "DEBIT CARD {m} {d}", "{m} {n} {c} {s}", "PAYPAL *{m}", "RECURRING {m}"
+]
+
+def _made_up_word(i: int) -> str:
+    """A distinct pronounceable word for each i"""
+    word = ""
+    while True:
+        i, syllable = divmod(i, len(SYLLABLES))
+        word += SYLLABLES[syllable]
+        if not i and len(word) >= 4:
+            return word + "n"
+
+def build_merchants(count: int, seed: int) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """Merchant names, median amounts and Zipf shopping probabilities, most frequent first"""
+    rng = np.random.default_rng(seed)
+    names = [name for name, _ in KNOWN_MERCHANTS]
+    medians = [amount for _, amount in KNOWN_MERCHANTS]
+    for i in range(max(count - len(names), 0)):
+        first, second = rng.choice(TAIL_WORDS, size=2, replace=False)
+        names.append(f"{first} {second} {_made_up_word(i)}".upper())
+        medians.append(float(np.exp(rng.uniform(np.log(4), np.log(150)))))
+    names, medians = names[:count], np.array(medians[:count])
+    weights = 1.0 / np.arange(1, len(names) + 1) ** 1.1
+    return names, medians, weights / weights.sum()
+
+def _describe(rng: np.random.Generator, merchants: List[str], dates: np.ndarray) -> List[str]:
+    patterns = rng.integers(0, len(DECORATIONS), size=len(merchants))
+    numbers = rng.integers(100, 99999, size=len(merchants))
+    cities = rng.integers(0, len(CITIES), size=len(merchants))
+    descriptions = []
+    for merchant, pattern, number, city, day in zip(merchants, patterns, numbers, cities, dates.tolist()):
+        c, s = CITIES[city]
+        descriptions.append(DECORATIONS[pattern].format(m=merchant, n=number, c=c, s=s, d=f"{day.month:02d}/{day.day:02d}"))
+    return descriptions
+
+def _scheduled(start: date, end: date, rng: np.random.Generator) -> List[Tuple[date, str, float]]:
+    """Subscriptions, bills and salary falling in [start, end)"""
+    rows = []
+    month = start.replace(day=1)
+    while month < end:
+        for merchant, amount, day, spread in MONTHLY_MERCHANTS:
+            charged = month + timedelta(days=day - 1)
+            if start <= charged < end:
+                if spread:
+                    amount = amount * float(rng.uniform(1 - spread, 1 + spread))
+                rows.append((charged, merchant, -round(amount, 2)))
+        month = (month + timedelta(days=32)).replace(day=1)
+
+    # Biweekly salary on Fridays from a fixed epoch
+    payday = date(2000, 1, 7) + timedelta(days=14 * -(-(start - date(2000, 1, 7)).days // 14))
+    while payday < end:
+        rows.append((payday, SALARY[0], SALARY[1]))
+        payday += timedelta(days=14)
+    return rows
+
+def iter_statements(
+    rows: int,
+    statement_rows: int = 10000,
+    merchants: int = 2000,
+    end: date = date(2025, 12, 31),
+    rows_per_day: float = 25.0,
+    seed: int = 0
+) -> Iterator[pd.DataFrame]:
+    """
+    Statements with Date, Description and Amount columns (debits negative), oldest first,
+    about statement_rows rows each and rows in total. Generated one statement at a time.
+    """
+    rng = np.random.default_rng(seed)
+    names, medians, probabilities = build_merchants(merchants, seed)
+    statements = max(1, -(-rows // statement_rows))
+    days_per_statement = max(1, round(statement_rows / rows_per_day))
+    start = end - timedelta(days=days_per_statement * statements)
+
+    remaining = rows
+    for index in range(statements):
+        window_start = start + timedelta(days=days_per_statement * index)
+        window_end = window_start + timedelta(days=days_per_statement)
+        size = min(statement_rows, remaining)
+        remaining -= size
+
+        scheduled = _scheduled(window_start, window_end, rng)[:size]
+        count = size - len(scheduled)
+        picks = rng.choice(len(names), size=count, p=probabilities)
+        offsets = rng.integers(0, days_per_statement, size=count)
+        dates = np.array([window_start + timedelta(days=int(offset)) for offset in offsets], dtype=object)
+        amounts = np.round(medians[picks] * rng.lognormal(0.0, 0.5, size=count), 2)
+        # A few refunds
+        amounts = np.where(rng.random(count) < 0.02, amounts, -amounts)
+
+        frame = pd.DataFrame({
+            "Date": np.concatenate([dates, np.array([row[0] for row in scheduled], dtype=object)]),
+            "Description": _describe(rng, [names[pick] for pick in picks], dates) + [row[1] for row in scheduled],
+            "Amount": np.concatenate([amounts, np.array([row[2] for row in scheduled], dtype=float)])
+        })
+        yield frame.sort_values("Date", kind="stable").reset_index(drop=True)
+
+def write_statements(directory: str, rows: int, **options) -> List[str]:
+    """Write the statements as CSV files into directory; returns their paths"""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for index, frame in enumerate(iter_statements(rows, **options)):
+        path = os.path.join(directory, f"statement_{index:05d}.csv")
+        frame.to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write synthetic bank statements as CSV files")
+    parser.add_argument("directory", help="Output directory")
+    parser.add_argument("--rows", type=int, default=100000, help="Transactions in total")
+    parser.add_argument("--statement-rows", type=int, default=10000, help="Transactions per statement file")
+    parser.add_argument("--merchants", type=int, default=2000, help="Distinct merchants")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+
+    args = parser.parse_args()
+    paths = write_statements(args.directory, args.rows, statement_rows=args.statement_rows, merchants=args.merchants, seed=args.seed)
+    print(f"Wrote {args.rows} transactions in {len(paths)} statements to {args.directory}")
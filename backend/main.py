@@ -1,15 +1,27 @@
-from fastapi import FastAPI, Depends, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
-from app.database import engine, Base
-from app.routers import transactions, categories, categorization, auth
+from app.database import engine, Base, record_user_write
+from app.routers import transactions, categories, categorization, auth, import_jobs, metrics, recurring
 from app.db_init import init_db
+from app.services.import_jobs import check_worker_settings, resume_import_jobs, shutdown_executor
 
 # Initialize database with tables and default data
 init_db()
 
-app = FastAPI(title="Bank Statement Classifier API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Resume import jobs interrupted by a restart, and stop the workers on shutdown"""
+    check_worker_settings()
+    resumed = resume_import_jobs()
+    if resumed:
+        print(f"Resumed {resumed} import jobs")
+    yield
+    shutdown_executor()
+
+app = FastAPI(title="Bank Statement Classifier API", lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -18,13 +30,25 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+# Reads of users who just wrote go to the primary instead of the read replica
+@app.middleware("http")
+async def track_user_writes(request: Request, call_next):
+    response = await call_next(request)
+    if request.method not in ("GET", "HEAD", "OPTIONS"):
+        record_user_write(getattr(request.state, "user_id", None))
+    return response
+
 # Include routers
 app.include_router(transactions.router, prefix="/api/transactions", tags=["transactions"])
 app.include_router(categories.router, prefix="/api/categories", tags=["categories"])
 app.include_router(categorization.router, prefix="/api/categorization", tags=["categorization"])
 app.include_router(auth.router, prefix="/api/auth", tags=["authentication"])
+app.include_router(import_jobs.router, prefix="/api/import-jobs", tags=["import jobs"])
+app.include_router(recurring.router, prefix="/api/recurring", tags=["recurring"])
+app.include_router(metrics.router, prefix="/api/metrics", tags=["metrics"])
 
 @app.get("/")
 async def root():
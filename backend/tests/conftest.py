@@ -0,0 +1,39 @@
+"""
+The app runs on scratch SQLite files in a temporary directory: a primary
+(DATABASE_URL) and a read replica (DATABASE_READ_URL) that nothing replicates to.
+Settings are read at import time, so they are set here, before the tests import the app.
+"""
+import os
+import sys
+import tempfile
+
+_data_dir = tempfile.mkdtemp(prefix="transaction-classifier-test-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_data_dir, 'primary.db')}"
+os.environ["DATABASE_READ_URL"] = f"sqlite:///{os.path.join(_data_dir, 'replica.db')}"
+os.environ["READ_YOUR_WRITES_SECONDS"] = "1"
+os.environ["IMPORT_JOBS_DIR"] = os.path.join(_data_dir, "jobs")
+os.environ["CLASSIFIER_MODELS_DIR"] = os.path.join(_data_dir, "models")
+
+# Add the backend directory to the path so we can import main and app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from app.database import Base, read_engine
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(main.app) as client:
+        Base.metadata.create_all(bind=read_engine)
+        yield client
+
+@pytest.fixture(scope="session")
+def signup(client):
+    """signup(username) -> (user id, auth headers) of a new user"""
+    def signup(username):
+        user = client.post("/api/auth/signup", json={"username": username, "password": "secret1"}).json()
+        response = client.post("/api/auth/token", data={"username": username, "password": "secret1"})
+        return user["id"], {"Authorization": f"Bearer {response.json()['access_token']}"}
+    return signup
@@ -0,0 +1,40 @@
+"""
+Read routing with a read replica: conftest.py points the primary (DATABASE_URL)
+and the replica (DATABASE_READ_URL) at two SQLite files. Nothing replicates
+between them, so which file a read went to shows in the rows it returns.
+"""
+import time
+from datetime import date
+
+from app.database import ReadSessionLocal, READ_YOUR_WRITES_SECONDS
+from app.models.transaction import Transaction
+
+def _descriptions(client, headers):
+    response = client.get("/api/transactions/", headers=headers)
+    assert response.status_code == 200
+    return [row["description"] for row in response.json()]
+
+def test_reads_follow_recent_writes(client, signup):
+    _, alice = signup("alice")
+    bob_id, bob = signup("bob")
+
+    # A row only the replica has
+    with ReadSessionLocal() as replica:
+        replica.add(Transaction(date=date(2024, 1, 2), description="REPLICA ONLY", amount=1.0, transaction_type="debit", user_id=bob_id))
+        replica.commit()
+
+    response = client.post("/api/transactions/", headers=alice, json={
+        "date": "2024-01-01", "description": "COFFEE", "amount": -4.5, "transaction_type": "debit"
+    })
+    assert response.status_code == 200
+
+    # Right after the write alice reads her own write from the primary
+    assert _descriptions(client, alice) == ["COFFEE"]
+    # Other users keep reading the replica
+    assert _descriptions(client, bob) == ["REPLICA ONLY"]
+
+    time.sleep(READ_YOUR_WRITES_SECONDS + 0.2)
+
+    # Once the window has passed alice reads the replica, which hasn't seen the write
+    assert _descriptions(client, alice) == []
+    assert _descriptions(client, bob) == ["REPLICA ONLY"]
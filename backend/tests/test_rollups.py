@@ -0,0 +1,83 @@
+"""
+The summary rollups are kept up to date by every write path with hand-written
+deltas; after each of them they must still match a live aggregate of the
+transactions table.
+"""
+from datetime import date
+
+import pytest
+
+from app.database import SessionLocal
+from app.models.transaction import Transaction
+from app.models.transaction_rollup import TransactionRollup
+from app.services.rollups import compare_rollups
+
+STATEMENT = b"""Date,Description,Amount
+2024-01-03,WHOLE FOODS MARKET,-82.10
+2024-01-05,ZQXWV GIZMO,-19.99
+2024-01-17,ACME CORP PAYROLL,3150.00
+2024-02-01,ZQXWV GIZMO,-24.50
+2024-02-09,SHELL OIL 5521,-41.30
+2024-02-11,Bad amount,abc
+"""
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    yield session
+    session.close()
+
+def assert_rollups_match(db, user_id):
+    db.expire_all()
+    assert compare_rollups(db, user_id) == []
+
+def test_rollups_follow_every_write_path(client, signup, db):
+    user_id, headers = signup("carol")
+
+    # CSV import
+    response = client.post("/api/transactions/upload-csv", headers=headers,
+                           files={"file": ("statement.csv", STATEMENT, "text/csv")})
+    assert response.status_code == 200
+    assert response.json()["successful"] == 5
+    assert db.query(TransactionRollup).filter(TransactionRollup.user_id == user_id).count() > 0
+    assert_rollups_match(db, user_id)
+
+    # Create, with a category
+    category_id = client.post("/api/categories/", headers=headers, json={"name": "Gizmos", "color": "#336699"}).json()["id"]
+    response = client.post("/api/transactions/", headers=headers, json={
+        "date": "2024-03-02", "description": "CORNER BAKERY", "amount": -7.25,
+        "transaction_type": "debit", "category_id": category_id
+    })
+    assert response.status_code == 200
+    created_id = response.json()["id"]
+    assert_rollups_match(db, user_id)
+
+    # Delete
+    assert client.delete(f"/api/transactions/{created_id}", headers=headers).status_code == 200
+    assert_rollups_match(db, user_id)
+
+    # Save unowned transactions to the user
+    unowned = [
+        Transaction(date=date(2024, 3, 4), description="FARMERS MARKET", amount=-12.0, transaction_type="debit"),
+        Transaction(date=date(2024, 4, 1), description="REFUND", amount=15.0, transaction_type="credit")
+    ]
+    db.add_all(unowned)
+    db.commit()
+    response = client.post("/api/transactions/save-to-user", headers=headers, json=[row.id for row in unowned])
+    assert response.json()["count"] == 2
+    assert_rollups_match(db, user_id)
+
+    # Auto-categorize, after adding a rule for rows the import left uncategorized
+    uncategorized = db.query(Transaction).filter(
+        Transaction.user_id == user_id,
+        Transaction.description == "ZQXWV GIZMO"
+    ).all()
+    assert [row.category_id for row in uncategorized] == [None, None]
+    response = client.post("/api/categorization/rules", headers=headers, json={
+        "category_id": category_id, "pattern": "zqxwv", "match_type": "substring", "priority": 1
+    })
+    assert response.status_code == 200
+    assert client.post("/api/categorization/auto-categorize", headers=headers).status_code == 200
+    db.expire_all()
+    assert {row.category_id for row in uncategorized} == {category_id}
+    assert_rollups_match(db, user_id)